@@ -0,0 +1,135 @@
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import numpy as np
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Any
+
+sys.path.insert(0, str(Path(__file__).parent))
+from utils import CosyTrafo
+from utils import MatrixCalculations
+from utils.Vector import Vector, VectorArray
+from utils.Rotation3D import Rotation, rotate_roll
+from utils.PoseSampler import sample_poses, look_at_matrices
+from utils.PosePlanner import CameraIntrinsics, bounding_box_corners, plan_poses
+from utils.Annotations import annotate
+from utils.Benchmark import time_call, append_run, load_history, find_run, compare_runs
+
+
+def micro_benchmarks() -> Dict[str, Callable[[], Any]]:
+    """Benchmarks of the coordinate and pose helpers which run without Blender"""
+    rng = np.random.default_rng(0)
+    points = np.column_stack((rng.uniform(1, 10, 10000), rng.uniform(0, np.pi, 10000),
+                              rng.uniform(-np.pi, np.pi, 10000)))
+    rows = [tuple(row) for row in points[:1000]]
+    vectors = VectorArray(points, csys="spherical")
+    rotation = Rotation.from_roll_pitch_yaw(10, 20, 30)
+    cartesian = vectors.to_cartesian().to_numpy()
+    matrix = ((1.0, 2.0, 3.0), (4.0, 5.0, 6.0), (7.0, 8.0, 9.0))
+    corners = bounding_box_corners((-1, -1, -1), (1, 1, 1))
+    intrinsics = CameraIntrinsics.from_fov()
+    poses = sample_poses(100000, np.random.default_rng(0))
+    return {
+        "cosy_trafo.spherical_to_cartesian_1k": lambda: [CosyTrafo.spherical_to_cartesian(*row) for row in rows],
+        "cosy_trafo.spherical_to_cartesian_batch_10k": lambda: CosyTrafo.spherical_to_cartesian_batch(points),
+        "vector.to_cartesian_1k": lambda: [Vector(*row, "spherical").to_cartesian() for row in rows],
+        "vector_array.to_cartesian_10k": lambda: VectorArray(points, csys="spherical").to_cartesian(),
+        "rotation3d.rotate_roll_1k": lambda: [rotate_roll(row, 30.0) for row in rows],
+        "rotation3d.apply_10k": lambda: rotation.apply(cartesian),
+        "matrix_calculations.mat_multiply_1k": lambda: [MatrixCalculations.mat_multiply(matrix, row) for row in rows],
+        "pose_sampler.look_at_matrices_10k": lambda: look_at_matrices(cartesian),
+        "pose_sampler.sample_poses_10k": lambda: sample_poses(10000, np.random.default_rng(0),
+                                                              area_light_probability=0.5),
+        "pose_planner.plan_poses_farthest_1k": lambda: plan_poses(1000, np.random.default_rng(0), corners, intrinsics,
+                                                                  strategy="farthest", min_onscreen=1.0),
+        "annotations.annotate_100k": lambda: annotate(poses, intrinsics, corners),
+    }
+
+
+def run_micro(selection: Optional[str] = None, repeat: int = 5) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for name, func in micro_benchmarks().items():
+        if selection and selection not in name:
+            continue
+        results[name] = {"median_s": time_call(func, repeat=repeat)["median_s"]}
+        print(f"{name:<50}{results[name]['median_s'] * 1e3:>12.4f} ms")
+    return results
+
+
+def run_render(
+        n_frames: int,
+        preset: str = "preview",
+        chunk_size: int = 0,
+        threads: int = 0,
+        blenderproc: str = "blenderproc",
+        script: Optional[Path] = None
+) -> Dict[str, Dict[str, float]]:
+    """
+    Renders n_frames of the MONKEY primitive on the CPU with a fixed preset and reads the profile of the run, with an
+    empty cache, so that every run prepares its scene and the results are comparable
+    """
+    script = Path(__file__).parent / "render1.py" if script is None else script
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        output_dir = Path(tmp_dir) / "output"
+        command = [blenderproc, "run", str(script), "--output-dir", str(output_dir), "--n-images", str(n_frames),
+                   "--preset", preset, "--chunk-size", str(chunk_size), "--threads", str(threads), "--cpu-only",
+                   "--cache-dir", str(Path(tmp_dir) / "cache"), "--profile"]
+        subprocess.run(command, check=True)
+        with open(output_dir / "profile_summary.json") as file:
+            summary = json.load(file)
+    metrics = {"frames_per_s": summary["frames_per_s"], "wall_s": summary["wall_s"],
+               "peak_rss_mb": summary["peak_rss_mb"]}
+    metrics.update({f"{stage}_s": stats["total_s"] for stage, stats in summary["stages"].items()})
+    name = f"render.monkey_{preset}_{n_frames}_frames"
+    print(f"{name}: {metrics['frames_per_s']:.3f} frames/s, peak RSS {metrics['peak_rss_mb']} MB")
+    return {name: metrics}
+
+
+def print_comparison(changes: List[Dict[str, Any]]) -> None:
+    print(f"{'benchmark':<50}{'metric':<22}{'baseline':>12}{'current':>12}{'change':>10}")
+    for change in changes:
+        flag = "  REGRESSION" if change["regression"] else ""
+        print(f"{change['benchmark']:<50}{change['metric']:<22}{change['baseline']:>12.4g}{change['current']:>12.4g}"
+              f"{change['change']:>+10.1%}{flag}")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the helpers and the render pipeline, track the results.")
+    parser.add_argument("--history", default="benchmarks.json", help="JSON history the results are appended to")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    micro = commands.add_parser("micro", help="micro benchmarks of the coordinate and pose helpers")
+    micro.add_argument("--select", default=None, help="only run benchmarks whose name contains this text")
+    micro.add_argument("--repeat", type=int, default=5, help="measurements per benchmark")
+    micro.add_argument("--label", default=None, help="label of the run in the history, e.g. a version")
+
+    render = commands.add_parser("render", help="CPU-only end-to-end render benchmark of the MONKEY primitive")
+    render.add_argument("--frames", type=int, default=16, help="number of rendered frames")
+    render.add_argument("--preset", default="preview", help="render preset fixing resolution and sample count")
+    render.add_argument("--chunk-size", type=int, default=0, help="frames per render call")
+    render.add_argument("--threads", type=int, default=0, help="CPU threads, 0: the thread count of the preset")
+    render.add_argument("--blenderproc", default="blenderproc", help="blenderproc executable")
+    render.add_argument("--label", default=None, help="label of the run in the history, e.g. a version")
+
+    compare = commands.add_parser("compare", help="compare two runs of the history, exit code 1 on regressions")
+    compare.add_argument("--baseline", default="-2", help="label or position of the baseline run, default: -2")
+    compare.add_argument("--current", default="-1", help="label or position of the compared run, default: -1")
+    compare.add_argument("--threshold", type=float, default=0.1,
+                         help="relative slowdown flagged as regression, default: 0.1 (10 %%)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.command == "compare":
+        runs = load_history(args.history)
+        changes = compare_runs(find_run(runs, args.baseline), find_run(runs, args.current), args.threshold)
+        print_comparison(changes)
+        sys.exit(1 if any(change["regression"] for change in changes) else 0)
+    if args.command == "micro":
+        results = run_micro(args.select, args.repeat)
+    else:
+        results = run_render(args.frames, args.preset, args.chunk_size, args.threads, args.blenderproc)
+    append_run(args.history, results, label=args.label)
@@ -0,0 +1,266 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+from typing import List, Tuple, Optional, Union
+
+sys.path.insert(0, str(Path(__file__).parent))
+from utils.ImageWriter import write_json_atomic
+from utils.DatasetWriter import merge_indices
+from utils.RunManifest import RunManifest, merge_manifests
+from utils.PosePlanner import STRATEGIES
+from utils.RenderPresets import PRESETS
+from utils.JobConfig import (JobSpec, JOB_FILE, OUTPUTS, load_config, expand_jobs, read_job, write_job,
+                             with_colors)
+
+
+def split_shards(n_images: int, n_workers: int) -> List[Tuple[int, int]]:
+    """Split the dataset indices [0, n_images) into at most n_workers contiguous ranges [start, end)"""
+    n_workers = max(1, min(n_workers, n_images))
+    size, rest = divmod(n_images, n_workers)
+    shards = []
+    start = 0
+    for k in range(n_workers):
+        end = start + size + (1 if k < rest else 0)
+        shards.append((start, end))
+        start = end
+    return shards
+
+
+def worker_command(
+        script: Union[str, Path],
+        job_path: Path,
+        shard: Tuple[int, int],
+        shard_dir: Path,
+        args: argparse.Namespace,
+        threads: int
+) -> List[str]:
+    """Command line of one blenderproc worker rendering the indices of its shard of the job"""
+    start, end = shard
+    return [
+        args.blenderproc, "run", str(script),
+        "--job", str(job_path),
+        "--output-dir", str(shard_dir),
+        "--start", str(start),
+        "--end", str(end),
+        "--threads", str(threads),
+        "--chunk-size", str(args.chunk_size),
+        *(["--cache-dir", args.cache_dir] if args.cache_dir else []),
+        *(["--resume"] if args.resume else []),
+    ]
+
+
+def merge_shards(
+        shard_dirs: List[Path],
+        output_dir: Path,
+        manifest_name: str = "manifest.json",
+        index_name: str = "index.json",
+        run_manifest_name: str = "run_manifest.jsonl",
+        append: bool = False
+) -> int:
+    """
+    Move the outputs of all shards into the dataset directory and combine their image manifests, dataset indices and
+    run manifests, returns the number of merged files
+    :param append: keep the frames of the dataset already in output_dir, e.g. when extending it
+    """
+    n_files = 0
+    frames = []
+    index_paths = []
+    sources = [output_dir, *shard_dirs] if append else shard_dirs
+    run_manifest_paths = [source / run_manifest_name for source in sources if (source / run_manifest_name).exists()]
+    if run_manifest_paths:
+        merge_manifests(run_manifest_paths, output_dir / run_manifest_name)
+    if append and (output_dir / manifest_name).exists():
+        with open(output_dir / manifest_name) as file:
+            frames.extend(json.load(file)["frames"])
+    if append and (output_dir / index_name).exists():
+        index_paths.append(output_dir / index_name)
+    for shard_dir in shard_dirs:
+        manifest_path = shard_dir / manifest_name
+        if manifest_path.exists():
+            with open(manifest_path) as file:
+                frames.extend(json.load(file)["frames"])
+            manifest_path.unlink()
+        for file in sorted(shard_dir.iterdir()):
+            if file.name in (index_name, run_manifest_name, JOB_FILE):
+                continue
+            os.replace(file, output_dir / file.name)
+            n_files += 1
+        if (shard_dir / index_name).exists():
+            index_paths.append(shard_dir / index_name)
+    if frames:
+        frames.sort(key=lambda record: record["index"])
+        write_json_atomic(output_dir / manifest_name, {"frames": frames})
+    if index_paths:
+        merge_indices(index_paths, output_dir / index_name)
+    for shard_dir in shard_dirs:
+        shutil.rmtree(shard_dir)
+    return n_files
+
+
+def run_shards(job: JobSpec, args: argparse.Namespace, script: Optional[Path] = None, first_index: int = 0) -> int:
+    """
+    Render the dataset of the job with parallel blenderproc workers and merge their outputs
+    :param first_index: only render the indices [first_index, n_images) and add them to the dataset in the output
+    directory, whose run manifest is extended
+    """
+    script = Path(__file__).parent / "render1.py" if script is None else script
+    output_dir = Path(job.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    extend = first_index > 0
+    if extend:
+        # the manifest of the dataset takes the configuration of the extended job, so that the shards can be merged
+        RunManifest(output_dir / "run_manifest.jsonl", job.generation_config(), extend=True)
+    else:
+        if args.resume and (output_dir / "run_manifest.jsonl").exists():
+            # as for a single process, a run can only be resumed with the configuration it was started with
+            RunManifest(output_dir / "run_manifest.jsonl", job.generation_config(), resume=True)
+        # the job file records the settings and the config hash next to the outputs
+        write_job(job, output_dir / JOB_FILE)
+
+    shards = [(first_index + start, first_index + end)
+              for start, end in split_shards(job.n_images - first_index, args.workers)]
+    # thread budget per worker, so that the workers together do not oversubscribe the machine
+    threads = args.threads if args.threads > 0 else max(1, (os.cpu_count() or 1) // len(shards))
+
+    if args.resume:
+        # the outputs of an interrupted run are kept in its shard directories, which depend on the number of workers
+        existing = {path.name for path in output_dir.glob(".shard*")}
+        expected = {f".shard{k}" for k in range(len(shards))}
+        # the index ranges of the shards depend on their number, so every kept shard has to be run with its range
+        if existing and existing != expected:
+            raise ValueError(f"The interrupted run in {output_dir} used {len(existing)} workers, "
+                             f"resume it with the same number of workers.")
+        if not extend and not existing and (output_dir / "run_manifest.jsonl").exists():
+            # the shards of the run have already been completed and merged
+            return 0
+
+    shard_dirs = []
+    processes = []
+    for k, shard in enumerate(shards):
+        shard_dir = output_dir / f".shard{k}"
+        if shard_dir.exists() and not args.resume:
+            shutil.rmtree(shard_dir)
+        shard_dir.mkdir(exist_ok=True)
+        shard_dirs.append(shard_dir)
+        # every worker reads the job from its shard directory
+        write_job(job, shard_dir / JOB_FILE)
+        processes.append(subprocess.Popen(worker_command(script, shard_dir / JOB_FILE, shard, shard_dir, args,
+                                                         threads)))
+
+    failed = [k for k, process in enumerate(processes) if process.wait() != 0]
+    if failed:
+        # keep the shard directories for inspection
+        raise RuntimeError(f"The workers of the shards {failed} failed, outputs are kept in {output_dir}.")
+    n_merged = merge_shards(shard_dirs, output_dir, append=extend)
+    # written last when extending, an interrupted extension is resumed with the job of the original dataset
+    write_job(job, output_dir / JOB_FILE)
+    return n_merged
+
+
+def job_from_args(args: argparse.Namespace) -> JobSpec:
+    """The job of the dataset settings on the command line"""
+    if args.obj is None or args.output_dir is None or args.n_images is None:
+        raise ValueError("Without --config, --obj, --output-dir and --n-images are required.")
+    return JobSpec(obj=args.obj, texture=args.texture, output_dir=args.output_dir, n_images=args.n_images,
+                   seed=args.seed, preset=args.preset, pose_strategy=args.pose_strategy,
+                   min_coverage=args.min_coverage, min_onscreen=args.min_onscreen, dataset_format=args.dataset_format,
+                   frames_per_shard=args.frames_per_shard, shard_compression=not args.uncompressed_shards,
+                   outputs=with_colors(args.outputs), float_dtype=args.float_dtype,
+                   clutter_parts=tuple(args.clutter_parts), clutter_counts=tuple(args.clutter_counts),
+                   clutter_extent=tuple(args.clutter_extent))
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Render datasets with several Blender workers in parallel.")
+    parser.add_argument("--config", default=None,
+                        help="job configuration (.json, .toml or .yaml) with defaults, a parameter sweep and an "
+                             "output directory template; the dataset settings below are only used without it")
+    parser.add_argument("--job-index", type=int, default=None, help="render only the job of this index of the sweep")
+    parser.add_argument("--list", action="store_true", help="print the jobs of the configuration without rendering")
+    dataset = parser.add_argument_group("dataset settings")
+    dataset.add_argument("--obj", default=None, help="path to the .obj file")
+    dataset.add_argument("--texture", default=None, help="path to the texture image")
+    dataset.add_argument("--output-dir", default=None, help="dataset directory the images are merged into")
+    dataset.add_argument("--n-images", type=int, default=None, help="total number of images of the dataset")
+    dataset.add_argument("--seed", type=int, default=JobSpec.seed, help="seed of the dataset")
+    dataset.add_argument("--pose-strategy", choices=STRATEGIES, default=JobSpec.pose_strategy,
+                         help="random views, views of a Fibonacci lattice or farthest point selection of random views")
+    dataset.add_argument("--min-coverage", type=float, default=JobSpec.min_coverage,
+                         help="reject views in which the object's bounding box covers less of the image")
+    dataset.add_argument("--min-onscreen", type=float, default=JobSpec.min_onscreen,
+                         help="reject views in which less of the object's bounding box is inside the image")
+    dataset.add_argument("--preset", choices=list(PRESETS), default=None,
+                         help="render quality preset, see utils/RenderPresets.py")
+    dataset.add_argument("--dataset-format", choices=["png", "hdf5", "npz"], default=JobSpec.dataset_format,
+                         help="loose png images or shard files of frames with their pose and light annotations")
+    dataset.add_argument("--frames-per-shard", type=int, default=JobSpec.frames_per_shard,
+                         help="frames per hdf5/npz shard file")
+    dataset.add_argument("--uncompressed-shards", action="store_true",
+                         help="store the shards uncompressed, so that readers can memory-map npz shards")
+    dataset.add_argument("--outputs", nargs="+", choices=OUTPUTS, default=list(JobSpec.outputs),
+                         help="render outputs stored per frame: colors, depth, normals, segmentation; "
+                              "the colors are always stored")
+    dataset.add_argument("--float-dtype", choices=["float32", "float16"], default=JobSpec.float_dtype,
+                         help="dtype of the stored depth and normals")
+    dataset.add_argument("--clutter-parts", nargs="*", default=list(JobSpec.clutter_parts),
+                         help=".obj files of the clutter around the object")
+    dataset.add_argument("--clutter-counts", nargs="*", type=int, default=list(JobSpec.clutter_counts),
+                         help="number of instances of every clutter part")
+    dataset.add_argument("--clutter-extent", nargs=3, type=float, default=list(JobSpec.clutter_extent),
+                         help="the clutter is placed within object position +- this (x, y, z) extent")
+    parser.add_argument("--workers", type=int, default=1, help="number of parallel blenderproc processes per job")
+    parser.add_argument("--threads", type=int, default=0,
+                        help="CPU threads per worker, 0: split the CPU cores evenly among the workers")
+    parser.add_argument("--chunk-size", type=int, default=0,
+                        help="frames per render call of a worker, 0: all frames of the shard in one call")
+    parser.add_argument("--cache-dir", default=None,
+                        help="directory of the prepared textures and scene snapshots shared by the workers, "
+                             "default: the one of render1.py")
+    parser.add_argument("--extend", type=int, default=0,
+                        help="add this number of frames to the dataset in output-dir, rendered with its job")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue interrupted runs in their output directories with the same number of workers")
+    parser.add_argument("--blenderproc", default="blenderproc", help="blenderproc executable")
+    return parser.parse_args(argv)
+
+
+def select_jobs(args: argparse.Namespace) -> List[JobSpec]:
+    """The validated jobs of the configuration file or of the command line"""
+    if args.config is None:
+        return [job_from_args(args)]
+    jobs = expand_jobs(load_config(args.config))
+    if args.job_index is not None:
+        if not 0 <= args.job_index < len(jobs):
+            raise ValueError(f"The configuration has {len(jobs)} jobs, there is no job {args.job_index}.")
+        return [jobs[args.job_index]]
+    return jobs
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.extend:
+        # the extended dataset keeps its job, only the number of frames grows
+        if args.output_dir is None:
+            raise ValueError("--extend requires the --output-dir of the dataset.")
+        dataset_job = read_job(Path(args.output_dir) / JOB_FILE).replace(output_dir=args.output_dir)
+        if dataset_job.pose_strategy != "random":
+            raise ValueError(f"Only datasets of random views can be extended, the views of the pose strategy "
+                             f"'{dataset_job.pose_strategy}' are arranged for the size of the dataset.")
+        n_merged = run_shards(dataset_job.replace(n_images=dataset_job.n_images + args.extend), args,
+                              first_index=dataset_job.n_images)
+        print(f"Merged {n_merged} files.")
+        sys.exit(0)
+    jobs = select_jobs(args)
+    if args.list:
+        for k, job in enumerate(jobs):
+            print(f"{k}\t{job.config_hash()[:12]}\t{job.output_dir}\t{json.dumps(job.generation_config())}")
+        sys.exit(0)
+    # the jobs run one after the other, each one split among all workers
+    for k, job in enumerate(jobs):
+        print(f"Job {k + 1}/{len(jobs)}: {job.output_dir}")
+        n_merged = run_shards(job, args)
+        print(f"Merged {n_merged} files.")
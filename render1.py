@@ -1,197 +1,375 @@
 import blenderproc as bproc
 import bpy
-import math
 import random
 import numpy as np
 import warnings
-import os
-from blenderproc.scripts.saveAsImg import save_array_as_image
+import argparse
+import sys
 from pathlib import Path
-from numpy.typing import NDArray
-from mathutils import Vector, Matrix
-from typing import Tuple, Union, List, Dict
-
-
-
-
-def choose_and_set_light(
-        position: Union[List[float], Tuple[float, float, float], NDArray[np.float64]],
-        energy: int,
-        p: float
-) -> None:
-    """Selection of a point or bar light source from a given position and energy according to the p-value"""
-    assert (0 <= p <= 1), ValueError("Input 'p' must be between 0 and 1.")
-    light = bproc.types.Light()
-    if random.random() < p:
-        # create bar light
-        light.set_type("AREA")
-    else:
-        # create point light if greater the user-defined percentage
-        light.set_type("POINT")
-    light.set_energy(energy)
-    light.set_location(position.tolist())
-
-
-def create_perpendicular_vector(
-    v: Union[List[float], Tuple[float, float, float], NDArray[np.float64]]
-) -> Tuple[NDArray[np.float64], NDArray[np.float64]]:
-    """Find two simple vector which perpendicular to v"""
-    x, y, z = v
-    if x == 0 and y == 0:
-        return np.asarray((1, 0, 0)), np.asarray((0, 1, 0))
+from typing import Tuple, Union, List, Dict, Optional, Sequence
+
+sys.path.insert(0, str(Path(__file__).parent))
+from utils.PoseSampler import PoseTable
+from utils.PosePlanner import STRATEGIES, plan_pose_sequence
+from utils.ImageWriter import AsyncImageWriter, write_json_atomic
+from utils.DatasetWriter import ShardedDatasetWriter
+from utils.RunManifest import RunManifest
+from utils.Profiler import StageProfiler
+from utils.RenderPresets import PRESETS, get_preset
+from utils.JobConfig import JobSpec, JOB_FILE, OUTPUTS, read_job, write_job, with_colors
+from utils.TextureCache import TextureCache, list_textures, texture_size_for, assign_textures
+from utils.SceneCache import SceneCache, scene_key
+from utils.Colors import color2rgb, parse_palette, sample_colors
+from utils.SceneComposer import bounding_sphere, instance_parts, sample_layouts
+from utils.BlenderScene import (SCENE_SNAPSHOT_VERSION, load_object, choose_and_set_light, load_texture, add_texture,
+                                object_key, save_snapshot, load_snapshot, set_background_color, camera_intrinsics,
+                                apply_render_preset, datablock_counts, enable_render_outputs, InstancePool)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Render images from random positions around a 3D object.")
+    parser.add_argument("--job", default=None,
+                        help="job file (json, written by launcher.py) with the settings of the dataset; "
+                             "the dataset settings below are only used without a job file")
+    parser.add_argument("--output-dir", default=None,
+                        help="directory the images are written to, overrides the directory of the job")
+    dataset = parser.add_argument_group("dataset settings")
+    dataset.add_argument("--obj", default=None, help="path to the .obj file, default: the MONKEY primitive")
+    dataset.add_argument("--texture", default=None, help="path to the texture image")
+    dataset.add_argument("--n-images", type=int, default=JobSpec.n_images, help="total number of images of the dataset")
+    dataset.add_argument("--seed", type=int, default=JobSpec.seed, help="seed of the dataset")
+    dataset.add_argument("--pose-strategy", choices=STRATEGIES, default=JobSpec.pose_strategy,
+                         help="random views, views of a Fibonacci lattice or farthest point selection of random views")
+    dataset.add_argument("--min-coverage", type=float, default=JobSpec.min_coverage,
+                         help="reject views in which the object's bounding box covers less of the image")
+    dataset.add_argument("--min-onscreen", type=float, default=JobSpec.min_onscreen,
+                         help="reject views in which less of the object's bounding box is inside the image")
+    dataset.add_argument("--preset", choices=list(PRESETS), default=None,
+                         help="render quality preset (samples, noise threshold, denoiser, resolution, light bounces), "
+                              "default: the BlenderProc defaults")
+    dataset.add_argument("--dataset-format", choices=["png", "hdf5", "npz"], default=JobSpec.dataset_format,
+                         help="loose png images or shard files of frames with their pose and light annotations")
+    dataset.add_argument("--frames-per-shard", type=int, default=JobSpec.frames_per_shard,
+                         help="frames per hdf5/npz shard file")
+    dataset.add_argument("--uncompressed-shards", action="store_true",
+                         help="store the shards uncompressed, so that readers can memory-map npz shards")
+    dataset.add_argument("--outputs", nargs="+", choices=OUTPUTS, default=list(JobSpec.outputs),
+                         help="render outputs stored per frame, all of them come from the same render pass; "
+                              "the colors are always stored")
+    dataset.add_argument("--float-dtype", choices=["float32", "float16"], default=JobSpec.float_dtype,
+                         help="dtype of the stored depth and normals, float16 halves their size")
+    dataset.add_argument("--clutter-parts", nargs="*", default=list(JobSpec.clutter_parts),
+                         help=".obj files of the clutter placed around the object, each is loaded once")
+    dataset.add_argument("--clutter-counts", nargs="*", type=int, default=list(JobSpec.clutter_counts),
+                         help="number of instances of every clutter part")
+    dataset.add_argument("--clutter-extent", nargs=3, type=float, default=list(JobSpec.clutter_extent),
+                         help="the clutter is placed within object position +- this (x, y, z) extent")
+    parser.add_argument("--start", type=int, default=0, help="first dataset index rendered by this process")
+    parser.add_argument("--end", type=int, default=None, help="dataset index to stop at (exclusive), default: n-images")
+    parser.add_argument("--threads", type=int, default=0,
+                        help="number of CPU threads used to render, 0: the thread count of the preset")
+    parser.add_argument("--chunk-size", type=int, default=0,
+                        help="number of frames rendered per render call, 0: all frames of the process in one call")
+    parser.add_argument("--writer-threads", type=int, default=2, help="number of threads encoding the images")
+    parser.add_argument("--max-pending", type=int, default=8,
+                        help="number of rendered frames which may wait for encoding before rendering blocks")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue the run in output-dir: skip the completed indices and render the missing ones")
+    parser.add_argument("--extend", type=int, default=0,
+                        help="add this number of frames to the dataset in output-dir, which are rendered with the job "
+                             "of the dataset and continue its pose sequence")
+    parser.add_argument("--verify-hash", action="store_true",
+                        help="verify existing outputs by their hash instead of their size only when resuming")
+    parser.add_argument("--profile", action="store_true",
+                        help="measure the pipeline stages, write a trace and print a summary at the end")
+    parser.add_argument("--trace", default=None, help="JSONL trace of the profiler, default: output-dir/profile.jsonl")
+    parser.add_argument("--cache-dir", default=str(Path.home() / ".cache" / "BlenderImageRendering"),
+                        help="directory of the prepared textures and scene snapshots, shared by all jobs and workers")
+    parser.add_argument("--no-scene-cache", action="store_true",
+                        help="always set up the scene from the input files instead of loading a cached snapshot")
+    parser.add_argument("--cpu-only", action="store_true", help="render on the CPU even if a GPU is available")
+    return parser.parse_args(argv)
+
+
+def job_from_args(args: argparse.Namespace) -> JobSpec:
+    """The job of the job file or of the dataset settings on the command line"""
+    if args.job is not None:
+        job = read_job(args.job)
+    elif args.extend:
+        # the job of the dataset which is extended
+        job = read_job(Path(args.output_dir or JobSpec.output_dir) / JOB_FILE)
     else:
-        perp1 = np.array([-y, x, 0])
-        perp1 = perp1 / np.linalg.norm(perp1)
-        perp2 = np.cross(v, perp1)
-        perp2 = perp2 / np.linalg.norm(perp2)
-        return perp1, perp2
-
-
-def look_at(
-    camera_location: Union[List[float], Tuple[float, float, float], NDArray[np.float64]],
-    target_location: Union[List[float], Tuple[float, float, float], NDArray[np.float64]],
-) -> Tuple[float, float, float]:
-    """Let the camera look at the object"""
-    direction = Vector(target_location) - Vector(camera_location)
-    # the rotation needed to align the default forward direction (-Z) with the computed direction vector
-    # the direction of Y does not change during rotation
-    return direction.to_track_quat("-Z", "Y").to_euler()
-
-def add_texture(image_path: Union[str, Path], obj: object):
-    # check if obj object format
-    if not isinstance(obj, bproc.types.MeshObject):
-        raise ValueError(
-            "The provided object is not a valid BlenderProc MeshObject. Make sure to pass a correct object.")
-    image_path = Path(image_path).absolute()
-    # create material
-    material = bproc.material.create("stl_material")
-    # load image
-    image = bpy.data.images.load(filepath=str(image_path))
-    # Sets the material's Base Color to Texture
-    material.set_principled_shader_value("Base Color", image)
-    obj.replace_materials(material)
-
-
-def color2rgb(color: Union[str, Tuple[int, int, int], List[int]]) -> Tuple[float, float, float]:
-    """
-    Parses a user-defined color string and converts it to an RGB tuple that Blender can use.
-    """
-    # judgment the formate 'R,G,B' or '#RRGGBB'
-
-    if isinstance(color, str):
-        if re.match(r"^#([0-9A-Fa-f]{6})$", color):
-            r, g, b = tuple(int(color[i:i + 2], 16) for i in (1, 3, 5))
-        else:
-            # convert to tuple
-            try:
-                r, g, b = ast.literal_eval(color)
-            except Exception as ex:
-                r, g, b = 255, 255, 255
-                ValueError("Color must be in the format 'R,G,B' or '#RRGGBB'.")
-    else:
-        r, g, b = color
-
-    # normalize
-    r /= 255.0
-    g /= 255.0
-    b /= 255.0
-    return r, g, b
-
-def random_point_on_unit_circle() -> Tuple[float, float]:
-    """return the unit(x,y) in circle"""
-    angle = random.uniform(0, 2 * math.pi)
-    return math.cos(angle), math.sin(angle)
-
-
-def change_to_spherical(theta: float, phi: float, radius: float) -> Tuple[float, float, float]:
-    """Transform spherical to Cartesian"""
-    camera_x = radius * math.sin(theta) * math.cos(phi)
-    camera_y = radius * math.sin(theta) * math.sin(phi)
-    camera_z = radius * math.cos(theta)
-    return camera_x, camera_y, camera_z
-
-
-
-
+        job = JobSpec(obj=args.obj, texture=args.texture, n_images=args.n_images, seed=args.seed, preset=args.preset,
+                      pose_strategy=args.pose_strategy, min_coverage=args.min_coverage,
+                      min_onscreen=args.min_onscreen, dataset_format=args.dataset_format,
+                      frames_per_shard=args.frames_per_shard, shard_compression=not args.uncompressed_shards,
+                      outputs=with_colors(args.outputs), float_dtype=args.float_dtype,
+                      clutter_parts=tuple(args.clutter_parts), clutter_counts=tuple(args.clutter_counts),
+                      clutter_extent=tuple(args.clutter_extent))
+    if args.output_dir is not None:
+        job = job.replace(output_dir=args.output_dir)
+    if args.extend:
+        if job.pose_strategy != "random":
+            raise ValueError(f"The views of the pose strategy '{job.pose_strategy}' are arranged for the size of the "
+                             f"dataset, only datasets of random views can be extended.")
+        job = job.replace(n_images=job.n_images + args.extend)
+    return job
+
+
+def chunk_ranges(groups: List[int], chunk_size: int) -> List[Tuple[int, int]]:
+    """Ranges [start, end) of at most chunk_size consecutive positions which belong to the same group"""
+    ranges = []
+    start = 0
+    for end in range(1, len(groups) + 1):
+        if end == len(groups) or end - start == chunk_size or groups[end] != groups[start]:
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def render_outputs(data: Dict[str, List[np.ndarray]], frame: int, outputs: Sequence[str],
+                   float_dtype: str = "float32") -> Dict[str, np.ndarray]:
+    """The outputs besides the colors of the frame of a render call, depth and normals as float_dtype"""
+    arrays = {}
+    if "depth" in outputs:
+        depth = np.asarray(data["depth"][frame], dtype=np.float32)
+        if float_dtype == "float16":
+            # the background is far away, which would overflow to inf
+            depth = np.minimum(depth, np.finfo(np.float16).max)
+        arrays["depth"] = depth.astype(float_dtype)
+    if "normals" in outputs:
+        arrays["normals"] = np.asarray(data["normals"][frame]).astype(float_dtype)
+    if "segmentation" in outputs:
+        arrays["segmentation"] = np.asarray(data["instance_segmaps"][frame]).astype(np.uint16)
+    return arrays
+
+
+def frame_metadata(poses: PoseTable, offset: int, preset_name: str = "default") -> Dict[str, Union[float, str, List]]:
+    """Camera, light and render configuration which produced the frame at the offset of the pose table"""
+    return {
+        "camera_matrix": poses.camera_matrices[offset].tolist(),
+        "light_position": poses.light_positions[offset].tolist(),
+        "light_type": "AREA" if poses.area_lights[offset] else "POINT",
+        "light_energy": float(poses.light_energies[offset]),
+        "render_preset": preset_name,
+    }
 
 
 if __name__ == "__main__":
+    args = parse_args()
+    job = job_from_args(args)
     bproc.init()
+    if args.cpu_only:
+        bproc.renderer.set_render_devices(use_only_cpu=True)
+    preset = None if job.preset is None else get_preset(job.preset)
+    if preset is None:
+        bproc.renderer.set_cpu_threads(args.threads)
+    else:
+        apply_render_preset(preset, cpu_threads=args.threads)
+    preset_name = "default" if preset is None else preset.name
     #If the obj file doesn't have uv coordinates, you need to create them yourself,
     # otherwise the added texture will only show the base colour with no texture.
-    objpath = "C:/Users/TianXue/Downloads/new.obj"
-    image_dir = "C:/Users/TianXue/PycharmProjects/BlenderImageRendering/sample_texture.jpg"
-    output_dir = Path("C:/Users/TianXue/PycharmProjects/BlenderImageRendering")
-    n_images = 4
-    max_theta = np.pi
-    max_phi = np.pi
-    light_percentage = random.uniform(0, 1)
-    background_color = (255, 255, 255)
-
-    distance_object_camera: Tuple[int, int] = (35, 60)  # milli meter
+    objpath = job.obj
+    image_dir = job.texture
+    output_dir = Path(job.output_dir)
+    n_images = job.n_images
+    # the indices [start, end) of the dataset rendered by this process
+    start = args.start
+    end = n_images if args.end is None else min(args.end, n_images)
+    max_theta = job.max_theta
+    max_phi = job.max_phi
+    # drawn from the dataset seed if not configured, so that all workers of a dataset agree on it
+    light_percentage = job.light_percentage
+    if light_percentage is None:
+        light_percentage = random.Random(job.seed).uniform(0, 1)
+    background_color = job.background_color
+
+    distance_object_camera = job.distance_object_camera  # milli meter
     # light settings
-    light_energy: Tuple[int, int] = (500, 1000)
-    distance_light_camera: Tuple[int, int] = (1, 50)  # milli meter
+    light_energy = job.light_energy
+    distance_light_camera = job.distance_light_camera  # milli meter
 
     # Object position as coordinate origin
-    object_position = np.array([0, 0, 0])
+    object_position = np.array(job.object_position)
     output_dir.mkdir(parents=True, exist_ok=True)
-    for i in range(n_images):
 
-
-        random.seed(i)
-        if objpath and Path(objpath).exists():
-            objs = bproc.loader.load_obj(objpath)
-            obj = objs[0]
-        else:
-            # Create a simple default object:
-            obj = bproc.object.create_primitive("MONKEY")
+    # everything which determines the frames of an index, a run can only be resumed with the same configuration
+    run_config = job.generation_config()
+    # an extended run continues the manifest of the dataset, its configuration only differs by the number of frames
+    extend = args.extend > 0
+    manifest = RunManifest(output_dir / "run_manifest.jsonl", run_config, resume=args.resume, extend=extend)
+    if not extend:
+        write_job(job, output_dir / JOB_FILE)
+    if args.resume or extend:
+        invalid = manifest.verify(output_dir, check_hash=args.verify_hash)
+        if invalid:
+            warnings.warn(f"{len(invalid)} completed frames failed the verification and are rendered again.")
+    # the dataset indices of this process which still have to be rendered
+    indices = manifest.pending(range(start, end))
+    if not indices:
+        print(f"All frames in [{start}, {end}) are already completed.")
+        write_job(job, output_dir / JOB_FILE)
+        sys.exit(0)
+
+    profiler = StageProfiler(
+        enabled=args.profile,
+        trace_path=args.trace or output_dir / "profile.jsonl",
+        counters=datablock_counts
+    )
+
+    # the textures are decoded once at a size the render resolution can show and cached on disk by content
+    intrinsics = camera_intrinsics()
+    with profiler.stage("prepare_textures"):
+        texture_size = job.texture_size
+        if texture_size is None:
+            texture_size = texture_size_for((intrinsics.width, intrinsics.height))
+        texture_cache = TextureCache(Path(args.cache_dir) / "textures", max_size=texture_size)
+        texture_sources = [] if image_dir is None else list_textures(image_dir)
+        textures = texture_cache.prepare_all(texture_sources)
+
+    # the scene assets are the same for every pose: load them only once. The prepared scene is saved as a snapshot
+    # keyed by the content of its inputs, later workers and runs load it instead of importing and setting up the
+    # assets again; a snapshot of changed inputs is replaced.
+    scene_cache = None if args.no_scene_cache else SceneCache(Path(args.cache_dir) / "scenes")
+    snapshot_key = scene_key(
+        [None if object_key(objpath)[0] == "MONKEY" else objpath, *textures],
+        {"version": SCENE_SNAPSHOT_VERSION, "blender": bpy.app.version_string}
+    )
+    snapshot = None if scene_cache is None else scene_cache.lookup(snapshot_key)
+    if snapshot is not None:
+        with profiler.stage("load_snapshot"):
+            obj = load_snapshot(snapshot, objpath, textures)
+    else:
+        with profiler.stage("load_obj"):
+            obj = load_object(objpath)
             # position object right in the origin
-        obj.set_location([0, 0, 0])
-        obj.set_rotation_euler([0, 0, 0])
-
-        add_texture(image_dir, obj)
-
+            obj.set_location([0, 0, 0])
+            obj.set_rotation_euler([0, 0, 0])
+        with profiler.stage("add_texture"):
+            # the materials of all textures are created up front, so switching the texture of a chunk loads nothing
+            for texture in textures:
+                load_texture(texture)
+        if scene_cache is not None:
+            with profiler.stage("save_snapshot"):
+                scene_cache.store(snapshot_key, lambda path: save_snapshot(path, obj), [objpath, *texture_sources])
+    if len(textures) == 1:
+        add_texture(textures[0], obj)
+    # texture of every dataset index; the frames are rendered grouped by texture
+    texture_of = assign_textures(n_images, len(textures), job.seed)
+    if len(textures) > 1:
+        indices = sorted(indices, key=lambda index: texture_of[index])
+
+    with profiler.stage("world_background"):
         color = color2rgb(background_color)
         bproc.renderer.set_world_background(list(color))
-
-        dist_obj_cam = random.uniform(min(distance_object_camera), max(distance_object_camera))
-        dist_light_cam = random.uniform(min(distance_light_camera), max(distance_light_camera))
-        #print(dist_obj_cam, dist_light_cam)
-        # brighter
-        brightness1 = random.uniform(min(light_energy), max(light_energy))
-        #print(brightness1, brightness2)
-        theta = random.uniform(0, max_theta)
-        phi = random.uniform(0, max_phi)
-        #print(theta, phi)
-
-        camera_position = change_to_spherical(theta, phi, dist_obj_cam)
-
-        rotation_euler = look_at(camera_position, object_position)
-        #cam = create_camera(camera_position, rotation_euler)
-        #print(f"Camera Position: {camera_position}, Rotation: {rotation_euler}")
-        cam_pose = bproc.math.build_transformation_mat(camera_position, rotation_euler)
-
-        bproc.camera.add_camera_pose(cam_pose)
-
-        # get two simple vectors which perpendicular to v
-        perp1, perp2 = create_perpendicular_vector(camera_position)
-
-        circle_x, circle_y = random_point_on_unit_circle()
-
-        # light position
-        light_position = camera_position + circle_x * perp1 + circle_y * perp2
-        choose_and_set_light(light_position, brightness1, p=light_percentage)
-
-        data = bproc.renderer.render()
-        for index, image in enumerate(data["colors"]):
-            save_array_as_image(image, "colors", os.path.join(output_dir, f"image{index}.png"))
-
-
-
-
-
-
-
-
-
+    # background and light color of every dataset index, drawn from the palettes in one pass with streams of the
+    # dataset seed separate from the poses
+    if job.background_palette is None:
+        background_colors = np.broadcast_to(np.array(color), (n_images, 3))
+    else:
+        _, background_colors = sample_colors(parse_palette(job.background_palette), n_images,
+                                             np.random.default_rng([job.seed, 2]))
+    if job.light_palette is None:
+        light_colors = np.ones((n_images, 3))
+    else:
+        _, light_colors = sample_colors(parse_palette(job.light_palette), n_images,
+                                        np.random.default_rng([job.seed, 3]))
+
+    # clutter: every part is loaded once and placed many times as linked duplicates, with a layout per dataset index
+    # which keeps the instances apart from each other and from the object
+    instances = None
+    if sum(job.clutter_counts) > 0:
+        with profiler.stage("compose_scene"):
+            parts = instance_parts(job.clutter_counts)
+            instances = InstancePool(job.clutter_parts, parts, main_obj=obj)
+            obj_center, obj_radius = bounding_sphere(obj.get_bound_box())
+            layouts = sample_layouts(indices, job.seed, instances.radii(), parts, extent=job.clutter_extent,
+                                     center=tuple(object_position),
+                                     obstacles=(obj_center[None], np.array([obj_radius])))
+
+    # the poses are planned from the dataset seed in blocks of indices, so that the image of an index does not depend
+    # on how the dataset is split among workers or runs, nor on later extensions of the dataset;
+    # views in which the object would be too small or clipped are rejected from its bounding box before rendering
+    poses = plan_pose_sequence(
+        indices,
+        n_images,
+        job.seed,
+        object_points=np.array(obj.get_bound_box()),
+        intrinsics=intrinsics,
+        strategy=job.pose_strategy,
+        min_coverage=job.min_coverage,
+        min_onscreen=job.min_onscreen,
+        distance_object_camera=distance_object_camera,
+        max_theta=max_theta,
+        max_phi=max_phi,
+        distance_light_camera=distance_light_camera,
+        light_energy=light_energy,
+        area_light_probability=light_percentage,
+        object_position=tuple(object_position)
+    )
+    profiler.record(step="setup")
+
+    # the poses of a chunk are registered as keyframes and rendered within one call; while the next chunk renders,
+    # the images of the previous one are encoded in the background
+    chunk_size = args.chunk_size if args.chunk_size > 0 else max(1, len(poses))
+    # every written file is recorded in the run manifest
+    if job.dataset_format == "png":
+        writer = AsyncImageWriter(output_dir, workers=args.writer_threads, max_pending=args.max_pending,
+                                  on_written=manifest.mark_done, append=args.resume or extend,
+                                  on_encoded=profiler.add_frame_time)
+    else:
+        writer = ShardedDatasetWriter(output_dir, frames_per_shard=job.frames_per_shard,
+                                      file_format=job.dataset_format, compression=job.shard_compression,
+                                      on_written=manifest.mark_done, append=args.resume or extend)
+    enable_render_outputs(job.outputs)
+    with writer:
+        for chunk_start, chunk_end in chunk_ranges([texture_of[index] for index in indices], chunk_size):
+            if len(textures) > 1:
+                with profiler.stage("add_texture"):
+                    add_texture(textures[texture_of[indices[chunk_start]]], obj)
+            with profiler.stage("camera_and_light"):
+                for frame, offset in enumerate(range(chunk_start, chunk_end)):
+                    bproc.camera.add_camera_pose(poses.camera_matrices[offset], frame=frame)
+                    choose_and_set_light(
+                        poses.light_positions[offset],
+                        poses.light_energies[offset],
+                        p=poses.area_lights[offset],
+                        frame=frame,
+                        color=light_colors[indices[offset]]
+                    )
+                    if job.background_palette is not None:
+                        set_background_color(background_colors[indices[offset]], frame=frame)
+                    if instances is not None:
+                        instances.set(layouts[indices[offset]], frame=frame)
+
+            # the render is timed per chunk, the frames are saved one by one
+            with profiler.stage("render"):
+                data = bproc.renderer.render()
+            # frame k of the chunk is the dataset index indices[chunk_start + k]
+            for frame, image in enumerate(data["colors"]):
+                with profiler.stage("save", per_frame=True):
+                    offset = chunk_start + frame
+                    index = indices[offset]
+                    clutter = {} if instances is None else {
+                        "instance_parts": layouts[index].parts.tolist(),
+                        "instance_matrices": layouts[index].matrices().tolist(),
+                    }
+                    writer.submit(index, image, render_outputs(data, frame, job.outputs, job.float_dtype),
+                                  texture_index=int(texture_of[index]),
+                                  background_color=background_colors[index].tolist(),
+                                  light_color=light_colors[index].tolist(),
+                                  **frame_metadata(poses, offset, preset_name), **clutter)
+            # drop the keyframes of this chunk, the next chunk starts at frame 0 again
+            bproc.utility.reset_keyframes()
+            profiler.record(frames=chunk_end - chunk_start, step="chunk", first_index=indices[chunk_start])
+
+        # wait for the images which are still encoded in the background
+        with profiler.stage("flush"):
+            writer.close()
+    # written after the frames, so that an interrupted extension is resumed with the job of the original dataset
+    write_job(job, output_dir / JOB_FILE)
+    profiler.record(step="flush")
+    profiler.print_summary()
+    if args.profile:
+        write_json_atomic(output_dir / "profile_summary.json", profiler.summary())
+    profiler.close()
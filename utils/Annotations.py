@@ -0,0 +1,193 @@
+import numpy as np
+
+from typing import Any, Dict, NamedTuple, Optional, Sequence
+from numpy.typing import ArrayLike, NDArray
+
+from .PoseSampler import PoseTable
+from .PosePlanner import CameraIntrinsics, bounding_box_corners
+
+# Blender cameras look along -Z with Y up, OpenCV/BOP cameras look along +Z with Y down
+BLENDER_TO_OPENCV = np.diag([1.0, -1.0, -1.0, 1.0])
+# number of projected points per vectorized pass, bounds the memory of large meshes and pose tables
+POINTS_PER_CHUNK = 1 << 22
+
+
+class Annotations(NamedTuple):
+    """labels of N frames of one object, row i belongs to frame i, pixel coordinates in the OpenCV convention"""
+    object_to_camera: NDArray[np.float64]  # (N, 4, 4) object to OpenCV camera transformations (BOP cam_R/t_m2c)
+    object_boxes: NDArray[np.float64]  # (N, 4) x, y, width, height of the projected vertices, may exceed the image
+    boxes: NDArray[np.float64]  # (N, 4) x, y, width, height of the object boxes clipped to the image
+    corners: NDArray[np.float64]  # (N, 8, 2) projected corners of the object's bounding box (bounding_box_corners)
+    keypoints: NDArray[np.float64]  # (N, K, 2) projected keypoints
+    keypoint_visible: NDArray[np.bool_]  # (N, K) keypoint in front of the camera and inside the image
+    onscreen: NDArray[np.float64]  # (N,) fraction of the object box inside the image
+    visible: NDArray[np.bool_]  # (N,) object in front of the camera and at least partly inside the image
+
+    def __len__(self) -> int:
+        return len(self.visible)
+
+
+def invert_rigid(matrices: NDArray[np.float64]) -> NDArray[np.float64]:
+    """inverse of (N, 4, 4) rotation and translation matrices without a general matrix inversion"""
+    rotation_t = np.swapaxes(matrices[:, :3, :3], 1, 2)
+    inverse = np.zeros_like(matrices, dtype=np.float64)
+    inverse[:, :3, :3] = rotation_t
+    inverse[:, :3, 3] = -np.einsum("nij,nj->ni", rotation_t, matrices[:, :3, 3])
+    inverse[:, 3, 3] = 1.0
+    return inverse
+
+
+def object_to_camera(
+        camera_matrices: NDArray[np.float64],
+        object_pose: Optional[ArrayLike] = None
+) -> NDArray[np.float64]:
+    """
+    (N, 4, 4) transformations from the object to the OpenCV camera frame
+    :param camera_matrices: (N, 4, 4) Blender camera to world matrices, e.g. PoseTable.camera_matrices
+    :param object_pose: 4x4 object to world matrix, the identity if not given
+    """
+    transforms = BLENDER_TO_OPENCV @ invert_rigid(np.asarray(camera_matrices, dtype=np.float64))
+    if object_pose is not None:
+        transforms = transforms @ np.asarray(object_pose, dtype=np.float64)
+    return transforms
+
+
+def project(
+        points: NDArray[np.float64],
+        transforms: NDArray[np.float64],
+        K: NDArray[np.float64]
+) -> NDArray[np.float64]:
+    """
+    projects the (M, 3) object points with the (N, 4, 4) object to camera transformations and the 3x3 matrix K
+    :return: (N, M, 3) pixel coordinates and depth, points behind the camera have a negative depth
+    """
+    # K [R | t] maps to (u * depth, v * depth, depth), the last row of K being (0, 0, 1)
+    projections = np.asarray(K, dtype=np.float64) @ transforms[:, :3]
+    scaled = projections[:, :, :3] @ points.T + projections[:, :, 3:]
+    depth = scaled[:, 2]
+    safe_depth = np.where(np.abs(depth) > 1e-12, depth, 1e-12)
+    return np.stack((scaled[:, 0] / safe_depth, scaled[:, 1] / safe_depth, depth), axis=-1)
+
+
+def annotate(
+        poses: PoseTable,
+        intrinsics: CameraIntrinsics,
+        vertices: ArrayLike,
+        keypoints: Optional[ArrayLike] = None,
+        object_pose: Optional[ArrayLike] = None,
+        points_per_chunk: int = POINTS_PER_CHUNK
+) -> Annotations:
+    """
+    labels of the frames of the pose table computed from the geometry instead of the rendered images: the vertices,
+    the corners of their bounding box and the keypoints are projected together in one vectorized pass per chunk of
+    frames. Occlusions, also by the object itself, are not considered.
+    :param vertices: (M, 3) vertices of the object in object coordinates, its convex hull suffices for the boxes
+    :param keypoints: (K, 3) keypoints in object coordinates
+    :param object_pose: 4x4 object to world matrix, the identity if not given
+    """
+    vertices = np.asarray(vertices, dtype=np.float64).reshape(-1, 3)
+    keypoints = np.empty((0, 3)) if keypoints is None else np.asarray(keypoints, dtype=np.float64).reshape(-1, 3)
+    corners = bounding_box_corners(vertices.min(axis=0), vertices.max(axis=0))
+    points = np.concatenate((vertices, corners, keypoints))
+    transforms = object_to_camera(poses.camera_matrices, object_pose)
+    n, n_vertices = len(transforms), len(vertices)
+    size = np.array([intrinsics.width, intrinsics.height], dtype=np.float64)
+
+    object_boxes = np.zeros((n, 4))
+    projected_corners = np.empty((n, 8, 2))
+    projected_keypoints = np.empty((n, len(keypoints), 2))
+    keypoint_visible = np.empty((n, len(keypoints)), dtype=bool)
+    in_front = np.empty(n, dtype=bool)
+    chunk_size = max(1, points_per_chunk // len(points))
+    for start in range(0, n, chunk_size):
+        end = min(start + chunk_size, n)
+        projected = project(points, transforms[start:end], intrinsics.K)
+        pixels, depth = projected[..., :2], projected[..., 2]
+        low = pixels[:, :n_vertices].min(axis=1)
+        high = pixels[:, :n_vertices].max(axis=1)
+        object_boxes[start:end] = np.concatenate((low, high - low), axis=-1)
+        projected_corners[start:end] = pixels[:, n_vertices:n_vertices + 8]
+        projected_keypoints[start:end] = pixels[:, n_vertices + 8:]
+        keypoint_pixels = pixels[:, n_vertices + 8:]
+        keypoint_visible[start:end] = ((depth[:, n_vertices + 8:] > 0) & np.all(keypoint_pixels >= 0, axis=-1)
+                                       & np.all(keypoint_pixels < size, axis=-1))
+        in_front[start:end] = np.all(depth[:, :n_vertices] > 0, axis=1)
+
+    # boxes of objects behind or around the camera are meaningless
+    object_boxes[~in_front] = 0.0
+    low = np.clip(object_boxes[:, :2], 0.0, size)
+    high = np.clip(object_boxes[:, :2] + object_boxes[:, 2:], 0.0, size)
+    boxes = np.concatenate((low, high - low), axis=-1)
+    area = np.prod(boxes[:, 2:], axis=-1)
+    object_area = np.prod(object_boxes[:, 2:], axis=-1)
+    onscreen = np.divide(area, object_area, out=np.zeros(n), where=object_area > 0)
+    return Annotations(transforms, object_boxes, boxes, projected_corners, projected_keypoints, keypoint_visible,
+                       onscreen, in_front & (area > 0))
+
+
+def to_coco(
+        annotations: Annotations,
+        indices: Sequence[int],
+        intrinsics: CameraIntrinsics,
+        file_pattern: str = "image{index}.png",
+        category: str = "object",
+        keypoint_names: Optional[Sequence[str]] = None
+) -> Dict[str, Any]:
+    """
+    COCO detection (and keypoint) dataset of the annotated frames of the dataset indices, frames in which the object
+    is not visible have an image but no annotation
+    """
+    n_keypoints = annotations.keypoints.shape[1]
+    keypoint_names = [f"keypoint{k}" for k in range(n_keypoints)] if keypoint_names is None else list(keypoint_names)
+    assert len(keypoint_names) == n_keypoints, f"Expected {n_keypoints} keypoint names but got {len(keypoint_names)}."
+    # COCO keypoints are (x, y, v) with v = 2 for visible and (0, 0, 0) for keypoints which are not
+    flags = annotations.keypoint_visible[..., None]
+    coco_keypoints = np.where(flags, np.concatenate((annotations.keypoints, np.full(flags.shape, 2.0)), axis=-1), 0.0)
+    images = []
+    labels = []
+    for row, index in enumerate(indices):
+        index = int(index)
+        images.append({"id": index, "file_name": file_pattern.format(index=index), "width": intrinsics.width,
+                       "height": intrinsics.height})
+        if not annotations.visible[row]:
+            continue
+        x, y, width, height = annotations.boxes[row].tolist()
+        label = {"id": len(labels) + 1, "image_id": index, "category_id": 1, "bbox": [x, y, width, height],
+                 "area": width * height, "iscrowd": 0}
+        if n_keypoints:
+            label["keypoints"] = coco_keypoints[row].ravel().tolist()
+            label["num_keypoints"] = int(annotations.keypoint_visible[row].sum())
+        labels.append(label)
+    categories = [{"id": 1, "name": category, "supercategory": category}]
+    if n_keypoints:
+        categories[0].update(keypoints=keypoint_names, skeleton=[])
+    return {"images": images, "annotations": labels, "categories": categories}
+
+
+def to_bop(
+        annotations: Annotations,
+        indices: Sequence[int],
+        intrinsics: CameraIntrinsics,
+        obj_id: int = 1,
+        unit_scale: float = 1000.0
+) -> Dict[str, Dict[str, Any]]:
+    """
+    BOP scene files of the annotated frames of the dataset indices: scene_gt (object poses), scene_camera
+    (intrinsics) and scene_gt_info (boxes, bbox_visib only clipped to the image), keyed by the dataset index
+    :param unit_scale: millimetres per unit of the poses, BOP stores cam_t_m2c in mm; the default is for metres
+    """
+    if unit_scale <= 0:
+        raise ValueError(f"unit_scale must be positive but was {unit_scale}.")
+    cam_K = intrinsics.K.ravel().tolist()
+    rotations = annotations.object_to_camera[:, :3, :3].reshape(-1, 9).tolist()
+    translations = (annotations.object_to_camera[:, :3, 3] * unit_scale).tolist()
+    object_boxes = annotations.object_boxes.tolist()
+    boxes = annotations.boxes.tolist()
+    scene_gt, scene_camera, scene_gt_info = {}, {}, {}
+    for row, index in enumerate(indices):
+        key = str(int(index))
+        scene_gt[key] = [{"cam_R_m2c": rotations[row], "cam_t_m2c": translations[row], "obj_id": obj_id}]
+        # depth images in the unit of the poses are converted to mm by the same scale
+        scene_camera[key] = {"cam_K": cam_K, "depth_scale": unit_scale}
+        scene_gt_info[key] = [{"bbox_obj": object_boxes[row], "bbox_visib": boxes[row]}]
+    return {"scene_gt": scene_gt, "scene_camera": scene_camera, "scene_gt_info": scene_gt_info}
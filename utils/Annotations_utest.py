@@ -0,0 +1,105 @@
+import json
+import unittest
+import numpy as np
+
+from .CosyTrafo import spherical_to_cartesian_batch, cartesian_to_spherical_batch
+from .PoseSampler import PoseTable, look_at_matrices, sample_poses
+from .PosePlanner import CameraIntrinsics, bounding_box_corners, project_points
+from .Annotations import invert_rigid, object_to_camera, annotate, to_coco, to_bop
+
+
+def poses_at(camera_positions) -> PoseTable:
+    camera_positions = np.asarray(camera_positions, dtype=np.float64)
+    n = len(camera_positions)
+    return PoseTable(look_at_matrices(camera_positions), camera_positions, camera_positions, np.ones(n),
+                     np.zeros(n, dtype=bool))
+
+
+class AnnotationsTest(unittest.TestCase):
+    intrinsics = CameraIntrinsics.from_fov(np.pi / 2, 200, 100)
+    # cube with edge length 2 around the origin
+    cube = bounding_box_corners((-1, -1, -1), (1, 1, 1))
+    decimal_accuracy = 10
+
+    def test_invert_rigid(self):
+        matrices = sample_poses(50, np.random.default_rng(0)).camera_matrices
+        np.testing.assert_almost_equal(invert_rigid(matrices), np.linalg.inv(matrices), decimal=self.decimal_accuracy)
+
+    def test_object_to_camera_of_spherical_views(self):
+        # cameras on a sphere around the object look at its origin: it is on the optical axis at the distance r
+        spherical = np.array([[40, 1.2, 0.3], [35, 0.4, -2.5], [60, 3.0, 1.0]])
+        transforms = object_to_camera(look_at_matrices(spherical_to_cartesian_batch(spherical)))
+        np.testing.assert_almost_equal(transforms[:, :3, 3], np.column_stack((np.zeros((3, 2)), spherical[:, 0])),
+                                       decimal=self.decimal_accuracy)
+        # the camera position in object coordinates is the spherical view again
+        camera_positions = invert_rigid(transforms)[:, :3, 3]
+        np.testing.assert_almost_equal(cartesian_to_spherical_batch(camera_positions), spherical,
+                                       decimal=self.decimal_accuracy)
+
+    def test_box_of_cube(self):
+        annotations = annotate(poses_at([(10, 0, 0)]), self.intrinsics, self.cube)
+        # focal length 100 px: the front face at a depth of 9 spans 100 / 9 px around the image center
+        half = 100 / 9
+        np.testing.assert_almost_equal(annotations.boxes[0], [100 - half, 50 - half, 2 * half, 2 * half])
+        np.testing.assert_almost_equal(annotations.boxes, annotations.object_boxes)
+        self.assertTrue(annotations.visible[0])
+        self.assertAlmostEqual(annotations.onscreen[0], 1.0)
+
+    def test_matches_pose_planner_projection(self):
+        poses = sample_poses(100, np.random.default_rng(1))
+        keypoints = np.array([[0.0, 0.0, 1.0], [0.5, -0.5, 0.0]])
+        annotations = annotate(poses, self.intrinsics, self.cube, keypoints)
+        pixels, _ = project_points(self.cube, poses.camera_matrices, self.intrinsics)
+        np.testing.assert_almost_equal(annotations.corners, pixels, decimal=6)
+        np.testing.assert_almost_equal(annotations.keypoints, project_points(keypoints, poses.camera_matrices,
+                                                                             self.intrinsics)[0], decimal=6)
+
+    def test_visibility(self):
+        keypoints = np.array([[0.0, 0.0, 0.0], [0.0, 0.0, 20.0]])
+        annotations = annotate(poses_at([(10, 0, 0), (0.5, 0, 0), (-10, 0, 0), (2.5, 0, 0)]), self.intrinsics,
+                               self.cube, keypoints, object_pose=np.diag([1.0, 1.0, 1.0, 1.0]))
+        # inside the box the object is around the camera
+        np.testing.assert_array_equal(annotations.visible, [True, False, True, True])
+        np.testing.assert_array_equal(annotations.boxes[1], np.zeros(4))
+        # the keypoint high above the object is outside the image
+        np.testing.assert_array_equal(annotations.keypoint_visible[:, 1], False)
+        np.testing.assert_array_equal(annotations.keypoint_visible[[0, 2, 3], 0], True)
+        # close to the cube, its box is clipped by the image border
+        self.assertLess(annotations.onscreen[3], 1.0)
+        self.assertTrue(np.all(annotations.boxes[3, 2:] <= (200, 100)))
+
+    def test_chunks_do_not_change_the_result(self):
+        poses = sample_poses(100, np.random.default_rng(2))
+        vertices = np.random.default_rng(3).uniform(-1, 1, (50, 3))
+        full = annotate(poses, self.intrinsics, vertices)
+        chunked = annotate(poses, self.intrinsics, vertices, points_per_chunk=300)
+        for el1, el2 in zip(full, chunked):
+            np.testing.assert_array_equal(el1, el2)
+
+    def test_coco_and_bop(self):
+        keypoints = np.array([[0.0, 0.0, 0.0], [0.0, 0.0, 20.0]])
+        annotations = annotate(poses_at([(10, 0, 0), (0.5, 0, 0)]), self.intrinsics, self.cube, keypoints)
+        coco = json.loads(json.dumps(to_coco(annotations, [7, 8], self.intrinsics, keypoint_names=["center", "top"])))
+        self.assertEqual([image["file_name"] for image in coco["images"]], ["image7.png", "image8.png"])
+        self.assertEqual(len(coco["annotations"]), 1)
+        label = coco["annotations"][0]
+        self.assertEqual(label["image_id"], 7)
+        np.testing.assert_almost_equal(label["keypoints"], [100, 50, 2, 0, 0, 0])
+        self.assertEqual(label["num_keypoints"], 1)
+        self.assertEqual(coco["categories"][0]["keypoints"], ["center", "top"])
+
+        bop = json.loads(json.dumps(to_bop(annotations, [7, 8], self.intrinsics)))
+        # the poses are in metres, BOP translations in millimetres
+        np.testing.assert_almost_equal(bop["scene_gt"]["7"][0]["cam_t_m2c"], [0, 0, 10000])
+        self.assertEqual(bop["scene_camera"]["7"]["depth_scale"], 1000.0)
+        np.testing.assert_almost_equal(np.reshape(bop["scene_gt"]["7"][0]["cam_R_m2c"], (3, 3)),
+                                       annotations.object_to_camera[0, :3, :3])
+        np.testing.assert_almost_equal(bop["scene_camera"]["8"]["cam_K"], self.intrinsics.K.ravel())
+        millimetres = to_bop(annotations, [7, 8], self.intrinsics, unit_scale=1.0)
+        np.testing.assert_almost_equal(millimetres["scene_gt"]["7"][0]["cam_t_m2c"], [0, 0, 10])
+        with self.assertRaises(ValueError):
+            to_bop(annotations, [7, 8], self.intrinsics, unit_scale=0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+import json
+import os
+import platform
+import time
+import numpy as np
+
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union, Any
+
+from .ImageWriter import write_json_atomic
+
+# metrics where a larger value is better, all other metrics (times, memory) are better when smaller
+HIGHER_IS_BETTER = ("frames_per_s", "calls_per_s")
+
+
+def time_call(func: Callable[[], Any], repeat: int = 5, min_time: float = 0.2) -> Dict[str, float]:
+    """
+    times func: the number of calls per measurement is increased until a measurement takes min_time seconds,
+    then repeat measurements are taken
+    :return: median and minimum time per call in seconds and the calls per second of the median
+    """
+    func()  # warm up caches and lazy imports
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2 if elapsed <= 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    times = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter() - start) / number)
+    median = float(np.median(times))
+    return {"median_s": median, "min_s": float(min(times)), "calls_per_s": 1 / median if median > 0 else float("inf")}
+
+
+def environment() -> Dict[str, Any]:
+    """versions and machine the results were measured with"""
+    info = {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+    }
+    try:
+        from importlib.metadata import version
+        info["blenderproc"] = version("blenderproc")
+    except Exception:
+        info["blenderproc"] = None
+    return info
+
+
+def load_history(path: Union[str, Path]) -> List[Dict[str, Any]]:
+    """the runs of a benchmark history, oldest first"""
+    path = Path(path)
+    if not path.exists():
+        return []
+    with open(path) as file:
+        return json.load(file)["runs"]
+
+
+def append_run(
+        path: Union[str, Path],
+        results: Dict[str, Dict[str, float]],
+        label: Optional[str] = None,
+        info: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """appends the results (benchmark name -> metric -> value) as a new run to the history"""
+    run = {
+        "label": label,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment() if info is None else info,
+        "results": results,
+    }
+    runs = load_history(path)
+    runs.append(run)
+    write_json_atomic(path, {"runs": runs})
+    return run
+
+
+def find_run(runs: List[Dict[str, Any]], selector: Union[str, int]) -> Dict[str, Any]:
+    """the run with the label selector or at the (negative) position selector"""
+    if isinstance(selector, int) or str(selector).lstrip("-").isdigit():
+        return runs[int(selector)]
+    for run in reversed(runs):
+        if run["label"] == selector:
+            return run
+    raise ValueError(f"No benchmark run with the label '{selector}'.")
+
+
+def compare_runs(
+        baseline: Dict[str, Any],
+        current: Dict[str, Any],
+        threshold: float = 0.1
+) -> List[Dict[str, Any]]:
+    """
+    relative change of every metric measured in both runs, positive: better
+    :param threshold: changes worse than -threshold (e.g. 0.1: 10 %) are flagged as regressions
+    """
+    changes = []
+    for name, metrics in current["results"].items():
+        for metric, value in metrics.items():
+            old = baseline["results"].get(name, {}).get(metric)
+            if old is None or value is None or old == 0:
+                continue
+            change = (value - old) / abs(old)
+            if metric not in HIGHER_IS_BETTER:
+                change = -change
+            changes.append({"benchmark": name, "metric": metric, "baseline": old, "current": value,
+                            "change": change, "regression": change < -threshold})
+    return changes
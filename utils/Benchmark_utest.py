@@ -0,0 +1,51 @@
+import tempfile
+import unittest
+
+from pathlib import Path
+
+from .Benchmark import time_call, append_run, load_history, find_run, compare_runs
+
+
+class BenchmarkTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp_dir.name) / "benchmarks.json"
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_time_call(self):
+        calls = []
+        result = time_call(lambda: calls.append(1), repeat=3, min_time=0.01)
+        self.assertGreater(len(calls), 3)
+        self.assertLessEqual(result["min_s"], result["median_s"])
+        self.assertGreater(result["calls_per_s"], 0)
+
+    def test_history(self):
+        append_run(self.path, {"a": {"median_s": 1.0}}, label="v1", info={})
+        append_run(self.path, {"a": {"median_s": 2.0}}, info={})
+        runs = load_history(self.path)
+        self.assertEqual(len(runs), 2)
+        self.assertEqual(find_run(runs, "v1")["results"]["a"]["median_s"], 1.0)
+        self.assertEqual(find_run(runs, -1)["results"]["a"]["median_s"], 2.0)
+        self.assertEqual(find_run(runs, "0")["label"], "v1")
+        with self.assertRaises(ValueError):
+            find_run(runs, "v2")
+
+    def test_compare_flags_regressions(self):
+        baseline = {"results": {"micro": {"median_s": 1.0}, "render": {"frames_per_s": 10.0, "peak_rss_mb": 100.0}}}
+        current = {"results": {"micro": {"median_s": 1.05}, "render": {"frames_per_s": 8.0, "peak_rss_mb": 80.0},
+                               "new": {"median_s": 1.0}}}
+        changes = {(change["benchmark"], change["metric"]): change
+                   for change in compare_runs(baseline, current, threshold=0.1)}
+        self.assertEqual(len(changes), 3)
+        # 5 % slower is within the threshold, fewer frames per second is a regression, less memory an improvement
+        self.assertFalse(changes["micro", "median_s"]["regression"])
+        self.assertAlmostEqual(changes["render", "frames_per_s"]["change"], -0.2)
+        self.assertTrue(changes["render", "frames_per_s"]["regression"])
+        self.assertAlmostEqual(changes["render", "peak_rss_mb"]["change"], 0.2)
+        self.assertFalse(changes["render", "peak_rss_mb"]["regression"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,285 @@
+"""
+Blender adapter of the rendering pipeline: scene assets, clutter instances, lights, textures, snapshots and renderer
+settings. This is the only module importing bpy, blenderproc and mathutils, it is imported by the render scripts
+running in Blender.
+"""
+import blenderproc as bproc
+import bpy
+import random
+import numpy as np
+
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, TypeVar, Union
+from numpy.typing import NDArray
+from mathutils import Vector
+
+from .PosePlanner import CameraIntrinsics
+from .RenderPresets import RenderPreset
+from .SceneComposer import Layout, origin_radius
+
+
+# scene assets which are loaded once per process, keyed by (absolute path, modification time)
+AssetKey = Tuple[str, float]
+T = TypeVar("T")
+_object_cache: Dict[AssetKey, bproc.types.MeshObject] = {}
+_texture_cache: Dict[AssetKey, Tuple[bproc.types.Material, bpy.types.Image]] = {}
+# to be increased whenever the scene setup changes, so that older snapshots are not used anymore
+SCENE_SNAPSHOT_VERSION = 2
+# custom property marking the main object among the meshes of a scene snapshot
+MAIN_OBJECT_PROPERTY = "snapshot_main_object"
+
+
+def _asset_key(path: Union[str, Path]) -> AssetKey:
+    """Key of an asset file, changes as soon as the file on disk is modified"""
+    path = Path(path).absolute()
+    return str(path), path.stat().st_mtime
+
+
+def _drop_stale(cache: Dict[AssetKey, T], key: AssetKey) -> List[T]:
+    """Remove the entries of the same path but with an outdated modification time"""
+    stale = [k for k in cache if k[0] == key[0] and k != key]
+    return [cache.pop(k) for k in stale]
+
+
+def load_object(objpath: Union[str, Path, None]) -> bproc.types.MeshObject:
+    """Load the mesh once per process and return the cached MeshObject for every further call"""
+    if objpath and Path(objpath).exists():
+        key = _asset_key(objpath)
+        if key not in _object_cache:
+            # the file has changed since it was loaded: remove the outdated mesh from the scene
+            for obj in _drop_stale(_object_cache, key):
+                obj.delete()
+            _object_cache[key] = bproc.loader.load_obj(key[0])[0]
+    else:
+        # Create a simple default object:
+        key = ("MONKEY", 0.0)
+        if key not in _object_cache:
+            _object_cache[key] = bproc.object.create_primitive("MONKEY")
+    return _object_cache[key]
+
+
+def linked_duplicate(source: bproc.types.MeshObject, name: str) -> bproc.types.MeshObject:
+    """Copy of the object which shares its mesh data and materials, only the object itself is new"""
+    blender_obj = source.blender_obj.copy()
+    blender_obj.name = name
+    bpy.context.collection.objects.link(blender_obj)
+    blender_obj.hide_render = False
+    return bproc.types.MeshObject(blender_obj)
+
+
+class InstancePool:
+    """
+    Instances of the clutter parts, every part is loaded once and all of its instances are linked duplicates, so that
+    the memory grows with the number of parts instead of the number of instances
+    """
+
+    def __init__(self, part_paths: Sequence[Union[str, Path]], parts: Sequence[int],
+                 main_obj: Optional[bproc.types.MeshObject] = None) -> None:
+        self.sources = [load_object(path) for path in part_paths]
+        self.instances = [linked_duplicate(self.sources[part], f"instance_{k}_part_{part}")
+                          for k, part in enumerate(parts)]
+        for source in self.sources:
+            # the loaded part only provides the mesh data, unless it is the main object itself
+            if source is not main_obj:
+                source.blender_obj.hide_render = True
+
+    def radii(self) -> NDArray[np.float64]:
+        """Radius of every part around its origin, which encloses it in any rotation"""
+        return np.array([origin_radius(source.get_bound_box(local_coords=True)) for source in self.sources])
+
+    def set(self, layout: Layout, frame: Optional[int] = None) -> None:
+        """Places the instances according to the layout; with a frame, the placement is keyframed"""
+        for instance, location, rotation in zip(self.instances, layout.locations, layout.rotations):
+            instance.set_location(location.tolist(), frame=frame)
+            instance.set_rotation_euler(rotation.tolist(), frame=frame)
+
+
+class LightPool:
+    """One POINT and one AREA light which are reused for every frame, only the light chosen for a frame is visible"""
+
+    def __init__(self) -> None:
+        self.lights: Dict[str, bproc.types.Light] = {
+            light_type: bproc.types.Light(light_type, name=f"{light_type.lower()}_light")
+            for light_type in ("POINT", "AREA")
+        }
+
+    def set(
+            self,
+            light_type: str,
+            position: Union[List[float], Tuple[float, float, float], NDArray[np.float64]],
+            energy: float,
+            frame: Optional[int] = None,
+            color: Optional[Union[List[float], Tuple[float, float, float], NDArray[np.float64]]] = None
+    ) -> bproc.types.Light:
+        """Positions the light of the type and hides the other one; with a frame, everything is keyframed"""
+        for pool_type, light in self.lights.items():
+            light.blender_obj.hide_render = pool_type != light_type
+            if frame is not None:
+                light.blender_obj.keyframe_insert(data_path="hide_render", frame=frame)
+        light = self.lights[light_type]
+        light.set_energy(energy, frame=frame)
+        light.set_location(np.asarray(position).tolist(), frame=frame)
+        if color is not None:
+            light.set_color(np.asarray(color).tolist(), frame=frame)
+        return light
+
+
+_light_pool: Optional[LightPool] = None
+
+
+def get_light_pool() -> LightPool:
+    """The light pool of the scene, created with the first light"""
+    global _light_pool
+    if _light_pool is None:
+        _light_pool = LightPool()
+    return _light_pool
+
+
+def choose_and_set_light(
+        position: Union[List[float], Tuple[float, float, float], NDArray[np.float64]],
+        energy: int,
+        p: Union[float, bool],
+        frame: Optional[int] = None,
+        color: Optional[Union[List[float], Tuple[float, float, float], NDArray[np.float64]]] = None
+) -> bproc.types.Light:
+    """
+    Selection of a point or bar light source from a given position and energy according to the p-value.
+    The lights of the scene's light pool are reused, so the number of lights does not grow with the frames;
+    with a frame, visibility, energy, position and color are keyframed for that frame.
+    p can also be a pre-drawn boolean: True selects the bar light.
+    """
+    assert (0 <= p <= 1), ValueError("Input 'p' must be between 0 and 1.")
+    if (p if isinstance(p, (bool, np.bool_)) else random.random() < p):
+        # bar light
+        light_type = "AREA"
+    else:
+        # point light if greater the user-defined percentage
+        light_type = "POINT"
+    return get_light_pool().set(light_type, position, energy, frame=frame, color=color)
+
+
+def look_at(
+    camera_location: Union[List[float], Tuple[float, float, float], NDArray[np.float64]],
+    target_location: Union[List[float], Tuple[float, float, float], NDArray[np.float64]],
+) -> Tuple[float, float, float]:
+    """Let the camera look at the object"""
+    direction = Vector(target_location) - Vector(camera_location)
+    # the rotation needed to align the default forward direction (-Z) with the computed direction vector
+    # the direction of Y does not change during rotation
+    return direction.to_track_quat("-Z", "Y").to_euler()
+
+
+def texture_material_name(image_path: Union[str, Path]) -> str:
+    return f"texture_{Path(image_path).stem}"
+
+
+def load_texture(image_path: Union[str, Path]) -> bproc.types.Material:
+    """Material with the texture as base color, the image and its material are only created once per file"""
+    key = _asset_key(image_path)
+    if key not in _texture_cache:
+        # the texture has changed since it was loaded: release the outdated image
+        for _, stale_image in _drop_stale(_texture_cache, key):
+            bpy.data.images.remove(stale_image)
+        # create material, named after the texture so that it can be found again in a scene snapshot
+        material = bproc.material.create(texture_material_name(key[0]))
+        # load image
+        image = bpy.data.images.load(filepath=key[0], check_existing=True)
+        # Sets the material's Base Color to Texture
+        material.set_principled_shader_value("Base Color", image)
+        _texture_cache[key] = material, image
+    return _texture_cache[key][0]
+
+
+def add_texture(image_path: Union[str, Path], obj: object):
+    """Assign the texture to the object, the image and its material are only created once per file"""
+    # check if obj object format
+    if not isinstance(obj, bproc.types.MeshObject):
+        raise ValueError(
+            "The provided object is not a valid BlenderProc MeshObject. Make sure to pass a correct object.")
+    obj.replace_materials(load_texture(image_path))
+
+
+def object_key(objpath: Union[str, Path, None]) -> AssetKey:
+    """Key of the object in the object cache"""
+    return _asset_key(objpath) if objpath and Path(objpath).exists() else ("MONKEY", 0.0)
+
+
+def save_snapshot(path: Path, main_obj: bproc.types.MeshObject) -> None:
+    """Saves the current scene as .blend file with all images packed into it and the main object marked"""
+    main_obj.set_cp(MAIN_OBJECT_PROPERTY, True)
+    for image in bpy.data.images:
+        if image.source == "FILE" and image.packed_file is None:
+            image.pack()
+    bpy.ops.wm.save_as_mainfile(filepath=str(path), copy=True)
+
+
+def load_snapshot(path: Path, objpath: Union[str, Path, None], textures: List[Path]) -> bproc.types.MeshObject:
+    """Loads the object and the texture materials of a scene snapshot into the caches of load_object and load_texture"""
+    objs = bproc.loader.load_blend(str(path), obj_types=["mesh"], data_blocks=["objects", "materials"])
+    # the snapshot holds every mesh of the import, in another order than load_object returns them
+    main_objs = [obj for obj in objs if obj.has_cp(MAIN_OBJECT_PROPERTY)]
+    if len(main_objs) != 1:
+        raise ValueError(f"The scene snapshot {path} marks {len(main_objs)} main objects instead of one.")
+    obj = main_objs[0]
+    _object_cache[object_key(objpath)] = obj
+    for texture in textures:
+        material = bproc.material.convert_to_materials([bpy.data.materials[texture_material_name(texture)]])[0]
+        _texture_cache[_asset_key(texture)] = material, material.get_the_one_node_with_type("TexImage").image
+    return obj
+
+
+def set_background_color(
+        color: Union[List[float], Tuple[float, float, float], NDArray[np.float64]],
+        frame: Optional[int] = None
+) -> None:
+    """Sets the color of the world background set up by set_world_background; with a frame, the color is keyframed"""
+    color_input = bpy.context.scene.world.node_tree.nodes["Background"].inputs["Color"]
+    color_input.default_value = [*np.asarray(color).tolist(), 1.0]
+    if frame is not None:
+        color_input.keyframe_insert(data_path="default_value", frame=frame)
+
+
+def camera_intrinsics() -> CameraIntrinsics:
+    """The intrinsics and the resolution of the scene camera"""
+    render = bpy.context.scene.render
+    scale = render.resolution_percentage / 100
+    return CameraIntrinsics(np.array(bproc.camera.get_intrinsics_as_K_matrix()),
+                            int(render.resolution_x * scale), int(render.resolution_y * scale))
+
+
+def apply_render_preset(preset: RenderPreset, cpu_threads: int = 0) -> None:
+    """Configures the renderer with the preset, cpu_threads > 0 overrides the thread count of the preset"""
+    bproc.renderer.set_max_amount_of_samples(preset.max_samples)
+    bproc.renderer.set_noise_threshold(preset.noise_threshold)
+    bproc.renderer.set_denoiser(preset.denoiser)
+    bproc.camera.set_resolution(*preset.resolution)
+    bproc.renderer.set_light_bounces(
+        max_bounces=preset.max_bounces,
+        diffuse_bounces=preset.diffuse_bounces,
+        glossy_bounces=preset.glossy_bounces,
+        transmission_bounces=preset.transmission_bounces,
+        transparent_max_bounces=preset.transparent_max_bounces
+    )
+    bproc.renderer.set_cpu_threads(cpu_threads if cpu_threads > 0 else preset.cpu_threads)
+
+
+def datablock_counts() -> Dict[str, int]:
+    """Number of Blender datablocks, which must not grow with the number of rendered frames"""
+    return {
+        "objects": len(bpy.data.objects),
+        "meshes": len(bpy.data.meshes),
+        "images": len(bpy.data.images),
+        "materials": len(bpy.data.materials),
+        "lights": len(bpy.data.lights),
+    }
+
+
+def enable_render_outputs(outputs: Sequence[str]) -> None:
+    """Adds the passes of the outputs besides the colors to the render, so that one render call produces all of them"""
+    if "depth" in outputs:
+        # the z pass without antialiasing keeps the exact depth at object borders
+        bproc.renderer.enable_depth_output(activate_antialiasing=False)
+    if "normals" in outputs:
+        bproc.renderer.enable_normals_output()
+    if "segmentation" in outputs:
+        bproc.renderer.enable_segmentation_output(map_by=["instance"])
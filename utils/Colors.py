@@ -0,0 +1,101 @@
+import re
+import numpy as np
+
+from typing import Dict, Optional, Sequence, Tuple, Union
+from numpy.typing import NDArray
+
+# a color: "#RRGGBB", "#RGB", "R,G,B" (0..255, optionally in brackets), a name of NAMED_COLORS or (R, G, B) in 0..255
+ColorLike = Union[str, Sequence[int], Sequence[float]]
+
+NAMED_COLORS: Dict[str, Tuple[int, int, int]] = {
+    "black": (0, 0, 0),
+    "white": (255, 255, 255),
+    "gray": (128, 128, 128),
+    "grey": (128, 128, 128),
+    "silver": (192, 192, 192),
+    "red": (255, 0, 0),
+    "maroon": (128, 0, 0),
+    "orange": (255, 165, 0),
+    "yellow": (255, 255, 0),
+    "olive": (128, 128, 0),
+    "lime": (0, 255, 0),
+    "green": (0, 128, 0),
+    "cyan": (0, 255, 255),
+    "teal": (0, 128, 128),
+    "blue": (0, 0, 255),
+    "navy": (0, 0, 128),
+    "magenta": (255, 0, 255),
+    "purple": (128, 0, 128),
+    "brown": (165, 42, 42),
+    "pink": (255, 192, 203),
+}
+
+_HEX = re.compile(r"^#([0-9A-Fa-f]{6}|[0-9A-Fa-f]{3})$")
+_TRIPLET = re.compile(r"^[(\[]?\s*(\d{1,3})\s*,\s*(\d{1,3})\s*,\s*(\d{1,3})\s*[)\]]?$")
+
+
+def _parse_string(color: str) -> Tuple[int, int, int]:
+    text = color.strip()
+    match = _HEX.match(text)
+    if match:
+        digits = match.group(1)
+        if len(digits) == 3:
+            digits = "".join(digit * 2 for digit in digits)
+        return int(digits[0:2], 16), int(digits[2:4], 16), int(digits[4:6], 16)
+    match = _TRIPLET.match(text)
+    if match:
+        return tuple(int(value) for value in match.groups())
+    if text.lower() in NAMED_COLORS:
+        return NAMED_COLORS[text.lower()]
+    raise ValueError(f"Invalid color '{color}', use '#RRGGBB', '#RGB', 'R,G,B' or one of: {', '.join(NAMED_COLORS)}.")
+
+
+def parse_color(color: ColorLike) -> NDArray[np.float64]:
+    """the color as (3,) RGB array in [0, 1], raises a ValueError for invalid colors"""
+    return parse_palette([color])[0]
+
+
+def color2rgb(color: ColorLike) -> Tuple[float, float, float]:
+    """
+    Parses a user-defined color ('R,G,B', '#RRGGBB', a color name or (R, G, B) in 0..255) and converts it to an
+    RGB tuple that Blender can use, raises a ValueError for invalid colors.
+    """
+    r, g, b = parse_color(color)
+    return r, g, b
+
+
+def parse_palette(colors: Union[Sequence[ColorLike], NDArray]) -> NDArray[np.float64]:
+    """
+    parses all colors of a palette into an (N, 3) RGB array in [0, 1], raises a ValueError for invalid colors;
+    numeric palettes are converted as a whole, a palette of "#RRGGBB" strings is decoded in one pass
+    """
+    if isinstance(colors, np.ndarray) and colors.dtype.kind in "iuf" or \
+            len(colors) and all(not isinstance(color, str) for color in colors):
+        try:
+            rgb = np.asarray(colors, dtype=np.float64)
+        except ValueError as ex:
+            raise ValueError("A numeric palette must consist of (R, G, B) colors.") from ex
+    elif all(isinstance(color, str) and len(color) == 7 and _HEX.match(color) for color in colors):
+        rgb = np.frombuffer(bytes.fromhex("".join(color[1:] for color in colors)), dtype=np.uint8)
+        rgb = rgb.reshape(-1, 3).astype(np.float64)
+    else:
+        rgb = np.array([_parse_string(color) if isinstance(color, str) else parse_palette([color])[0] * 255
+                        for color in colors], dtype=np.float64).reshape(-1, 3)
+    if rgb.ndim != 2 or rgb.shape[1] != 3:
+        raise ValueError(f"A palette must consist of (R, G, B) colors but has the shape {rgb.shape}.")
+    if len(rgb) == 0:
+        raise ValueError("A palette must contain at least one color.")
+    if np.any((rgb < 0) | (rgb > 255)) or not np.all(np.isfinite(rgb)):
+        raise ValueError("The channels of a color must be within 0 and 255.")
+    return rgb / 255.0
+
+
+def sample_colors(
+        palette: NDArray[np.float64],
+        n: int,
+        rng: Optional[np.random.Generator] = None
+) -> Tuple[NDArray[np.int64], NDArray[np.float64]]:
+    """draws n colors of the (N, 3) palette with replacement, returns their palette indices and (n, 3) colors"""
+    rng = np.random.default_rng(0) if rng is None else rng
+    indices = rng.integers(0, len(palette), n)
+    return indices, palette[indices]
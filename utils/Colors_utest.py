@@ -0,0 +1,43 @@
+import unittest
+import numpy as np
+
+from .Colors import parse_color, parse_palette, sample_colors
+
+
+class ColorsTest(unittest.TestCase):
+    decimal_accuracy = 10
+
+    def test_parse_color_formats(self):
+        expected = np.array([255, 128, 0]) / 255
+        for color in ("#FF8000", "#ff8000", "255,128,0", "(255, 128, 0)", "[255,128,0]", (255, 128, 0), [255, 128, 0]):
+            np.testing.assert_almost_equal(parse_color(color), expected, decimal=self.decimal_accuracy)
+        np.testing.assert_almost_equal(parse_color("#f80"), np.array([255, 136, 0]) / 255)
+        np.testing.assert_almost_equal(parse_color("White"), np.ones(3))
+
+    def test_invalid_colors_raise(self):
+        for color in ("#FF80", "256,0,0", "1,2", "no color", (1, 2), (0, 0, 300), (-1, 0, 0)):
+            with self.assertRaises(ValueError, msg=str(color)):
+                parse_color(color)
+        with self.assertRaises(ValueError):
+            parse_palette([])
+
+    def test_parse_palette(self):
+        hex_palette = [f"#{r:02x}{g:02x}{b:02x}" for r, g, b in np.random.default_rng(0).integers(0, 256, (500, 3))]
+        rgb = parse_palette(hex_palette)
+        self.assertEqual(rgb.shape, (500, 3))
+        np.testing.assert_almost_equal(rgb[7], parse_color(hex_palette[7]))
+        mixed = parse_palette(["#000000", "0,0,255", "red", (0, 255, 0)])
+        np.testing.assert_almost_equal(mixed, [[0, 0, 0], [0, 0, 1], [1, 0, 0], [0, 1, 0]])
+        np.testing.assert_almost_equal(parse_palette(np.array([[255, 255, 255], [0, 0, 0]])), [[1, 1, 1], [0, 0, 0]])
+
+    def test_sample_colors(self):
+        palette = parse_palette(["red", "green", "blue"])
+        indices, colors = sample_colors(palette, 1000, np.random.default_rng(1))
+        self.assertEqual(colors.shape, (1000, 3))
+        self.assertEqual(set(indices), {0, 1, 2})
+        np.testing.assert_array_equal(colors, palette[indices])
+        np.testing.assert_array_equal(indices, sample_colors(palette, 1000, np.random.default_rng(1))[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,8 @@
+import numpy as np
+
 from typing import Tuple
 from math import sqrt, pi, sin, cos, asin, acos, atan2
+from numpy.typing import ArrayLike, NDArray
 
 
 def deg2rad(val: float) -> float:
@@ -160,3 +163,120 @@ def cylindrical_to_cartesian(r: float, theta: float, z: float) -> Tuple[float, f
     x = r * cos(theta)
     y = r * sin(theta)
     return x, y, z
+
+
+# ----- Batch Coordinate Transform
+# The batch variants take arrays of shape (N, 3) (or (N, 2) for polar coordinates) with one point per row, the columns
+# are ordered as the arguments of the scalar functions. The range checks are performed once for the whole batch.
+def _as_points(points: ArrayLike, n_cols: int = 3) -> NDArray[np.float64]:
+    points = np.asarray(points, dtype=np.float64)
+    assert points.ndim == 2 and points.shape[1] == n_cols, \
+        f"The points must be an array of shape (N, {n_cols}) but had the shape {points.shape}."
+    return points
+
+
+def _check_spherical_ranges(points: NDArray[np.float64]) -> None:
+    """vectorized range check of spherical coordinates (radiant)"""
+    r, polar_angle, azimuth_angle = points.T
+    assert np.all(r >= 0), f"The radius is supposed to be positive but was {r.min()}."
+    assert np.all((0 <= polar_angle) & (polar_angle <= pi)), \
+        f"The polar angle must be in [0, +pi] but was in [{polar_angle.min()}, {polar_angle.max()}] rad."
+    assert np.all((-pi <= azimuth_angle) & (azimuth_angle <= pi)), \
+        f"The azimuth angle must be in [-pi, +pi] but was in [{azimuth_angle.min()}, {azimuth_angle.max()}] rad."
+
+
+def spherical_to_cartesian_batch(points: ArrayLike, degree: bool = False) -> NDArray[np.float64]:
+    """transforms spherical coordinates (r, polar angle, azimuth angle) to cartesian coordinates (x, y, z)"""
+    points = _as_points(points)
+    r, polar_angle, azimuth_angle = points.T
+    if degree:
+        polar_angle = np.deg2rad(polar_angle)
+        azimuth_angle = np.deg2rad(azimuth_angle)
+        _check_spherical_ranges(np.stack((r, polar_angle, azimuth_angle), axis=-1))
+    else:
+        _check_spherical_ranges(points)
+
+    sin_polar = np.sin(polar_angle)
+    return np.stack((r * sin_polar * np.cos(azimuth_angle),
+                     r * sin_polar * np.sin(azimuth_angle),
+                     r * np.cos(polar_angle)), axis=-1)
+
+
+def cartesian_to_spherical_batch(points: ArrayLike, degree: bool = False) -> NDArray[np.float64]:
+    """transforms cartesian coordinates (x, y, z) to spherical coordinates (r, polar angle, azimuth angle)"""
+    x, y, z = _as_points(points).T
+    r = np.sqrt(x ** 2 + y ** 2 + z ** 2)
+    # polar angle of the origin is 0 as in the scalar version
+    polar_angle = np.arccos(np.divide(z, r, out=np.ones_like(r), where=r > 0))
+    azimuth_angle = np.arctan2(y, x)
+
+    if degree:
+        polar_angle = np.rad2deg(polar_angle)
+        azimuth_angle = np.rad2deg(azimuth_angle)
+
+    return np.stack((r, polar_angle, azimuth_angle), axis=-1)
+
+
+def cylindrical_to_spherical_batch(points: ArrayLike, degree: bool = False) -> NDArray[np.float64]:
+    """
+    transforms cylindrical coordinates (r, azimuth angle, h) to spherical coordinates (r, polar angle, azimuth angle)
+    """
+    r, azimuth_angle, h = _as_points(points).T
+    distance_sc = np.sqrt(r ** 2 + h ** 2)
+    polar_angle_sc = np.arccos(h / distance_sc)
+    if degree:
+        polar_angle_sc = np.rad2deg(polar_angle_sc)
+
+    return np.stack((distance_sc, polar_angle_sc, azimuth_angle), axis=-1)
+
+
+def spherical_to_cylindrical_batch(points: ArrayLike, degree: bool = False) -> NDArray[np.float64]:
+    """
+    transforms spherical coordinates (r, polar angle, azimuth angle) to cylindrical coordinates (r, azimuth angle, h)
+    """
+    r, polar_angle, azimuth_angle = _as_points(points).T
+    if degree:
+        polar_angle = np.deg2rad(polar_angle)
+
+    return np.stack((r * np.sin(polar_angle), azimuth_angle, r * np.cos(polar_angle)), axis=-1)
+
+
+def cartesian_to_cylindrical_batch(points: ArrayLike, degree: bool = False) -> NDArray[np.float64]:
+    """transforms cartesian coordinates (x, y, z) to cylindrical coordinates (r, theta, z)"""
+    x, y, z = _as_points(points).T
+    theta = np.arctan2(y, x)
+    if degree:
+        theta = np.rad2deg(theta)
+
+    return np.stack((np.sqrt(x ** 2 + y ** 2), theta, z), axis=-1)
+
+
+def cylindrical_to_cartesian_batch(points: ArrayLike, degree: bool = False) -> NDArray[np.float64]:
+    """transforms cylindrical coordinates (r, theta, z) to cartesian coordinates (x, y, z)"""
+    r, theta, z = _as_points(points).T
+    if degree:
+        theta = np.deg2rad(theta)
+
+    return np.stack((r * np.cos(theta), r * np.sin(theta), z), axis=-1)
+
+
+def polar_to_cartesian_batch(points: ArrayLike, degree: bool = False) -> NDArray[np.float64]:
+    """transforms polar coordinates (r, phi) of shape (N, 2) to 2D cartesian coordinates (x, y)"""
+    r, phi = _as_points(points, n_cols=2).T
+    if degree:
+        phi = np.deg2rad(phi)
+
+    return np.stack((r * np.cos(phi), r * np.sin(phi)), axis=-1)
+
+
+def add_polar_coordinates_batch(points: ArrayLike, degree: bool = False) -> Tuple[float, float]:
+    """adds all polar coordinates (r, phi) of the array of shape (N, 2), returns the sum as polar coordinates"""
+    x, y = polar_to_cartesian_batch(points, degree=degree).sum(axis=0)
+    angle_add = atan2(y, x)
+    return sqrt(x ** 2 + y ** 2), rad2deg(angle_add) if degree else angle_add
+
+
+def add_spherical_coordinates_batch(points: ArrayLike, degree: bool = False) -> Tuple[float, float, float]:
+    """adds all spherical coordinates of the array of shape (N, 3), returns the sum as spherical coordinates"""
+    xyz = spherical_to_cartesian_batch(points, degree=degree).sum(axis=0)
+    return cartesian_to_spherical(*xyz.tolist(), degree=degree)
@@ -1,7 +1,7 @@
 import unittest
 import numpy as np
 
-from CosyTrafo import (
+from .CosyTrafo import (
     # ----- Basic Mathematical Operations for Polar Coordinates
     add_polar_coordinates,
     add_spherical_coordinates,
@@ -10,7 +10,19 @@ from CosyTrafo import (
     spherical_to_cylindrical,
     spherical_to_cartesian,
     cartesian_to_spherical,
-    polar_to_cartesian
+    polar_to_cartesian,
+    cartesian_to_cylindrical,
+    cylindrical_to_cartesian,
+    # ----- Batch Coordinate Transform
+    spherical_to_cartesian_batch,
+    cartesian_to_spherical_batch,
+    cylindrical_to_spherical_batch,
+    spherical_to_cylindrical_batch,
+    cartesian_to_cylindrical_batch,
+    cylindrical_to_cartesian_batch,
+    polar_to_cartesian_batch,
+    add_polar_coordinates_batch,
+    add_spherical_coordinates_batch,
 )
 
 
@@ -77,6 +89,61 @@ class CoordinateTransformationTest(unittest.TestCase):
         np.testing.assert_almost_equal(p3_o_x_test, self.p3_o_x, decimal=self.decimal_accuracy)
 
 
+class BatchCoordinateTransformationTest(unittest.TestCase):
+    points_s = np.array([CoordinateTransformationTest.p1_o_s, CoordinateTransformationTest.p2_o_s,
+                         CoordinateTransformationTest.p3_o_s])  # degree
+    points_x = np.array([CoordinateTransformationTest.p1_o_x, CoordinateTransformationTest.p2_o_x,
+                         CoordinateTransformationTest.p3_o_x])
+
+    decimal_accuracy = 10
+
+    def test_spherical2cartesian(self):
+        np.testing.assert_almost_equal(spherical_to_cartesian_batch(self.points_s, degree=True), self.points_x,
+                                       decimal=self.decimal_accuracy)
+
+    def test_cartesian2spherical(self):
+        np.testing.assert_almost_equal(cartesian_to_spherical_batch(self.points_x, degree=True), self.points_s,
+                                       decimal=self.decimal_accuracy)
+
+    def test_cartesian2spherical_origin(self):
+        np.testing.assert_almost_equal(cartesian_to_spherical_batch([(0, 0, 0)]), [cartesian_to_spherical(0, 0, 0)])
+
+    def test_matches_scalar_functions(self):
+        rng = np.random.default_rng(0)
+        points = rng.uniform(-10, 10, (100, 3))
+        np.testing.assert_almost_equal(cartesian_to_cylindrical_batch(points),
+                                       [cartesian_to_cylindrical(*el) for el in points])
+        np.testing.assert_almost_equal(cylindrical_to_cartesian_batch(points),
+                                       [cylindrical_to_cartesian(*el) for el in points])
+        np.testing.assert_almost_equal(cylindrical_to_spherical_batch(points),
+                                       [cylindrical_to_spherical(*el) for el in points])
+        np.testing.assert_almost_equal(spherical_to_cylindrical_batch(points),
+                                       [spherical_to_cylindrical(*el) for el in points])
+        np.testing.assert_almost_equal(polar_to_cartesian_batch(points[:, :2], degree=True),
+                                       [polar_to_cartesian(*el, degree=True) for el in points[:, :2]])
+
+    def test_add_spherical_coordinates(self):
+        p1_p2_s_test = add_spherical_coordinates_batch(self.points_s[:2], degree=True)
+        np.testing.assert_almost_equal(p1_p2_s_test, CoordinateTransformationTest.p1_p2_s,
+                                       decimal=self.decimal_accuracy)
+        np.testing.assert_almost_equal(p1_p2_s_test, add_spherical_coordinates(*self.points_s[:2], degree=True),
+                                       decimal=self.decimal_accuracy)
+
+    def test_add_polar_coordinates(self):
+        points = np.array([(1, 0), (1, 90)])
+        np.testing.assert_almost_equal(add_polar_coordinates_batch(points, degree=True), (np.sqrt(2), 45))
+        np.testing.assert_almost_equal(add_polar_coordinates_batch([(1, 0), (1, np.pi / 2)]),
+                                       add_polar_coordinates((1, 0), (1, np.pi / 2)))
+
+    def test_range_check(self):
+        with self.assertRaises(AssertionError):
+            spherical_to_cartesian_batch([(1, 10, 0), (-1, 10, 0)], degree=True)
+        with self.assertRaises(AssertionError):
+            spherical_to_cartesian_batch([(1, 4, 0)])
+        with self.assertRaises(AssertionError):
+            spherical_to_cartesian_batch([1, 2, 3])
+
+
 if __name__ == '__main__':
     unittest.main()
 
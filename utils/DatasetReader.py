@@ -0,0 +1,340 @@
+import json
+import threading
+import zipfile
+import numpy as np
+
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Hashable, Iterator, List, Optional, Sequence, Union
+from numpy.typing import ArrayLike, NDArray
+
+from .DatasetWriter import MAX_STRING_LENGTH
+
+# a batch: one array of shape (batch size, ...) per key, the dataset indices of the frames under "indices"
+Batch = Dict[str, NDArray]
+# bound of the decompressed arrays of compressed npz shards which a reader keeps in memory
+CACHE_BYTES = 1 << 30
+
+
+def decode_image(path: Union[str, Path]) -> NDArray:
+    """decodes the image with imageio or, if missing, Pillow"""
+    try:
+        import imageio.v3 as iio
+    except ImportError:
+        iio = None
+    if iio is not None:
+        return iio.imread(path)
+    try:
+        from PIL import Image
+    except ImportError as ex:
+        raise ImportError("Reading images requires 'imageio' or 'Pillow' to be installed.") from ex
+    with Image.open(path) as image:
+        return np.asarray(image)
+
+
+def _npz_member(path: Path, info: zipfile.ZipInfo) -> NDArray:
+    """read-only memory map of an uncompressed .npy member of an .npz file"""
+    with open(path, "rb") as file:
+        # the data follows the local file header, whose extra field may differ from the central directory
+        file.seek(info.header_offset + 26)
+        name_length, extra_length = np.frombuffer(file.read(4), dtype="<u2")
+        file.seek(info.header_offset + 30 + int(name_length) + int(extra_length))
+        version = np.lib.format.read_magic(file)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(file)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(file)
+        offset = file.tell()
+    if 0 in shape:
+        # an empty file region cannot be mapped
+        return np.empty(shape, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=shape, order="F" if fortran_order else "C", offset=offset)
+
+
+def _npz_members(path: Path, keys: Optional[Sequence[str]] = None) -> Dict[str, zipfile.ZipInfo]:
+    """the .npy members of the keys (default: all) of an .npz file"""
+    with zipfile.ZipFile(path) as archive:
+        infos = {info.filename[:-len(".npy")]: info for info in archive.infolist() if info.filename.endswith(".npy")}
+    return {key: info for key, info in infos.items() if keys is None or key in keys}
+
+
+class _ArrayCache:
+    """the least recently used arrays up to a total size, shared by the reading threads"""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._arrays: "OrderedDict[Hashable, NDArray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, load: Callable[[], NDArray]) -> NDArray:
+        """the cached array of the key, loaded with load() if it is not cached"""
+        with self._lock:
+            if key in self._arrays:
+                self._arrays.move_to_end(key)
+                return self._arrays[key]
+        # loaded outside of the lock, so that the threads decompress different arrays in parallel
+        array = load()
+        with self._lock:
+            if key not in self._arrays:
+                self._arrays[key] = array
+                self.nbytes += array.nbytes
+            # an array larger than the bound is only used by the current read
+            while self.nbytes > self.max_bytes:
+                _, dropped = self._arrays.popitem(last=False)
+                self.nbytes -= dropped.nbytes
+        return array
+
+    def clear(self) -> None:
+        with self._lock:
+            self._arrays.clear()
+            self.nbytes = 0
+
+
+class _Hdf5File:
+    """the datasets of a shard file, read frame-wise from their chunks"""
+
+    def __init__(self, path: Path, keys: Sequence[str]) -> None:
+        import h5py
+        self.file = h5py.File(path, "r")
+        self.arrays = {key: self.file[key] for key in keys}
+
+    def load(self, key: str) -> NDArray:
+        return self.arrays[key][:]
+
+    def take(self, key: str, rows: NDArray[np.int64]) -> NDArray:
+        # h5py selects increasing, unique rows only
+        unique, inverse = np.unique(rows, return_inverse=True)
+        return self.arrays[key][unique][inverse]
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class _NpzFile:
+    """
+    the arrays of a shard file, memory-mapped if the shard is uncompressed; the arrays of a compressed shard are
+    decompressed as a whole when they are first read and kept in the cache of the reader
+    """
+
+    def __init__(self, path: Path, keys: Sequence[str], cache: _ArrayCache) -> None:
+        self.path = path
+        self.cache = cache
+        members = _npz_members(path, keys)
+        self.arrays = {key: _npz_member(path, info) for key, info in members.items()
+                       if info.compress_type == zipfile.ZIP_STORED}
+
+    def load(self, key: str) -> NDArray:
+        if key in self.arrays:
+            return self.arrays[key]
+        # the file is only open while the array is decompressed
+        with np.load(self.path) as npz:
+            return npz[key]
+
+    def take(self, key: str, rows: NDArray[np.int64]) -> NDArray:
+        if key in self.arrays:
+            return np.asarray(self.arrays[key][rows])
+        return self.cache.get((self.path, key), partial(self.load, key))[rows]
+
+    def close(self) -> None:
+        self.arrays = {}
+
+
+class DatasetReader:
+    """
+    Random access to the frames of a generated dataset: the hdf5/npz shards listed by index.json, which are memory
+    mapped (uncompressed npz), read per frame chunk (hdf5) or decompressed per shard and key when first read and cached
+    up to cache_bytes (compressed npz), or the png images of manifest.json with their metadata.
+    Frames are read as batches of NumPy arrays, batches() prefetches them on a thread pool.
+    """
+
+    def __init__(
+            self,
+            dataset_dir: Union[str, Path],
+            keys: Optional[Sequence[str]] = None,
+            index_name: str = "index.json",
+            manifest_name: str = "manifest.json",
+            decode: Callable[[Path], NDArray] = decode_image,
+            cache_bytes: int = CACHE_BYTES
+    ) -> None:
+        """
+        :param keys: keys to read, e.g. ("colors", "camera_matrix"), default: all keys of the dataset
+        :param decode: decodes an image of a png dataset
+        :param cache_bytes: bound of the decompressed arrays of compressed npz shards kept in memory, the least
+        recently read are dropped first; shuffled reading of compressed shards decompresses a shard array per cache miss
+        """
+        self.dataset_dir = Path(dataset_dir)
+        self.decode = decode
+        self._files: List[Any] = []
+        self._cache = _ArrayCache(cache_bytes)
+        if (self.dataset_dir / index_name).exists():
+            with open(self.dataset_dir / index_name) as file:
+                index = json.load(file)
+            self.format = index["format"]
+            self.specs = {key: spec for key, spec in index["keys"].items() if key != "indices"}
+            shards = [shard for shard in index["shards"] if (self.dataset_dir / shard["file"]).exists()]
+            self.keys = self._select_keys(keys)
+            file_type = _Hdf5File if self.format == "hdf5" else partial(_NpzFile, cache=self._cache)
+            shard_of, row_of, indices = [], [], []
+            for number, shard in enumerate(shards):
+                shard_file = file_type(self.dataset_dir / shard["file"], [*self.keys, "indices"])
+                self._files.append(shard_file)
+                shard_indices = np.asarray(shard_file.load("indices"), dtype=np.int64)
+                indices.append(shard_indices)
+                shard_of.append(np.full(len(shard_indices), number))
+                row_of.append(np.arange(len(shard_indices)))
+            self.frames: List[Dict[str, Any]] = []
+        elif (self.dataset_dir / manifest_name).exists():
+            with open(self.dataset_dir / manifest_name) as file:
+                self.frames = json.load(file)["frames"]
+            self.format = "png"
+            self.specs = self._manifest_specs()
+            self.keys = self._select_keys(keys)
+            indices = [np.array([frame["index"] for frame in self.frames], dtype=np.int64)]
+            shard_of = [np.zeros(len(self.frames), dtype=np.int64)]
+            row_of = [np.arange(len(self.frames))]
+        else:
+            raise FileNotFoundError(f"{self.dataset_dir} contains neither {index_name} nor {manifest_name}.")
+        # frames sorted by dataset index, position k of the reader is the k-th smallest index
+        indices = np.concatenate(indices) if indices else np.empty(0, dtype=np.int64)
+        order = np.argsort(indices, kind="stable")
+        self.indices = indices[order]
+        self._shard_of = np.concatenate(shard_of)[order] if shard_of else np.empty(0, dtype=np.int64)
+        self._row_of = np.concatenate(row_of)[order] if row_of else np.empty(0, dtype=np.int64)
+
+    def _manifest_specs(self) -> Dict[str, Dict[str, Any]]:
+        """keys of the frames of a png dataset: the images, the further arrays and the metadata of the first frame"""
+        if not self.frames:
+            return {}
+        first = self.frames[0]
+        specs = {"colors": {"file_key": "file"}}
+        for key, value in first.items():
+            if key in ("index", "file"):
+                continue
+            if key.endswith("_file"):
+                specs[key[:-len("_file")]] = {"file_key": key}
+            else:
+                array = np.asarray(value)
+                specs[key] = {"shape": list(array.shape), "dtype": array.dtype.str}
+        return specs
+
+    def _select_keys(self, keys: Optional[Sequence[str]]) -> List[str]:
+        if keys is None:
+            return list(self.specs)
+        unknown = set(keys) - set(self.specs)
+        if unknown:
+            raise KeyError(f"The dataset has no keys {', '.join(sorted(unknown))}, available: {', '.join(self.specs)}.")
+        return list(keys)
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def __getitem__(self, position: int) -> Dict[str, NDArray]:
+        """the frame at the position (not the dataset index), every key without the batch dimension"""
+        return {key: array[0] for key, array in self.read([position]).items()}
+
+    def positions_of(self, indices: ArrayLike) -> NDArray[np.int64]:
+        """positions of the dataset indices, raises a KeyError for indices which are not in the dataset"""
+        indices = np.asarray(indices, dtype=np.int64)
+        positions = np.searchsorted(self.indices, indices)
+        found = positions < len(self.indices)
+        found[found] = self.indices[positions[found]] == indices[found]
+        if not np.all(found):
+            raise KeyError(f"The dataset has no frames {indices[~found].tolist()}.")
+        return positions
+
+    def read(self, positions: ArrayLike) -> Batch:
+        """the frames at the positions as one array of shape (len(positions), ...) per key"""
+        positions = np.asarray(positions, dtype=np.int64)
+        batch = {"indices": self.indices[positions]}
+        if self.format == "png":
+            frames = [self.frames[row] for row in self._row_of[positions]]
+            for key in self.keys:
+                batch[key] = self._read_manifest_key(key, frames)
+            return batch
+        shards = self._shard_of[positions]
+        rows = self._row_of[positions]
+        for key in self.keys:
+            spec = self.specs[key]
+            array = np.empty((len(positions), *spec["shape"]), dtype=np.dtype(spec["dtype"]))
+            # one read per shard, the rows of a shard are taken together
+            for shard in np.unique(shards):
+                selection = shards == shard
+                array[selection] = self._files[shard].take(key, rows[selection])
+            batch[key] = array
+        return batch
+
+    def _read_manifest_key(self, key: str, frames: List[Dict[str, Any]]) -> NDArray:
+        file_key = self.specs[key].get("file_key")
+        if file_key is None:
+            array = np.asarray([frame[key] for frame in frames])
+            # strings as the shards store them
+            return array.astype(f"S{MAX_STRING_LENGTH}") if array.dtype.kind == "U" else array
+        if file_key == "file":
+            return np.stack([self.decode(self.dataset_dir / frame["file"]) for frame in frames])
+        arrays = []
+        for frame in frames:
+            with np.load(self.dataset_dir / frame[file_key]) as npz:
+                arrays.append(npz[key])
+        return np.stack(arrays)
+
+    def frame_bytes(self) -> int:
+        """bytes of one frame of the selected keys, 0 if unknown (images of a png dataset)"""
+        total = 0
+        for key in self.keys:
+            spec = self.specs[key]
+            if "shape" in spec:
+                total += int(np.prod(spec["shape"], dtype=np.int64)) * np.dtype(spec["dtype"]).itemsize
+        return total
+
+    def batches(
+            self,
+            batch_size: int,
+            shuffle: bool = False,
+            seed: int = 0,
+            epoch: int = 0,
+            drop_last: bool = False,
+            workers: int = 4,
+            prefetch: int = 4,
+            max_bytes: Optional[int] = None
+    ) -> Iterator[Batch]:
+        """
+        iterates over the dataset in batches, which are read ahead on a pool of worker threads
+        :param shuffle: visit the frames in the order of a permutation drawn from (seed, epoch)
+        :param prefetch: number of batches read ahead of the consumer
+        :param max_bytes: bound of the memory of the batches read ahead, limits prefetch for large frames; the arrays
+        of compressed npz shards decompressed by the reads are bounded by the cache_bytes of the reader
+        """
+        assert batch_size > 0, "A batch must hold at least one frame."
+        order = np.random.default_rng([seed, epoch]).permutation(len(self)) if shuffle else np.arange(len(self))
+        stop = len(order) - len(order) % batch_size if drop_last else len(order)
+        chunks = [order[start:start + batch_size] for start in range(0, stop, batch_size)]
+        if max_bytes is not None and self.frame_bytes() > 0:
+            prefetch = min(prefetch, max_bytes // (self.frame_bytes() * batch_size))
+        prefetch = max(1, prefetch)
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            pending: Deque[Future] = deque()
+            next_chunk = 0
+            try:
+                while pending or next_chunk < len(chunks):
+                    while next_chunk < len(chunks) and len(pending) < prefetch:
+                        pending.append(pool.submit(self.read, chunks[next_chunk]))
+                        next_chunk += 1
+                    yield pending.popleft().result()
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def close(self) -> None:
+        for file in self._files:
+            file.close()
+        self._files = []
+        self._cache.clear()
+
+    def __enter__(self) -> "DatasetReader":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
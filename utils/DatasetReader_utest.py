@@ -0,0 +1,135 @@
+import importlib.util
+import tempfile
+import threading
+import unittest
+import numpy as np
+
+from pathlib import Path
+
+from .DatasetWriter import ShardedDatasetWriter
+from .ImageWriter import AsyncImageWriter
+from .DatasetReader import DatasetReader
+
+
+def write_npy(image, path):
+    with open(path, "wb") as file:
+        np.save(file, image)
+
+
+class DatasetReaderTest(unittest.TestCase):
+    n_frames = 10
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write_shards(self, file_format: str = "npz", compression: bool = False) -> None:
+        with ShardedDatasetWriter(self.dir, frames_per_shard=4, file_format=file_format,
+                                  compression=compression) as writer:
+            # the frames arrive out of order, e.g. grouped by texture
+            for i in (*range(5, self.n_frames), *range(5)):
+                writer.submit(i, np.full((6, 5, 3), i, dtype=np.uint8), {"depth": np.full((6, 5), i / 4, np.float16)},
+                              camera_matrix=np.eye(4) * i, light_type="AREA" if i % 2 else "POINT")
+
+    def check_batch(self, batch, indices) -> None:
+        np.testing.assert_array_equal(batch["indices"], indices)
+        for row, i in enumerate(indices):
+            np.testing.assert_array_equal(batch["colors"][row], np.full((6, 5, 3), i, dtype=np.uint8))
+            np.testing.assert_array_equal(batch["camera_matrix"][row], np.eye(4) * i)
+            self.assertEqual(batch["light_type"][row], b"AREA" if i % 2 else b"POINT")
+
+    def check_colors(self, batch, indices) -> None:
+        for row, i in enumerate(indices):
+            np.testing.assert_array_equal(batch["colors"][row], np.full((6, 5, 3), i, dtype=np.uint8))
+
+    def test_uncompressed_npz_is_memory_mapped(self):
+        self.write_shards()
+        with DatasetReader(self.dir) as reader:
+            self.assertIsInstance(reader._files[0].arrays["colors"], np.memmap)
+            self.assertEqual(len(reader), self.n_frames)
+            np.testing.assert_array_equal(reader.indices, np.arange(self.n_frames))
+            self.check_batch(reader.read([9, 0, 4, 5]), [9, 0, 4, 5])
+            self.assertEqual(reader[3]["depth"].dtype, np.float16)
+            np.testing.assert_array_equal(reader[3]["depth"], np.full((6, 5), 3 / 4))
+            np.testing.assert_array_equal(reader.positions_of([7, 2]), [7, 2])
+            with self.assertRaises(KeyError):
+                reader.positions_of([self.n_frames])
+
+    def test_compressed_npz_and_selected_keys(self):
+        self.write_shards(compression=True)
+        with DatasetReader(self.dir, keys=["camera_matrix"]) as reader:
+            batch = reader.read([2, 8])
+            self.assertEqual(sorted(batch), ["camera_matrix", "indices"])
+            np.testing.assert_array_equal(batch["camera_matrix"][1], np.eye(4) * 8)
+        with self.assertRaises(KeyError):
+            DatasetReader(self.dir, keys=["normals"])
+
+    def test_compressed_npz_is_decompressed_lazily_into_a_bounded_cache(self):
+        self.write_shards(compression=True)
+        colors_bytes = 4 * 6 * 5 * 3
+        # room for the colors of two shards
+        with DatasetReader(self.dir, keys=["colors"], cache_bytes=2 * colors_bytes) as reader:
+            self.assertEqual(reader._cache.nbytes, 0)
+            self.check_colors(reader.read([0, 1]), [0, 1])
+            self.assertEqual(reader._cache.nbytes, colors_bytes)
+            for batch in reader.batches(3, shuffle=True, workers=2):
+                self.check_colors(batch, batch["indices"])
+                self.assertLessEqual(reader._cache.nbytes, 2 * colors_bytes)
+        self.assertEqual(reader._cache.nbytes, 0)
+
+    def test_hdf5(self):
+        if importlib.util.find_spec("h5py") is None:
+            self.skipTest("h5py is not installed")
+        self.write_shards("hdf5", compression=True)
+        with DatasetReader(self.dir) as reader:
+            self.check_batch(reader.read([6, 1, 6]), [6, 1, 6])
+
+    def test_png_dataset(self):
+        with AsyncImageWriter(self.dir, encode=write_npy, file_pattern="image{index}.npy") as writer:
+            for i in range(self.n_frames):
+                writer.submit(i, np.full((6, 5, 3), i, dtype=np.uint8), {"depth": np.full((6, 5), i, np.float32)},
+                              camera_matrix=(np.eye(4) * i).tolist(), light_type="AREA" if i % 2 else "POINT")
+        batch = DatasetReader(self.dir, decode=np.load).read([3, 8])
+        self.check_batch(batch, [3, 8])
+        np.testing.assert_array_equal(batch["depth"][1], np.full((6, 5), 8))
+
+    def test_shuffled_batches_cover_the_dataset(self):
+        self.write_shards()
+        with DatasetReader(self.dir) as reader:
+            batches = list(reader.batches(3, shuffle=True, seed=1, workers=2, prefetch=2))
+            self.assertEqual([len(batch["indices"]) for batch in batches], [3, 3, 3, 1])
+            indices = np.concatenate([batch["indices"] for batch in batches])
+            self.assertEqual(sorted(indices), list(range(self.n_frames)))
+            self.assertFalse(np.array_equal(indices, np.arange(self.n_frames)))
+            for batch in batches:
+                self.check_batch(batch, batch["indices"])
+            # the order depends on seed and epoch only
+            again = np.concatenate([batch["indices"] for batch in reader.batches(3, shuffle=True, seed=1)])
+            np.testing.assert_array_equal(indices, again)
+            self.assertEqual(len(list(reader.batches(3, drop_last=True))), 3)
+
+    def test_prefetch_is_bounded(self):
+        self.write_shards()
+        with DatasetReader(self.dir) as reader:
+            in_flight = []
+            lock = threading.Lock()
+            read = reader.read
+
+            def counting_read(positions):
+                with lock:
+                    in_flight.append(len(in_flight))
+                return read(positions)
+
+            reader.read = counting_read
+            # a budget of two frames leaves room for a single batch of two frames in flight
+            iterator = reader.batches(2, prefetch=4, max_bytes=2 * reader.frame_bytes())
+            next(iterator)
+            self.assertEqual(len(in_flight), 1)
+            self.assertEqual(len(list(iterator)), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,227 @@
+import json
+import os
+import numpy as np
+
+from pathlib import Path
+from typing import Callable, Dict, List, Literal, Optional, Union, Any
+from numpy.typing import ArrayLike, NDArray
+
+from .ImageWriter import write_json_atomic
+
+DatasetFormat = Literal["hdf5", "npz"]
+SHARD_ENDINGS = {"hdf5": ".h5", "npz": ".npz"}
+# strings (e.g. light types) are stored as fixed-width bytes, which both HDF5 and NPZ can hold
+MAX_STRING_LENGTH = 32
+
+
+def _as_frame_array(value: ArrayLike) -> NDArray:
+    """per-frame value as array with the same dtype for every frame"""
+    array = np.asarray(value)
+    if array.dtype.kind in "US":
+        assert array.dtype.itemsize // (4 if array.dtype.kind == "U" else 1) <= MAX_STRING_LENGTH, \
+            f"Strings must not be longer than {MAX_STRING_LENGTH} characters."
+        array = array.astype(f"S{MAX_STRING_LENGTH}")
+    return array
+
+
+class _Hdf5Shard:
+    """shard file whose datasets grow by one frame per append, so frames are written to disk as they arrive"""
+
+    def __init__(self, path: Path, capacity: int, compression: bool) -> None:
+        import h5py
+        self.file = h5py.File(path, "w")
+        self.capacity = capacity
+        self.compression = compression
+
+    def append(self, position: int, arrays: Dict[str, NDArray]) -> None:
+        for key, array in arrays.items():
+            if key not in self.file:
+                # images are chunked per frame, so that single frames can be read without decompressing others
+                per_frame = array.ndim >= 2
+                chunks = (1, *array.shape) if per_frame else (min(self.capacity, 1024), *array.shape)
+                self.file.create_dataset(
+                    key, shape=(0, *array.shape), maxshape=(self.capacity, *array.shape), dtype=array.dtype,
+                    chunks=chunks, compression="gzip" if self.compression and per_frame else None,
+                    compression_opts=4 if self.compression and per_frame else None
+                )
+            dataset = self.file[key]
+            dataset.resize(position + 1, axis=0)
+            dataset[position] = array
+
+    def close(self) -> None:
+        self.file.close()
+
+
+class _NpzShard:
+    """
+    shard whose frames are written into one array of capacity rows per key, allocated with the first frame, and saved
+    as one .npz file when it is closed
+    """
+
+    def __init__(self, path: Path, capacity: int, compression: bool) -> None:
+        self.path = path
+        self.capacity = capacity
+        self.compression = compression
+        self.arrays: Dict[str, NDArray] = {}
+        self.count = 0
+
+    def append(self, position: int, arrays: Dict[str, NDArray]) -> None:
+        for key, array in arrays.items():
+            if key not in self.arrays:
+                self.arrays[key] = np.empty((self.capacity, *array.shape), dtype=array.dtype)
+            self.arrays[key][position] = array
+        self.count = max(self.count, position + 1)
+
+    def close(self) -> None:
+        save = np.savez_compressed if self.compression else np.savez
+        with open(self.path, "wb") as file:
+            # the rows of a partially filled shard are a view, they are saved without copying them
+            save(file, **{key: array[:self.count] for key, array in self.arrays.items()})
+
+
+class ShardedDatasetWriter:
+    """
+    Writes frames into shard files of frames_per_shard frames each. Every key passed to add() becomes an array of
+    shape (frames, ...) within the shard, the dataset index of each frame is stored under "indices".
+    A shard is written under a temporary name and renamed once complete; the index file lists the complete shards.
+    An hdf5 shard is written to disk frame by frame. An npz shard is held in memory until it is complete, in one array
+    of frames_per_shard rows per key, so the writer holds at most one shard: frames_per_shard times the bytes of a
+    frame.
+    """
+
+    def __init__(
+            self,
+            output_dir: Union[str, Path],
+            frames_per_shard: int = 256,
+            file_format: DatasetFormat = "hdf5",
+            compression: bool = True,
+            index_name: str = "index.json",
+            fsync: bool = True,
+            on_written: Optional[Callable[[List[int], Path], None]] = None,
+            append: bool = False
+    ) -> None:
+        """
+        :param on_written: called with the dataset indices and the path of each completed shard
+        :param append: keep the shards of an existing index in output_dir whose files still exist
+        """
+        assert frames_per_shard > 0, "A shard must hold at least one frame."
+        assert file_format in SHARD_ENDINGS, f"Unknown dataset format '{file_format}'."
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.frames_per_shard = frames_per_shard
+        self.file_format = file_format
+        self.compression = compression
+        self.index_name = index_name
+        self.fsync = fsync
+        self.on_written = on_written
+        self.shards: List[Dict[str, Any]] = []
+        self.keys: Dict[str, Dict[str, Any]] = {}
+        if append and (self.output_dir / index_name).exists():
+            with open(self.output_dir / index_name) as file:
+                index = json.load(file)
+            assert index["format"] == file_format, \
+                f"The existing dataset is stored as {index['format']}, it cannot be extended with {file_format}."
+            self.keys = index["keys"]
+            self.shards = [shard for shard in index["shards"] if (self.output_dir / shard["file"]).exists()]
+
+        self._shard = None
+        self._shard_path: Optional[Path] = None
+        self._shard_indices: List[int] = []
+
+    def _open_shard(self, first_index: int) -> None:
+        self._shard_path = self.output_dir / f"frames_{first_index:08d}{SHARD_ENDINGS[self.file_format]}"
+        shard_type = _Hdf5Shard if self.file_format == "hdf5" else _NpzShard
+        self._shard = shard_type(self._tmp_path(self._shard_path), self.frames_per_shard, self.compression)
+        self._shard_indices = []
+
+    @staticmethod
+    def _tmp_path(path: Path) -> Path:
+        return path.with_name(path.name + ".tmp")
+
+    def _close_shard(self) -> None:
+        self._shard.close()
+        tmp_path = self._tmp_path(self._shard_path)
+        if self.fsync:
+            with open(tmp_path, "rb") as file:
+                os.fsync(file.fileno())
+        os.replace(tmp_path, self._shard_path)
+        # a shard written again (e.g. after a failed verification) replaces its previous entry
+        self.shards = [shard for shard in self.shards if shard["file"] != self._shard_path.name]
+        self.shards.append({
+            "file": self._shard_path.name,
+            "count": len(self._shard_indices),
+            "first_index": min(self._shard_indices),
+            "last_index": max(self._shard_indices),
+            "bytes": self._shard_path.stat().st_size,
+        })
+        self.shards.sort(key=lambda shard: shard["first_index"])
+        self._shard = None
+        self.write_index()
+        if self.on_written is not None:
+            self.on_written(self._shard_indices, self._shard_path)
+
+    def write_index(self) -> None:
+        write_json_atomic(self.output_dir / self.index_name, {
+            "format": self.file_format,
+            "frames_per_shard": self.frames_per_shard,
+            "keys": self.keys,
+            "shards": self.shards,
+        })
+
+    def add(self, index: int, **arrays: ArrayLike) -> None:
+        """adds the frame of the dataset index, every keyword is one per-frame array (image, pose, light, ...)"""
+        arrays = {key: _as_frame_array(value) for key, value in arrays.items()}
+        arrays["indices"] = np.asarray(index, dtype=np.int64)
+        for key, array in arrays.items():
+            spec = {"shape": list(array.shape), "dtype": array.dtype.str}
+            assert self.keys.setdefault(key, spec) == spec, \
+                f"The frames of the key '{key}' must all have the shape and type {self.keys[key]} but got {spec}."
+
+        if self._shard is None:
+            self._open_shard(index)
+        self._shard.append(len(self._shard_indices), arrays)
+        self._shard_indices.append(index)
+        if len(self._shard_indices) == self.frames_per_shard:
+            self._close_shard()
+
+    def submit(
+            self,
+            index: int,
+            image: NDArray,
+            arrays: Optional[Dict[str, ArrayLike]] = None,
+            **metadata: ArrayLike
+    ) -> None:
+        """
+        adds the color image of the dataset index together with its per-frame metadata
+        :param arrays: further per-frame arrays (depth, normals, ...), stored in the shard next to the colors
+        """
+        self.add(index, colors=image, **(arrays or {}), **metadata)
+
+    def close(self) -> None:
+        """writes the last, possibly partially filled, shard and the index"""
+        if self._shard is not None and self._shard_indices:
+            self._close_shard()
+        else:
+            self.write_index()
+
+    def __enter__(self) -> "ShardedDatasetWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+def merge_indices(index_paths: List[Union[str, Path]], output_path: Union[str, Path]) -> Dict[str, Any]:
+    """combines the index files of datasets written into the same directory (e.g. by parallel workers)"""
+    merged: Dict[str, Any] = {}
+    shards = []
+    for path in index_paths:
+        with open(path) as file:
+            index = json.load(file)
+        for key in ("format", "frames_per_shard", "keys"):
+            assert merged.setdefault(key, index[key]) == index[key], \
+                f"The datasets cannot be merged, their '{key}' differs."
+        shards.extend(index["shards"])
+    merged["shards"] = sorted(shards, key=lambda shard: shard["first_index"])
+    write_json_atomic(output_path, merged)
+    return merged
@@ -0,0 +1,87 @@
+import json
+import tempfile
+import unittest
+import numpy as np
+
+from pathlib import Path
+
+from .DatasetWriter import ShardedDatasetWriter
+
+
+class ShardedDatasetWriterTest(unittest.TestCase):
+    n_frames = 10
+    frames_per_shard = 4
+
+    def write(self, tmp_dir: str, file_format: str) -> dict:
+        with ShardedDatasetWriter(tmp_dir, frames_per_shard=self.frames_per_shard, file_format=file_format) as writer:
+            for i in range(self.n_frames):
+                writer.submit(i, np.full((6, 5, 3), i, dtype=np.uint8), camera_matrix=np.eye(4) * i,
+                              light_energy=float(i), light_type="AREA" if i % 2 else "POINT")
+        with open(Path(tmp_dir) / "index.json") as file:
+            return json.load(file)
+
+    def check_index(self, index: dict) -> None:
+        self.assertEqual([shard["count"] for shard in index["shards"]], [4, 4, 2])
+        self.assertEqual([shard["first_index"] for shard in index["shards"]], [0, 4, 8])
+        self.assertEqual(index["keys"]["colors"]["shape"], [6, 5, 3])
+
+    def test_npz(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            index = self.write(tmp_dir, "npz")
+            self.check_index(index)
+            with np.load(Path(tmp_dir) / index["shards"][1]["file"]) as shard:
+                np.testing.assert_array_equal(shard["indices"], [4, 5, 6, 7])
+                np.testing.assert_array_equal(shard["colors"][2], np.full((6, 5, 3), 6, dtype=np.uint8))
+                np.testing.assert_array_equal(shard["camera_matrix"][3], np.eye(4) * 7)
+                self.assertEqual(shard["light_type"][1], b"AREA")
+            self.assertEqual(sorted(el.name for el in Path(tmp_dir).glob("*.tmp")), [])
+
+    def test_arrays_are_aligned_with_the_colors(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with ShardedDatasetWriter(tmp_dir, frames_per_shard=self.frames_per_shard, file_format="npz") as writer:
+                for i in range(self.n_frames):
+                    writer.submit(i, np.full((6, 5, 3), i, dtype=np.uint8),
+                                  arrays={"depth": np.full((6, 5), i / 4, dtype=np.float16),
+                                          "segmentation": np.full((6, 5), i % 2, dtype=np.uint8)})
+            with open(Path(tmp_dir) / "index.json") as file:
+                index = json.load(file)
+            self.assertEqual(np.dtype(index["keys"]["depth"]["dtype"]), np.float16)
+            with np.load(Path(tmp_dir) / index["shards"][2]["file"]) as shard:
+                np.testing.assert_array_equal(shard["indices"], [8, 9])
+                self.assertEqual(shard["depth"].dtype, np.float16)
+                np.testing.assert_array_equal(shard["depth"][1], np.full((6, 5), 9 / 4))
+                np.testing.assert_array_equal(shard["segmentation"][1], np.ones((6, 5)))
+
+    def test_hdf5(self):
+        try:
+            import h5py
+        except ImportError:
+            self.skipTest("h5py is not installed")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            index = self.write(tmp_dir, "hdf5")
+            self.check_index(index)
+            with h5py.File(Path(tmp_dir) / index["shards"][2]["file"], "r") as shard:
+                np.testing.assert_array_equal(shard["indices"][:], [8, 9])
+                np.testing.assert_array_equal(shard["colors"][1], np.full((6, 5, 3), 9, dtype=np.uint8))
+                np.testing.assert_array_equal(shard["light_energy"][:], [8.0, 9.0])
+                self.assertEqual(shard["colors"].chunks, (1, 6, 5, 3))
+
+    def test_npz_shard_is_preallocated(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with ShardedDatasetWriter(tmp_dir, frames_per_shard=self.frames_per_shard, file_format="npz") as writer:
+                writer.add(0, colors=np.zeros((6, 5, 3), dtype=np.uint8))
+                # the frames are written into one array per key instead of being stacked when the shard is closed
+                self.assertEqual(writer._shard.arrays["colors"].shape, (self.frames_per_shard, 6, 5, 3))
+            with np.load(Path(tmp_dir) / "frames_00000000.npz") as shard:
+                self.assertEqual(shard["colors"].shape, (1, 6, 5, 3))
+
+    def test_inconsistent_shapes(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            writer = ShardedDatasetWriter(tmp_dir, file_format="npz")
+            writer.add(0, colors=np.zeros((2, 2, 3)))
+            with self.assertRaises(AssertionError):
+                writer.add(1, colors=np.zeros((3, 2, 3)))
+
+
+if __name__ == '__main__':
+    unittest.main()
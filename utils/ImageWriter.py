@@ -0,0 +1,234 @@
+import importlib.util
+import json
+import os
+import queue
+import threading
+import time
+import numpy as np
+
+from pathlib import Path
+from typing import Callable, Optional, Union, Dict, List, Any
+from numpy.typing import NDArray
+
+
+def encode_image(image: NDArray, path: Union[str, Path]) -> None:
+    """encodes the image according to the file ending (png, jpg, exr, ...) with imageio or, if missing, Pillow"""
+    try:
+        import imageio.v3 as iio
+    except ImportError:
+        iio = None
+    if iio is not None:
+        iio.imwrite(path, image)
+        return
+    try:
+        from PIL import Image
+    except ImportError as ex:
+        raise ImportError("Writing images requires 'imageio' or 'Pillow' to be installed.") from ex
+    Image.fromarray(np.asarray(image)).save(path)
+
+
+def check_encodable(suffix: str) -> None:
+    """
+    raises an ImportError if encode_image cannot write images with the file ending: without imageio, Pillow has to
+    support the format, which e.g. excludes .exr
+    """
+    if importlib.util.find_spec("imageio") is not None:
+        return
+    if importlib.util.find_spec("PIL") is None:
+        raise ImportError("Writing images requires 'imageio' or 'Pillow' to be installed.")
+    from PIL import Image
+    Image.init()
+    image_format = Image.registered_extensions().get(suffix.lower())
+    if image_format is None or image_format not in Image.SAVE:
+        raise ImportError(f"Writing {suffix} images requires 'imageio', Pillow cannot encode them.")
+
+
+def fsync_file(path: Union[str, Path]) -> None:
+    """flushes the content of the file to the disk"""
+    with open(path, "rb") as file:
+        os.fsync(file.fileno())
+
+
+def write_json_atomic(path: Union[str, Path], content: Any) -> None:
+    """writes the json to a temporary file which replaces the target, so that readers never see partial content"""
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w") as file:
+        json.dump(content, file, indent=1)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_journal(path: Union[str, Path]) -> List[Dict[str, Any]]:
+    """the records of a journal, a partially written last line of an interrupted run is ignored"""
+    records = []
+    with open(path) as file:
+        for line in file:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+    return records
+
+
+class AsyncImageWriter:
+    """
+    Encodes rendered frames on background threads while the caller continues rendering.
+    Frames are passed through a bounded queue: submit() blocks as soon as max_pending frames wait for encoding, which
+    limits the memory held by frames in flight. close() waits for all frames, fsyncs them and writes the manifest.
+    The record of every frame is appended to a journal as soon as the frame is written, so that the frames written
+    before a crash are restored into the manifest when the run is continued with append.
+    """
+
+    def __init__(
+            self,
+            output_dir: Union[str, Path],
+            encode: Callable[[NDArray, str], None] = encode_image,
+            file_pattern: str = "image{index}.png",
+            array_pattern: str = "{name}{index}.npz",
+            max_pending: int = 8,
+            workers: int = 2,
+            manifest_name: Optional[str] = "manifest.json",
+            journal_name: str = "manifest_journal.jsonl",
+            fsync: bool = True,
+            on_written: Optional[Callable[[List[int], Path, List[Path]], None]] = None,
+            append: bool = False,
+            on_encoded: Optional[Callable[[str, float], None]] = None
+    ) -> None:
+        """
+        :param on_written: called from the encoder thread with the dataset indices, the path of each written image
+        and the paths of its array files, e.g. RunManifest.mark_done
+        :param append: keep the frames of an existing manifest in output_dir (frames of the same index are replaced)
+        :param array_pattern: file name of the further per-frame arrays (depth, normals, ...) passed to submit
+        :param on_encoded: called from the encoder thread with "encode" and the wall time of every frame, e.g.
+        StageProfiler.add_frame_time
+        :param journal_name: records of the frames written since the manifest was last written, removed by close()
+        """
+        assert workers > 0, "At least one worker thread is required."
+        if encode is encode_image:
+            # fail here instead of on the encoder thread of the first frame
+            check_encodable(Path(file_pattern).suffix)
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.encode = encode
+        self.file_pattern = file_pattern
+        self.array_pattern = array_pattern
+        self.manifest_name = manifest_name
+        self.fsync = fsync
+        self.on_written = on_written
+        self.on_encoded = on_encoded
+        self.frames: List[Dict[str, Any]] = []
+        self.journal_path = None if manifest_name is None else self.output_dir / journal_name
+        if append and manifest_name and (self.output_dir / manifest_name).exists():
+            with open(self.output_dir / manifest_name) as file:
+                self.frames = json.load(file)["frames"]
+        if self.journal_path is not None and self.journal_path.exists():
+            if append:
+                self.frames.extend(read_journal(self.journal_path))
+            else:
+                self.journal_path.unlink()
+
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=max(1, max_pending))
+        self._lock = threading.Lock()
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self._threads = [threading.Thread(target=self._work, name=f"image-writer-{k}", daemon=True)
+                         for k in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def _work(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            path, image, record, arrays = item
+            try:
+                if self._error is None:
+                    start = time.perf_counter()
+                    # the arrays are written before the image, so that a completed image implies complete arrays
+                    array_paths = []
+                    for name, array in arrays.items():
+                        array_path = self.output_dir / self.array_pattern.format(name=name, index=record["index"])
+                        np.savez_compressed(array_path, **{name: array})
+                        if self.fsync:
+                            fsync_file(array_path)
+                        record[f"{name}_file"] = array_path.name
+                        array_paths.append(array_path)
+                    self.encode(image, str(path))
+                    if self.fsync:
+                        fsync_file(path)
+                    record["bytes"] = path.stat().st_size
+                    if self.on_encoded is not None:
+                        self.on_encoded("encode", time.perf_counter() - start)
+                    with self._lock:
+                        # journaled before the frame is reported as written, a completed frame keeps its record
+                        if self.journal_path is not None:
+                            with open(self.journal_path, "a") as file:
+                                file.write(json.dumps(record) + "\n")
+                                file.flush()
+                                if self.fsync:
+                                    os.fsync(file.fileno())
+                        self.frames.append(record)
+                    if self.on_written is not None:
+                        self.on_written([record["index"]], path, array_paths)
+            except BaseException as ex:
+                with self._lock:
+                    if self._error is None:
+                        self._error = ex
+            finally:
+                self._queue.task_done()
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            raise RuntimeError("Encoding a frame failed.") from self._error
+
+    def submit(self, index: int, image: NDArray, arrays: Optional[Dict[str, NDArray]] = None, **metadata) -> Path:
+        """
+        queues the frame of the dataset index for encoding, blocks while the queue is full
+        :param arrays: further per-frame arrays (depth, normals, ...), each is written losslessly to its own npz file
+        """
+        assert not self._closed, "The writer has already been closed."
+        self._raise_error()
+        path = self.output_dir / self.file_pattern.format(index=index)
+        self._queue.put((path, image, {"index": index, "file": path.name, **metadata}, arrays or {}))
+        return path
+
+    def flush(self) -> None:
+        """waits until all submitted frames are written"""
+        self._queue.join()
+        self._raise_error()
+
+    def close(self) -> None:
+        """writes all pending frames, stops the worker threads and writes the manifest"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.join()
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._raise_error()
+        if self.manifest_name:
+            # the latest record of an index wins
+            frames = {record["index"]: record for record in self.frames}
+            self.frames = [frames[index] for index in sorted(frames)]
+            write_json_atomic(self.output_dir / self.manifest_name, {"frames": self.frames})
+            if self.journal_path.exists():
+                self.journal_path.unlink()
+
+    def __enter__(self) -> "AsyncImageWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            # keep the original exception, but do not leave the worker threads behind
+            try:
+                self.close()
+            except Exception:
+                pass
@@ -0,0 +1,134 @@
+import importlib.util
+import json
+import tempfile
+import threading
+import unittest
+import numpy as np
+
+from pathlib import Path
+
+from .ImageWriter import AsyncImageWriter, check_encodable
+
+
+def write_npy(image, path):
+    with open(path, "wb") as file:
+        np.save(file, image)
+
+
+class AsyncImageWriterTest(unittest.TestCase):
+
+    def test_writes_frames_and_manifest(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            images = [np.full((4, 4, 3), i, dtype=np.uint8) for i in range(10)]
+            with AsyncImageWriter(tmp_dir, encode=write_npy, file_pattern="image{index}.npy", max_pending=2) as writer:
+                for i, image in reversed(list(enumerate(images))):
+                    writer.submit(i, image, light_energy=float(i))
+
+            with open(Path(tmp_dir) / "manifest.json") as file:
+                frames = json.load(file)["frames"]
+            self.assertEqual([frame["index"] for frame in frames], list(range(10)))
+            self.assertEqual(frames[3]["light_energy"], 3.0)
+            for i, image in enumerate(images):
+                np.testing.assert_array_equal(np.load(Path(tmp_dir) / f"image{i}.npy"), image)
+
+    def test_arrays_are_written_next_to_the_frame(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            depth = np.linspace(0, 70000, 16, dtype=np.float32).reshape(4, 4)
+            written = []
+            with AsyncImageWriter(tmp_dir, encode=write_npy, file_pattern="image{index}.npy",
+                                  on_written=lambda *args: written.append(args)) as writer:
+                writer.submit(5, np.zeros((4, 4, 3), dtype=np.uint8), arrays={"depth": depth})
+
+            self.assertEqual(written, [([5], Path(tmp_dir) / "image5.npy", [Path(tmp_dir) / "depth5.npz"])])
+
+            with open(Path(tmp_dir) / "manifest.json") as file:
+                frame = json.load(file)["frames"][0]
+            self.assertEqual(frame["depth_file"], "depth5.npz")
+            with np.load(Path(tmp_dir) / "depth5.npz") as arrays:
+                np.testing.assert_array_equal(arrays["depth"], depth)
+
+    def test_encoding_times_are_reported(self):
+        times = []
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with AsyncImageWriter(tmp_dir, encode=write_npy, file_pattern="image{index}.npy",
+                                  on_encoded=lambda stage, wall_s: times.append((stage, wall_s))) as writer:
+                for i in range(3):
+                    writer.submit(i, np.zeros(1))
+        self.assertEqual([stage for stage, _ in times], ["encode"] * 3)
+        self.assertTrue(all(wall_s >= 0 for _, wall_s in times))
+
+    def test_frames_of_an_interrupted_run_are_restored(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            written = []
+            writer = AsyncImageWriter(tmp_dir, encode=write_npy, file_pattern="image{index}.npy",
+                                      on_written=lambda indices, path, array_paths: written.extend(indices))
+            writer.submit(0, np.zeros(1), light_energy=0.0)
+            writer.submit(1, np.zeros(1), light_energy=1.0)
+            # the process is killed before close() writes the manifest
+            writer.flush()
+            self.assertEqual(sorted(written), [0, 1])
+            self.assertFalse((Path(tmp_dir) / "manifest.json").exists())
+
+            with AsyncImageWriter(tmp_dir, encode=write_npy, file_pattern="image{index}.npy", append=True) as writer:
+                writer.submit(2, np.zeros(1), light_energy=2.0)
+
+            with open(Path(tmp_dir) / "manifest.json") as file:
+                frames = json.load(file)["frames"]
+            self.assertEqual([frame["light_energy"] for frame in frames], [0.0, 1.0, 2.0])
+            self.assertFalse(writer.journal_path.exists())
+
+    def test_new_run_discards_the_journal(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            writer = AsyncImageWriter(tmp_dir, encode=write_npy, file_pattern="image{index}.npy")
+            writer.submit(0, np.zeros(1))
+            writer.flush()
+
+            with AsyncImageWriter(tmp_dir, encode=write_npy, file_pattern="image{index}.npy") as writer:
+                writer.submit(1, np.zeros(1))
+
+            with open(Path(tmp_dir) / "manifest.json") as file:
+                self.assertEqual([frame["index"] for frame in json.load(file)["frames"]], [1])
+
+    @unittest.skipIf(importlib.util.find_spec("imageio") is not None, "imageio writes every format")
+    def test_unsupported_format_fails_on_construction(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            if importlib.util.find_spec("PIL") is not None:
+                check_encodable(".png")
+            with self.assertRaises(ImportError):
+                AsyncImageWriter(tmp_dir, file_pattern="image{index}.exr")
+
+    def test_back_pressure(self):
+        release = threading.Event()
+        encoded = []
+
+        def blocked_encode(image, path):
+            release.wait()
+            encoded.append(path)
+            write_npy(image, path)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            writer = AsyncImageWriter(tmp_dir, encode=blocked_encode, max_pending=1, workers=1, fsync=False)
+            writer.submit(0, np.zeros(1))  # taken by the worker
+            writer.submit(1, np.zeros(1))  # fills the queue
+            submitter = threading.Thread(target=writer.submit, args=(2, np.zeros(1)))
+            submitter.start()
+            submitter.join(timeout=0.2)
+            self.assertTrue(submitter.is_alive())
+            release.set()
+            submitter.join()
+            writer.close()
+            self.assertEqual(len(encoded), 3)
+
+    def test_encoding_error_is_raised(self):
+        def failing_encode(image, path):
+            raise ValueError("broken")
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            writer = AsyncImageWriter(tmp_dir, encode=failing_encode)
+            writer.submit(0, np.zeros(1))
+            with self.assertRaises(RuntimeError):
+                writer.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
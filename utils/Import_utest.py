@@ -0,0 +1,47 @@
+import json
+import subprocess
+import sys
+import unittest
+
+from pathlib import Path
+
+PACKAGE_DIR = Path(__file__).parent
+# the only module which may import Blender
+BLENDER_ADAPTER = "BlenderScene"
+# modules which must neither be imported by the core nor by its optional features before they are used
+HEAVY_MODULES = ("bpy", "blenderproc", "mathutils", "h5py", "imageio", "PIL", "yaml")
+# import time of all core modules on top of numpy, the best of IMPORT_RUNS fresh interpreters, so that a busy machine
+# does not fail the test
+IMPORT_BUDGET_S = 0.3
+IMPORT_RUNS = 5
+
+IMPORT_SCRIPT = """
+import importlib, json, sys, time
+start = time.perf_counter()
+import numpy
+numpy_end = time.perf_counter()
+for module in sys.argv[2:]:
+    importlib.import_module(f"{sys.argv[1]}.{module}")
+end = time.perf_counter()
+print(json.dumps({"numpy_s": numpy_end - start, "core_s": end - numpy_end, "modules": sorted(sys.modules)}))
+"""
+
+
+class ImportTest(unittest.TestCase):
+
+    def test_core_imports_fast_without_blender(self):
+        core = sorted(path.stem for path in PACKAGE_DIR.glob("*.py")
+                      if not path.stem.endswith("_utest") and path.stem not in ("__init__", BLENDER_ADAPTER))
+        measurements = []
+        for _ in range(IMPORT_RUNS):
+            # a fresh interpreter, so that nothing is imported yet
+            result = subprocess.run([sys.executable, "-c", IMPORT_SCRIPT, __package__, *core], cwd=PACKAGE_DIR.parent,
+                                    capture_output=True, text=True, check=True)
+            measurements.append(json.loads(result.stdout))
+        heavy = [module for module in measurements[0]["modules"] if module.split(".")[0] in HEAVY_MODULES]
+        self.assertEqual(heavy, [])
+        self.assertLess(min(measurement["core_s"] for measurement in measurements), IMPORT_BUDGET_S)
+
+
+if __name__ == '__main__':
+    unittest.main()
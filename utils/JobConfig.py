@@ -0,0 +1,218 @@
+import itertools
+import json
+import math
+
+from dataclasses import dataclass, asdict, fields, replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from .RunManifest import config_hash
+from .ImageWriter import write_json_atomic
+from .RenderPresets import get_preset
+from .PosePlanner import STRATEGIES, POSE_BLOCK_SIZE, POSE_SEQUENCE_VERSION
+from .Colors import parse_color, parse_palette
+
+# fields of a job which do not change the rendered frames and are therefore not part of the config hash
+EXECUTION_FIELDS = ("output_dir",)
+# job of the frames in an output directory
+JOB_FILE = "job.json"
+# render outputs of a frame, the colors are always rendered
+OUTPUTS = ("colors", "depth", "normals", "segmentation")
+
+
+def _as_tuple(value: Any) -> Any:
+    """the (nested) lists of the value as tuples"""
+    if isinstance(value, (list, tuple)):
+        return tuple(_as_tuple(el) for el in value)
+    return value
+
+
+def with_colors(outputs: Sequence[str]) -> Tuple[str, ...]:
+    """the outputs led by the colors, which are always stored, e.g. for the outputs given on the command line"""
+    return ("colors", *(output for output in outputs if output != "colors"))
+
+
+@dataclass(frozen=True)
+class JobSpec:
+    """Everything which determines the frames of one generated dataset"""
+    obj: Optional[str] = None  # .obj file, the MONKEY primitive if not given
+    texture: Optional[str] = None  # texture file or directory of textures, one is drawn per frame
+    output_dir: str = "output"
+    n_images: int = 4
+    seed: int = 0
+    max_theta: float = math.pi  # polar angles are drawn from [0, max_theta] (rad)
+    max_phi: float = math.pi  # azimuth angles are drawn from [0, max_phi] (rad)
+    distance_object_camera: Tuple[float, float] = (35, 60)  # milli meter
+    distance_light_camera: Tuple[float, float] = (1, 50)  # milli meter
+    light_energy: Tuple[float, float] = (500, 1000)
+    # probability of an AREA light, drawn from the seed if not given
+    light_percentage: Optional[float] = None
+    background_color: Union[str, Tuple[int, int, int]] = (255, 255, 255)
+    # colors ("#RRGGBB", "R,G,B", names or (R, G, B)) of which one is drawn per frame for the background and the
+    # light; the background_color and white lights if not given
+    background_palette: Optional[Tuple[Union[str, Tuple[int, int, int]], ...]] = None
+    light_palette: Optional[Tuple[Union[str, Tuple[int, int, int]], ...]] = None
+    object_position: Tuple[float, float, float] = (0.0, 0.0, 0.0)
+    # view planning: "random", "fibonacci" or "farthest" views, rejecting views where the object's bounding box
+    # covers less than min_coverage of the image or is less than min_onscreen inside the image
+    pose_strategy: str = "random"
+    min_coverage: float = 0.0
+    min_onscreen: float = 0.0
+    # longer side of the prepared textures in pixels, None: twice the render resolution, 0: the source textures
+    texture_size: Optional[int] = None
+    preset: Optional[str] = None
+    dataset_format: str = "png"
+    frames_per_shard: int = 256
+    # uncompressed npz shards are memory-mapped by the DatasetReader instead of being decompressed as a whole
+    shard_compression: bool = True
+    # render outputs stored per frame and the dtype ("float32" or "float16") of the depth and normals
+    outputs: Tuple[str, ...] = ("colors",)
+    float_dtype: str = "float32"
+    # clutter: clutter_counts[p] instances of the .obj file clutter_parts[p] placed without overlaps around the object
+    # within object_position +- clutter_extent, the mesh of every part is loaded once and shared by its instances
+    clutter_parts: Tuple[str, ...] = ()
+    clutter_counts: Tuple[int, ...] = ()
+    clutter_extent: Tuple[float, float, float] = (10.0, 10.0, 0.0)
+
+    def __post_init__(self) -> None:
+        # lists from json/yaml/toml are stored as tuples, so that jobs stay hashable
+        for field in fields(self):
+            object.__setattr__(self, field.name, _as_tuple(getattr(self, field.name)))
+        self.validate()
+
+    def validate(self) -> None:
+        """raises a ValueError for inconsistent settings"""
+        if self.n_images < 0:
+            raise ValueError(f"n_images must not be negative but was {self.n_images}.")
+        if not 0 <= self.max_theta <= math.pi:
+            raise ValueError(f"max_theta must be in [0, pi] but was {self.max_theta}.")
+        if not 0 <= self.max_phi <= 2 * math.pi:
+            raise ValueError(f"max_phi must be in [0, 2 pi] but was {self.max_phi}.")
+        for name in ("distance_object_camera", "distance_light_camera", "light_energy"):
+            value = getattr(self, name)
+            if len(value) != 2 or min(value) < 0:
+                raise ValueError(f"{name} must be a non-negative (min, max) range but was {value}.")
+        if self.light_percentage is not None and not 0 <= self.light_percentage <= 1:
+            raise ValueError(f"light_percentage must be in [0, 1] but was {self.light_percentage}.")
+        parse_color(self.background_color)
+        for name in ("background_palette", "light_palette"):
+            if getattr(self, name) is not None:
+                parse_palette(getattr(self, name))
+        if len(self.object_position) != 3:
+            raise ValueError(f"object_position must be (x, y, z) but was {self.object_position}.")
+        if self.pose_strategy not in STRATEGIES:
+            raise ValueError(f"pose_strategy must be one of {', '.join(STRATEGIES)} but was {self.pose_strategy}.")
+        for name in ("min_coverage", "min_onscreen"):
+            if not 0 <= getattr(self, name) <= 1:
+                raise ValueError(f"{name} must be in [0, 1] but was {getattr(self, name)}.")
+        if self.texture_size is not None and self.texture_size < 0:
+            raise ValueError(f"texture_size must not be negative but was {self.texture_size}.")
+        if self.dataset_format not in ("png", "hdf5", "npz"):
+            raise ValueError(f"dataset_format must be png, hdf5 or npz but was {self.dataset_format}.")
+        if self.preset is not None:
+            get_preset(self.preset)
+        if self.frames_per_shard <= 0:
+            raise ValueError(f"frames_per_shard must be positive but was {self.frames_per_shard}.")
+        if "colors" not in self.outputs or not set(self.outputs) <= set(OUTPUTS):
+            raise ValueError(f"outputs must include colors and be some of {', '.join(OUTPUTS)} but were "
+                             f"{self.outputs}.")
+        if self.float_dtype not in ("float32", "float16"):
+            raise ValueError(f"float_dtype must be float32 or float16 but was {self.float_dtype}.")
+        if len(self.clutter_parts) != len(self.clutter_counts) or min(self.clutter_counts, default=0) < 0:
+            raise ValueError(f"clutter_counts must be one non-negative count per part of clutter_parts but was "
+                             f"{self.clutter_counts}.")
+        if len(self.clutter_extent) != 3 or min(self.clutter_extent) < 0:
+            raise ValueError(f"clutter_extent must be a non-negative (x, y, z) extent but was {self.clutter_extent}.")
+
+    @classmethod
+    def from_dict(cls, values: Dict[str, Any]) -> "JobSpec":
+        unknown = set(values) - {field.name for field in fields(cls)}
+        if unknown:
+            raise ValueError(f"Unknown job settings: {', '.join(sorted(unknown))}.")
+        return cls(**values)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return json.loads(json.dumps(asdict(self)))
+
+    def generation_config(self) -> Dict[str, Any]:
+        """the settings which determine the frames, including the settings of the render preset"""
+        config = {key: value for key, value in self.to_dict().items() if key not in EXECUTION_FIELDS}
+        if self.preset is not None:
+            config["preset"] = get_preset(self.preset).to_dict()
+        # the poses of a seed differ between versions, a run of another version cannot be resumed or extended
+        config["pose_sequence"] = {"version": POSE_SEQUENCE_VERSION, "block_size": POSE_BLOCK_SIZE}
+        return json.loads(json.dumps(config))
+
+    def config_hash(self) -> str:
+        return config_hash(self.generation_config())
+
+    def replace(self, **changes: Any) -> "JobSpec":
+        return replace(self, **changes)
+
+
+def load_config(path: Union[str, Path]) -> Dict[str, Any]:
+    """reads a .json, .toml or .yaml/.yml configuration file"""
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == ".json":
+        with open(path) as file:
+            return json.load(file)
+    if suffix == ".toml":
+        import tomllib
+        with open(path, "rb") as file:
+            return tomllib.load(file)
+    if suffix in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError as ex:
+            raise ImportError("Reading YAML configurations requires 'pyyaml' to be installed.") from ex
+        with open(path) as file:
+            return yaml.safe_load(file)
+    raise ValueError(f"Unsupported configuration format '{suffix}', use .json, .toml or .yaml.")
+
+
+def expand_jobs(config: Dict[str, Any]) -> List[JobSpec]:
+    """
+    expands a configuration into its jobs:
+        defaults: settings shared by all jobs
+        sweep: settings with a list of values each; one job is created per combination of values
+        output_dir: directory template, formatted with the job settings, {index} (job number), {obj_stem} and
+        {texture_stem}
+    """
+    unknown = set(config) - {"defaults", "sweep", "output_dir"}
+    if unknown:
+        raise ValueError(f"Unknown configuration sections: {', '.join(sorted(unknown))}.")
+    defaults = dict(config.get("defaults") or {})
+    sweep = dict(config.get("sweep") or {})
+    output_dir = config.get("output_dir", defaults.pop("output_dir", "output/job{index}"))
+    for key, values in sweep.items():
+        if not isinstance(values, list) or not values:
+            raise ValueError(f"The sweep values of '{key}' must be a non-empty list.")
+
+    jobs = []
+    for index, combination in enumerate(itertools.product(*sweep.values())):
+        values = {**defaults, **dict(zip(sweep, combination))}
+        names = {
+            "index": index,
+            "obj_stem": Path(values["obj"]).stem if values.get("obj") else "monkey",
+            "texture_stem": Path(values["texture"]).stem if values.get("texture") else "none",
+        }
+        values["output_dir"] = str(output_dir).format(**{**values, **names})
+        jobs.append(JobSpec.from_dict(values))
+
+    directories = [job.output_dir for job in jobs]
+    if len(set(directories)) != len(directories):
+        raise ValueError("The jobs of the sweep must write to different output directories, "
+                         "use e.g. {index} in the output_dir template.")
+    return jobs
+
+
+def write_job(job: JobSpec, path: Union[str, Path]) -> None:
+    """stores the job together with its config hash"""
+    write_json_atomic(path, {"config_hash": job.config_hash(), "job": job.to_dict()})
+
+
+def read_job(path: Union[str, Path]) -> JobSpec:
+    with open(path) as file:
+        content = json.load(file)
+    return JobSpec.from_dict(content["job"] if "job" in content else content)
@@ -0,0 +1,92 @@
+import json
+import tempfile
+import unittest
+
+from pathlib import Path
+
+from .JobConfig import JobSpec, load_config, expand_jobs, write_job, read_job, with_colors
+from .PosePlanner import POSE_BLOCK_SIZE, POSE_SEQUENCE_VERSION
+
+
+class JobConfigTest(unittest.TestCase):
+    config = {
+        "defaults": {"n_images": 8, "seed": 1, "texture": "textures/wood.jpg"},
+        "sweep": {
+            "obj": ["objects/cube.obj", "objects/cone.obj"],
+            "distance_object_camera": [[35, 60], [60, 90]],
+        },
+        "output_dir": "out/{obj_stem}_{index}",
+    }
+
+    def test_sweep_expands_to_all_combinations(self):
+        jobs = expand_jobs(self.config)
+        self.assertEqual(len(jobs), 4)
+        self.assertEqual({(job.obj, job.distance_object_camera) for job in jobs},
+                         {(obj, (near, far)) for obj in ("objects/cube.obj", "objects/cone.obj")
+                          for near, far in ((35, 60), (60, 90))})
+        self.assertEqual(jobs[0].output_dir, "out/cube_0")
+        self.assertEqual(jobs[3].output_dir, "out/cone_3")
+        self.assertTrue(all(job.n_images == 8 and job.seed == 1 for job in jobs))
+
+    def test_config_without_sweep_is_one_job(self):
+        jobs = expand_jobs({"defaults": {"n_images": 2, "output_dir": "out"}})
+        self.assertEqual(jobs, [JobSpec(n_images=2, output_dir="out")])
+
+    def test_duplicate_output_dirs_are_rejected(self):
+        with self.assertRaises(ValueError):
+            expand_jobs({**self.config, "output_dir": "out/{obj_stem}"})
+
+    def test_invalid_settings_are_rejected(self):
+        with self.assertRaises(ValueError):
+            expand_jobs({"defaults": {"n_image": 8}})
+        with self.assertRaises(ValueError):
+            JobSpec(max_theta=4)
+        with self.assertRaises(ValueError):
+            JobSpec(light_energy=(500,))
+        with self.assertRaises(ValueError):
+            JobSpec(preset="ultra")
+        with self.assertRaises(ValueError):
+            JobSpec(outputs=("depth",))
+        with self.assertRaises(ValueError):
+            JobSpec(float_dtype="float64")
+        with self.assertRaises(ValueError):
+            JobSpec(clutter_parts=("bolt.obj", "nut.obj"), clutter_counts=(3,))
+
+    def test_config_hash_ignores_output_dir(self):
+        job = JobSpec(obj="cube.obj", n_images=8)
+        self.assertEqual(job.config_hash(), job.replace(output_dir="elsewhere").config_hash())
+        self.assertNotEqual(job.config_hash(), job.replace(seed=2).config_hash())
+
+    def test_config_hash_includes_preset_settings(self):
+        config = JobSpec(preset="preview").generation_config()
+        self.assertEqual(config["preset"]["max_samples"], 16)
+
+    def test_config_hash_includes_pose_sequence_version(self):
+        config = JobSpec().generation_config()
+        self.assertEqual(config["pose_sequence"], {"version": POSE_SEQUENCE_VERSION, "block_size": POSE_BLOCK_SIZE})
+
+    def test_outputs_include_colors(self):
+        self.assertEqual(with_colors(["depth", "normals"]), ("colors", "depth", "normals"))
+        self.assertEqual(with_colors(["depth", "colors"]), ("colors", "depth"))
+        JobSpec(outputs=with_colors(["depth"]))
+        with self.assertRaises(ValueError):
+            JobSpec(outputs=("depth",))
+
+    def test_job_file_roundtrip(self):
+        job = expand_jobs(self.config)[1]
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / "job.json"
+            write_job(job, path)
+            self.assertEqual(read_job(path), job)
+            with open(path) as file:
+                self.assertEqual(json.load(file)["config_hash"], job.config_hash())
+
+    def test_load_json_config(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / "sweep.json"
+            path.write_text(json.dumps(self.config))
+            self.assertEqual(expand_jobs(load_config(path)), expand_jobs(self.config))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,241 @@
+import numpy as np
+
+from typing import NamedTuple, Optional, Sequence, Tuple
+from numpy.typing import NDArray
+
+from .PoseSampler import PoseTable, spherical_to_cartesian, look_at_matrices, poses_from_views, sample_poses
+
+STRATEGIES = ("random", "fibonacci", "farthest")
+# frames per block of a pose sequence
+POSE_BLOCK_SIZE = 1024
+# to be increased whenever the poses drawn from a seed change, part of the configuration of a run
+POSE_SEQUENCE_VERSION = 2
+GOLDEN_RATIO = (1 + 5 ** 0.5) / 2
+# field of view of the default Blender camera: 50 mm lens on a 36 mm sensor
+BLENDER_DEFAULT_FOV = 2 * np.arctan(18 / 50)
+
+
+class CameraIntrinsics(NamedTuple):
+    """pinhole camera: 3x3 matrix K in the OpenCV convention (x right, y down, looking along +Z) and image size"""
+    K: NDArray[np.float64]
+    width: int
+    height: int
+
+    @classmethod
+    def from_fov(cls, fov: float = BLENDER_DEFAULT_FOV, width: int = 512, height: int = 512) -> "CameraIntrinsics":
+        """camera with the field of view fov (rad) along the larger image dimension, as Blender fits the sensor"""
+        focal = max(width, height) / 2 / np.tan(fov / 2)
+        K = np.array([[focal, 0.0, width / 2], [0.0, focal, height / 2], [0.0, 0.0, 1.0]])
+        return cls(K, width, height)
+
+
+def bounding_box_corners(minimum: NDArray, maximum: NDArray) -> NDArray[np.float64]:
+    """the (8, 3) corners of the axis-aligned box [minimum, maximum]"""
+    minimum = np.asarray(minimum, dtype=np.float64)
+    maximum = np.asarray(maximum, dtype=np.float64)
+    selection = np.array([[(k >> axis) & 1 for axis in range(3)] for k in range(8)], dtype=bool)
+    return np.where(selection, maximum, minimum)
+
+
+def project_points(
+        points: NDArray[np.float64],
+        camera_matrices: NDArray[np.float64],
+        intrinsics: CameraIntrinsics
+) -> Tuple[NDArray[np.float64], NDArray[np.float64]]:
+    """
+    projects the (M, 3) world points into the images of the (N, 4, 4) Blender camera to world matrices
+    :return: (N, M, 2) pixel coordinates and (N, M) depths, points behind the camera have a negative depth
+    """
+    points = np.asarray(points, dtype=np.float64)
+    world_to_camera = np.linalg.inv(camera_matrices)
+    camera_points = np.einsum("nij,mj->nmi", world_to_camera[:, :3, :3], points) + world_to_camera[:, None, :3, 3]
+    # Blender cameras look along -Z with Y up, K expects cameras looking along +Z with Y down
+    depth = -camera_points[..., 2]
+    safe_depth = np.where(np.abs(depth) > 1e-12, depth, 1e-12)
+    x = camera_points[..., 0] / safe_depth
+    y = -camera_points[..., 1] / safe_depth
+    K = intrinsics.K
+    pixels = np.stack((K[0, 0] * x + K[0, 1] * y + K[0, 2], K[1, 1] * y + K[1, 2]), axis=-1)
+    return pixels, depth
+
+
+def view_metrics(
+        points: NDArray[np.float64],
+        camera_matrices: NDArray[np.float64],
+        intrinsics: CameraIntrinsics
+) -> Tuple[NDArray[np.float64], NDArray[np.float64]]:
+    """
+    cheap visibility measures of an object given by points (e.g. its bounding box corners) from N cameras, computed
+    from the image rectangle bounding the projected points instead of a render
+    :return: coverage, the fraction of the image covered by the rectangle, and onscreen, the fraction of the rectangle
+    inside the image (1: the object is not clipped by the image border); both are 0 if a point is behind the camera
+    """
+    pixels, depth = project_points(points, camera_matrices, intrinsics)
+    low = pixels.min(axis=1)
+    high = pixels.max(axis=1)
+    size = np.array([intrinsics.width, intrinsics.height], dtype=np.float64)
+    full_area = np.prod(high - low, axis=-1)
+    clipped_area = np.prod(np.clip(np.minimum(high, size) - np.maximum(low, 0.0), 0.0, None), axis=-1)
+    in_front = np.all(depth > 0, axis=1)
+    coverage = np.where(in_front, clipped_area / np.prod(size), 0.0)
+    onscreen = np.where(in_front & (full_area > 0), clipped_area / np.where(full_area > 0, full_area, 1.0), 0.0)
+    return coverage, onscreen
+
+
+def fibonacci_directions(
+        n: int,
+        max_theta: float = np.pi,
+        max_phi: float = 2 * np.pi,
+        offset: float = 0.0
+) -> Tuple[NDArray[np.float64], NDArray[np.float64]]:
+    """
+    polar and azimuth angles of n directions spread evenly over the part theta in [0, max_theta], phi in [0, max_phi]
+    of the unit sphere: cos(theta) is evenly spaced, so that every direction covers the same solid angle, and phi
+    advances by the golden ratio; offset in [0, 1) rotates the lattice in phi
+    """
+    k = np.arange(n)
+    cos_theta = 1 - (k + 0.5) / n * (1 - np.cos(max_theta))
+    phi = np.mod(k / GOLDEN_RATIO + offset, 1.0) * max_phi
+    return np.arccos(cos_theta), phi
+
+
+def farthest_point_selection(directions: NDArray[np.float64], n: int, first: int = 0) -> NDArray[np.int64]:
+    """greedy selection of n of the (M, 3) unit directions, each one at the largest angle to the selected ones"""
+    assert n <= len(directions), f"Cannot select {n} of {len(directions)} directions."
+    selected = np.empty(n, dtype=np.int64)
+    selected[0] = first
+    # 1 - cos of the angle to the nearest selected direction
+    distance = 1 - directions @ directions[first]
+    for k in range(1, n):
+        selected[k] = np.argmax(distance)
+        distance = np.minimum(distance, 1 - directions @ directions[selected[k]])
+    return selected
+
+
+def plan_poses(
+        n: int,
+        rng: Optional[np.random.Generator] = None,
+        object_points: Optional[NDArray[np.float64]] = None,
+        intrinsics: Optional[CameraIntrinsics] = None,
+        strategy: str = "random",
+        min_coverage: float = 0.0,
+        min_onscreen: float = 0.0,
+        oversampling: int = 4,
+        max_rounds: int = 16,
+        distance_object_camera: Tuple[float, float] = (35, 60),
+        max_theta: float = np.pi,
+        max_phi: float = np.pi,
+        distance_light_camera: Tuple[float, float] = (1, 50),
+        light_energy: Tuple[float, float] = (500, 1000),
+        area_light_probability: float = 0.0,
+        object_position: Tuple[float, float, float] = (0.0, 0.0, 0.0)
+) -> PoseTable:
+    """
+    plans the camera and light configuration of n frames like sample_poses, but rejects views in which the object
+    covers less than min_coverage of the image or less than min_onscreen of it is inside the image, before anything
+    is rendered
+    :param object_points: (M, 3) points of the object, e.g. its bounding box corners, required by the thresholds
+    :param intrinsics: camera intrinsics, required by the thresholds
+    :param strategy: "random": views drawn like sample_poses; "fibonacci": one view per direction of a Fibonacci
+    lattice, rejected views are redrawn at another distance; "farthest": farthest point selection of n views from
+    oversampling * n accepted random views
+    :param max_rounds: number of redraws before a ValueError reports that the thresholds cannot be met
+    :return: PoseTable with one row per frame, the poses of sample_poses for the random strategy without thresholds
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown pose strategy '{strategy}', available strategies: {', '.join(STRATEGIES)}.")
+    filtered = min_coverage > 0 or min_onscreen > 0
+    if strategy == "random" and not filtered:
+        # nothing to plan: the frames are identical to the ones of datasets generated without planning
+        return sample_poses(n, rng, distance_object_camera, max_theta, max_phi, distance_light_camera, light_energy,
+                            area_light_probability, object_position)
+    if filtered and (object_points is None or intrinsics is None):
+        raise ValueError("Rejecting views by coverage requires the object points and the camera intrinsics.")
+    assert (0 <= area_light_probability <= 1), "The area light probability must be between 0 and 1."
+    rng = np.random.default_rng(0) if rng is None else rng
+    object_position = np.asarray(object_position, dtype=np.float64)
+    min_distance, max_distance = min(distance_object_camera), max(distance_object_camera)
+
+    def accepted(relative_positions: NDArray[np.float64]) -> NDArray[np.bool_]:
+        if not filtered:
+            return np.ones(len(relative_positions), dtype=bool)
+        camera_matrices = look_at_matrices(relative_positions + object_position, object_position)
+        coverage, onscreen = view_metrics(object_points, camera_matrices, intrinsics)
+        return (coverage >= min_coverage) & (onscreen >= min_onscreen)
+
+    if strategy == "fibonacci":
+        theta, phi = fibonacci_directions(n, max_theta, max_phi, offset=rng.random())
+        directions = spherical_to_cartesian(theta, phi, np.ones(n))
+        distances = np.empty(n)
+        pending = np.arange(n)
+        for _ in range(max_rounds):
+            if not len(pending):
+                break
+            draws = rng.uniform(min_distance, max_distance, len(pending))
+            ok = accepted(directions[pending] * draws[:, None])
+            distances[pending[ok]] = draws[ok]
+            pending = pending[~ok]
+        if len(pending):
+            raise ValueError(f"No distance of {len(pending)} of the {n} view directions meets the coverage "
+                             f"thresholds, lower them or change distance_object_camera.")
+        relative_positions = directions * distances[:, None]
+    else:
+        n_candidates = n if strategy == "random" else oversampling * n
+        candidates = []
+        n_accepted = 0
+        for _ in range(max_rounds):
+            if n_accepted >= n_candidates:
+                break
+            draws = rng.uniform(min_distance, max_distance, n_candidates)
+            theta = rng.uniform(0, max_theta, n_candidates)
+            phi = rng.uniform(0, max_phi, n_candidates)
+            relative = spherical_to_cartesian(theta, phi, draws)
+            relative = relative[accepted(relative)]
+            candidates.append(relative)
+            n_accepted += len(relative)
+        candidates = np.concatenate(candidates)[:n_candidates] if candidates else np.empty((0, 3))
+        if len(candidates) < n:
+            raise ValueError(f"Only {len(candidates)} of the {n} views meet the coverage thresholds, lower them or "
+                             f"change distance_object_camera.")
+        if strategy == "farthest" and n > 0:
+            unit = candidates / np.linalg.norm(candidates, axis=-1, keepdims=True)
+            candidates = candidates[farthest_point_selection(unit, n)]
+        relative_positions = candidates[:n]
+
+    dist_light_cam = rng.uniform(min(distance_light_camera), max(distance_light_camera), n)
+    energies = rng.uniform(min(light_energy), max(light_energy), n)
+    circle_angle = rng.uniform(0, 2 * np.pi, n)
+    area_lights = rng.random(n) < area_light_probability
+    return poses_from_views(relative_positions, dist_light_cam, energies, circle_angle, area_lights,
+                            tuple(object_position))
+
+
+def plan_pose_sequence(
+        indices: Sequence[int],
+        n: int,
+        seed: int,
+        block_size: int = POSE_BLOCK_SIZE,
+        strategy: str = "random",
+        **kwargs
+) -> PoseTable:
+    """
+    poses of the dataset indices of a dataset of n frames. The random strategy plans the poses in blocks of block_size
+    frames, each with a generator seeded by (seed, block), so that the pose of an index does not depend on n: a
+    dataset can be extended by further indices and gets the poses a single larger run would have produced, and only
+    the blocks of the indices are planned. The spread strategies arrange all n views together and are planned as a
+    whole from a generator seeded by seed.
+    :param kwargs: settings of plan_poses
+    """
+    indices = np.asarray(indices, dtype=np.int64)
+    if len(indices) and (indices.min() < 0 or indices.max() >= n):
+        raise ValueError(f"The indices must be within [0, {n}).")
+    if strategy != "random":
+        return plan_poses(n, np.random.default_rng(seed), strategy=strategy, **kwargs).take(indices)
+    blocks = np.unique(indices // block_size)
+    tables = [plan_poses(block_size, np.random.default_rng([seed, int(block)]), strategy=strategy, **kwargs)
+              for block in blocks]
+    if not tables:
+        return plan_poses(0, np.random.default_rng(seed), **kwargs)
+    poses = PoseTable(*(np.concatenate(columns) for columns in zip(*tables)))
+    # position of every index within the planned blocks
+    return poses.take(np.searchsorted(blocks, indices // block_size) * block_size + indices % block_size)
@@ -0,0 +1,110 @@
+import unittest
+import numpy as np
+
+from .PoseSampler import sample_poses, look_at_matrices
+from .PosePlanner import (CameraIntrinsics, bounding_box_corners, project_points, view_metrics, fibonacci_directions,
+                         farthest_point_selection, plan_poses, plan_pose_sequence)
+
+
+class PosePlannerTest(unittest.TestCase):
+    intrinsics = CameraIntrinsics.from_fov(np.pi / 2, 200, 100)
+    # cube with edge length 2 around the origin
+    corners = bounding_box_corners((-1, -1, -1), (1, 1, 1))
+
+    def camera_at(self, *positions) -> np.ndarray:
+        return look_at_matrices(np.array(positions, dtype=np.float64))
+
+    def test_projection(self):
+        # camera on the x axis looking at the origin, the world z axis points up in the image
+        pixels, depth = project_points(np.array([[0.0, 0.0, 0.0], [0.0, 0.0, 1.0]]), self.camera_at((10, 0, 0)),
+                                       self.intrinsics)
+        np.testing.assert_almost_equal(depth[0], [10, 10])
+        np.testing.assert_almost_equal(pixels[0, 0], [100, 50])
+        # focal length 100 px: 1 unit at a depth of 10 is 10 px above the center
+        np.testing.assert_almost_equal(pixels[0, 1], [100, 40])
+
+    def test_view_metrics(self):
+        coverage, onscreen = view_metrics(self.corners, self.camera_at((20, 0, 0), (2, 0, 0), (0.5, 0, 0)),
+                                          self.intrinsics)
+        # far: small and fully visible; near: clipped by the image border; inside the box: rejected
+        self.assertTrue(0 < coverage[0] < 0.1)
+        self.assertAlmostEqual(onscreen[0], 1.0)
+        self.assertLess(onscreen[1], 1.0)
+        self.assertGreater(coverage[1], coverage[0])
+        self.assertEqual((coverage[2], onscreen[2]), (0.0, 0.0))
+
+    def test_fibonacci_directions_cover_sphere_evenly(self):
+        theta, phi = fibonacci_directions(2000, np.pi, 2 * np.pi)
+        # equal solid angles: half of the directions on each hemisphere, a quarter in each azimuth quadrant
+        self.assertEqual(np.sum(theta < np.pi / 2), 1000)
+        counts = np.histogram(phi, bins=4, range=(0, 2 * np.pi))[0]
+        self.assertTrue(np.all(np.abs(counts - 500) <= 2))
+
+    def test_farthest_point_selection(self):
+        directions = np.array([[1, 0, 0], [0.99, 0.141, 0], [-1, 0, 0], [0, 1, 0]], dtype=np.float64)
+        directions /= np.linalg.norm(directions, axis=-1, keepdims=True)
+        np.testing.assert_array_equal(farthest_point_selection(directions, 3), [0, 2, 3])
+
+    def test_random_strategy_without_thresholds_is_sample_poses(self):
+        expected = sample_poses(50, np.random.default_rng(3), area_light_probability=0.5)
+        poses = plan_poses(50, np.random.default_rng(3), area_light_probability=0.5)
+        for el1, el2 in zip(poses, expected):
+            np.testing.assert_array_equal(el1, el2)
+
+    def test_thresholds_are_met(self):
+        for strategy in ("random", "fibonacci", "farthest"):
+            poses = plan_poses(100, np.random.default_rng(1), self.corners, self.intrinsics, strategy=strategy,
+                               min_coverage=0.005, min_onscreen=1.0, distance_object_camera=(2, 40))
+            self.assertEqual(len(poses), 100)
+            coverage, onscreen = view_metrics(self.corners, poses.camera_matrices, self.intrinsics)
+            self.assertTrue(np.all(coverage >= 0.005), strategy)
+            self.assertTrue(np.all(onscreen >= 1.0), strategy)
+
+    def test_spread_strategies_are_deterministic(self):
+        for strategy in ("fibonacci", "farthest"):
+            poses1 = plan_poses(20, np.random.default_rng(5), strategy=strategy)
+            poses2 = plan_poses(20, np.random.default_rng(5), strategy=strategy)
+            for el1, el2 in zip(poses1, poses2):
+                np.testing.assert_array_equal(el1, el2)
+
+    def test_farthest_views_are_spread(self):
+        random_poses = plan_poses(30, np.random.default_rng(2), max_phi=2 * np.pi)
+        farthest_poses = plan_poses(30, np.random.default_rng(2), strategy="farthest", max_phi=2 * np.pi)
+
+        def min_angle(positions):
+            unit = positions / np.linalg.norm(positions, axis=-1, keepdims=True)
+            cos = unit @ unit.T
+            np.fill_diagonal(cos, -1)
+            return np.arccos(cos.max())
+
+        self.assertGreater(min_angle(farthest_poses.camera_positions), min_angle(random_poses.camera_positions))
+
+    def test_pose_sequence_does_not_depend_on_dataset_size(self):
+        small = plan_pose_sequence(range(250), 250, seed=3, block_size=100, area_light_probability=0.5)
+        large = plan_pose_sequence(range(400), 400, seed=3, block_size=100, area_light_probability=0.5)
+        for el1, el2 in zip(small, large.slice(0, 250)):
+            np.testing.assert_array_equal(el1, el2)
+        # a subset of indices, e.g. of one worker, only plans its blocks and gets the same poses
+        subset = plan_pose_sequence([399, 7, 120, 121], 400, seed=3, block_size=100, area_light_probability=0.5)
+        for el1, el2 in zip(subset, large.take([399, 7, 120, 121])):
+            np.testing.assert_array_equal(el1, el2)
+        with self.assertRaises(ValueError):
+            plan_pose_sequence([400], 400, seed=3)
+
+    def test_pose_sequence_with_thresholds(self):
+        poses = plan_pose_sequence(range(150), 150, seed=1, block_size=64, object_points=self.corners,
+                                   intrinsics=self.intrinsics, min_onscreen=1.0, distance_object_camera=(2, 40))
+        self.assertEqual(len(poses), 150)
+        self.assertTrue(np.all(view_metrics(self.corners, poses.camera_matrices, self.intrinsics)[1] >= 1.0))
+
+    def test_unreachable_thresholds(self):
+        with self.assertRaises(ValueError):
+            plan_poses(10, np.random.default_rng(0), self.corners, self.intrinsics, min_coverage=0.9, max_rounds=2)
+        with self.assertRaises(ValueError):
+            plan_poses(10, min_coverage=0.1)
+        with self.assertRaises(ValueError):
+            plan_poses(10, strategy="grid")
+
+
+if __name__ == '__main__':
+    unittest.main()
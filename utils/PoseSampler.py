@@ -0,0 +1,174 @@
+import math
+import random
+import numpy as np
+
+from typing import List, NamedTuple, Tuple, Optional, Sequence, Union
+from numpy.typing import NDArray
+
+
+class PoseTable(NamedTuple):
+    """camera and light configuration of N frames, row i belongs to frame i"""
+    camera_matrices: NDArray[np.float64]  # (N, 4, 4) camera to world transformations
+    camera_positions: NDArray[np.float64]  # (N, 3)
+    light_positions: NDArray[np.float64]  # (N, 3)
+    light_energies: NDArray[np.float64]  # (N,)
+    area_lights: NDArray[np.bool_]  # (N,) True: AREA light, False: POINT light
+
+    def __len__(self) -> int:
+        return len(self.light_energies)
+
+    def slice(self, start: int, end: int) -> "PoseTable":
+        """poses of the frames [start, end)"""
+        return PoseTable(*(el[start:end] for el in self))
+
+    def take(self, indices: Sequence[int]) -> "PoseTable":
+        """poses of the frames at the indices"""
+        indices = np.asarray(indices, dtype=np.int64)
+        return PoseTable(*(el[indices] for el in self))
+
+
+def change_to_spherical(theta: float, phi: float, radius: float) -> Tuple[float, float, float]:
+    """Transform spherical to Cartesian"""
+    camera_x = radius * math.sin(theta) * math.cos(phi)
+    camera_y = radius * math.sin(theta) * math.sin(phi)
+    camera_z = radius * math.cos(theta)
+    return camera_x, camera_y, camera_z
+
+
+def create_perpendicular_vector(
+    v: Union[List[float], Tuple[float, float, float], NDArray[np.float64]]
+) -> Tuple[NDArray[np.float64], NDArray[np.float64]]:
+    """Find two simple vector which perpendicular to v"""
+    x, y, z = v
+    if x == 0 and y == 0:
+        return np.asarray((1, 0, 0)), np.asarray((0, 1, 0))
+    else:
+        perp1 = np.array([-y, x, 0])
+        perp1 = perp1 / np.linalg.norm(perp1)
+        perp2 = np.cross(v, perp1)
+        perp2 = perp2 / np.linalg.norm(perp2)
+        return perp1, perp2
+
+
+def random_point_on_unit_circle() -> Tuple[float, float]:
+    """return the unit(x,y) in circle"""
+    angle = random.uniform(0, 2 * math.pi)
+    return math.cos(angle), math.sin(angle)
+
+
+def spherical_to_cartesian(theta: NDArray, phi: NDArray, radius: NDArray) -> NDArray[np.float64]:
+    """transforms spherical coordinates (polar angle, azimuth angle, radius) to (N, 3) cartesian coordinates"""
+    sin_theta = np.sin(theta)
+    return np.stack((radius * sin_theta * np.cos(phi),
+                     radius * sin_theta * np.sin(phi),
+                     radius * np.cos(theta)), axis=-1)
+
+
+def _normalize(vecs: NDArray[np.float64]) -> NDArray[np.float64]:
+    return vecs / np.linalg.norm(vecs, axis=-1, keepdims=True)
+
+
+def perpendicular_vectors(v: NDArray[np.float64]) -> Tuple[NDArray[np.float64], NDArray[np.float64]]:
+    """
+    two unit vectors perpendicular to each row of v (N, 3), vectorized version of create_perpendicular_vector:
+    (x, y, z) -> (-y, x, 0) and v x perp1, the vectors (1, 0, 0) and (0, 1, 0) if v is parallel to z
+    """
+    on_axis = (v[:, 0] == 0) & (v[:, 1] == 0)
+    perp1 = np.zeros_like(v, dtype=np.float64)
+    perp1[:, 0] = -v[:, 1]
+    perp1[:, 1] = v[:, 0]
+    perp1[on_axis] = (1.0, 0.0, 0.0)
+    perp1 = _normalize(perp1)
+
+    perp2 = np.cross(v, perp1)
+    perp2[on_axis] = (0.0, 1.0, 0.0)
+    return perp1, _normalize(perp2)
+
+
+def look_at_matrices(
+        camera_positions: NDArray[np.float64],
+        target: Tuple[float, float, float] = (0.0, 0.0, 0.0)
+) -> NDArray[np.float64]:
+    """
+    (N, 4, 4) camera to world matrices of cameras looking at the target, vectorized version of look_at in
+    BlenderScene.py: the camera looks along its -Z axis and its Y axis points as close as possible to the world Z axis
+    """
+    n = len(camera_positions)
+    forward = _normalize(np.asarray(target, dtype=np.float64) - camera_positions)
+    right = np.cross(forward, (0.0, 0.0, 1.0))
+    # looking straight up or down: keep the world X axis as right direction
+    parallel = np.linalg.norm(right, axis=-1) < 1e-12
+    right[parallel] = (1.0, 0.0, 0.0)
+    right = _normalize(right)
+    up = np.cross(right, forward)
+
+    matrices = np.zeros((n, 4, 4), dtype=np.float64)
+    matrices[:, :3, 0] = right
+    matrices[:, :3, 1] = up
+    matrices[:, :3, 2] = -forward
+    matrices[:, :3, 3] = camera_positions
+    matrices[:, 3, 3] = 1.0
+    return matrices
+
+
+def sample_poses(
+        n: int,
+        rng: Optional[np.random.Generator] = None,
+        distance_object_camera: Tuple[float, float] = (35, 60),
+        max_theta: float = np.pi,
+        max_phi: float = np.pi,
+        distance_light_camera: Tuple[float, float] = (1, 50),
+        light_energy: Tuple[float, float] = (500, 1000),
+        area_light_probability: float = 0.0,
+        object_position: Tuple[float, float, float] = (0.0, 0.0, 0.0)
+) -> PoseTable:
+    """
+    samples the camera and light configuration of n frames in one vectorized pass
+    :param n: number of frames
+    :param rng: seeded random generator, a generator with seed 0 is used if not provided
+    :param distance_object_camera: (min, max) distance of the camera to the object
+    :param max_theta: polar angles are drawn from [0, max_theta] (rad)
+    :param max_phi: azimuth angles are drawn from [0, max_phi] (rad)
+    :param distance_light_camera: (min, max) distance of the light to the camera, the light is placed on a circle
+    around the camera perpendicular to the object-camera vector
+    :param light_energy: (min, max) energy of the light
+    :param area_light_probability: probability of an AREA light instead of a POINT light
+    :param object_position: position of the object the cameras look at
+    :return: PoseTable with one row per frame
+    """
+    assert (0 <= area_light_probability <= 1), "The area light probability must be between 0 and 1."
+    rng = np.random.default_rng(0) if rng is None else rng
+
+    # one draw per parameter and frame
+    dist_obj_cam = rng.uniform(min(distance_object_camera), max(distance_object_camera), n)
+    dist_light_cam = rng.uniform(min(distance_light_camera), max(distance_light_camera), n)
+    energies = rng.uniform(min(light_energy), max(light_energy), n)
+    theta = rng.uniform(0, max_theta, n)
+    phi = rng.uniform(0, max_phi, n)
+    circle_angle = rng.uniform(0, 2 * np.pi, n)
+    area_lights = rng.random(n) < area_light_probability
+
+    relative_positions = spherical_to_cartesian(theta, phi, dist_obj_cam)
+    return poses_from_views(relative_positions, dist_light_cam, energies, circle_angle, area_lights, object_position)
+
+
+def poses_from_views(
+        relative_positions: NDArray[np.float64],
+        dist_light_cam: NDArray[np.float64],
+        energies: NDArray[np.float64],
+        circle_angle: NDArray[np.float64],
+        area_lights: NDArray[np.bool_],
+        object_position: Tuple[float, float, float] = (0.0, 0.0, 0.0)
+) -> PoseTable:
+    """
+    poses of cameras at the (N, 3) positions relative to the object looking at it, each with a light at the distance
+    dist_light_cam and the angle circle_angle on a circle around the camera perpendicular to the object-camera vector
+    """
+    camera_positions = relative_positions + np.asarray(object_position, dtype=np.float64)
+    camera_matrices = look_at_matrices(camera_positions, object_position)
+
+    perp1, perp2 = perpendicular_vectors(relative_positions)
+    offset = np.cos(circle_angle)[:, None] * perp1 + np.sin(circle_angle)[:, None] * perp2
+    light_positions = camera_positions + dist_light_cam[:, None] * offset
+
+    return PoseTable(camera_matrices, camera_positions, light_positions, energies, area_lights)
@@ -0,0 +1,85 @@
+import unittest
+import numpy as np
+
+from .CosyTrafo import spherical_to_cartesian
+from .PoseSampler import (sample_poses, look_at_matrices, perpendicular_vectors, create_perpendicular_vector,
+                          change_to_spherical)
+
+
+class PoseSamplerTest(unittest.TestCase):
+    n = 1000
+    decimal_accuracy = 10
+
+    def setUp(self):
+        self.poses = sample_poses(self.n, np.random.default_rng(42), area_light_probability=0.3)
+
+    def test_shapes(self):
+        self.assertEqual(self.poses.camera_matrices.shape, (self.n, 4, 4))
+        self.assertEqual(self.poses.camera_positions.shape, (self.n, 3))
+        self.assertEqual(self.poses.light_positions.shape, (self.n, 3))
+        self.assertEqual(self.poses.light_energies.shape, (self.n,))
+        self.assertEqual(self.poses.area_lights.shape, (self.n,))
+
+    def test_deterministic(self):
+        poses = sample_poses(self.n, np.random.default_rng(42), area_light_probability=0.3)
+        for el1, el2 in zip(poses, self.poses):
+            np.testing.assert_array_equal(el1, el2)
+
+    def test_ranges(self):
+        distances = np.linalg.norm(self.poses.camera_positions, axis=-1)
+        self.assertTrue(np.all((35 <= distances) & (distances <= 60)))
+        self.assertTrue(np.all((500 <= self.poses.light_energies) & (self.poses.light_energies <= 1000)))
+        light_distances = np.linalg.norm(self.poses.light_positions - self.poses.camera_positions, axis=-1)
+        self.assertTrue(np.all((1 <= light_distances) & (light_distances <= 50 + 1e-9)))
+
+    def test_camera_positions_match_cosy_trafo(self):
+        for position in self.poses.camera_positions[:20]:
+            r = np.linalg.norm(position)
+            polar_angle = np.arccos(position[2] / r)
+            azimuth_angle = np.arctan2(position[1], position[0])
+            np.testing.assert_almost_equal(spherical_to_cartesian(r, polar_angle, azimuth_angle), position,
+                                           decimal=self.decimal_accuracy)
+
+    def test_cameras_look_at_object(self):
+        rotations = self.poses.camera_matrices[:, :3, :3]
+        np.testing.assert_almost_equal(rotations @ rotations.transpose(0, 2, 1),
+                                       np.broadcast_to(np.eye(3), rotations.shape), decimal=self.decimal_accuracy)
+        np.testing.assert_almost_equal(np.linalg.det(rotations), np.ones(self.n), decimal=self.decimal_accuracy)
+        # the camera looks along -Z to the origin
+        view_directions = -rotations[:, :, 2]
+        expected = -self.poses.camera_positions / np.linalg.norm(self.poses.camera_positions, axis=-1, keepdims=True)
+        np.testing.assert_almost_equal(view_directions, expected, decimal=self.decimal_accuracy)
+        # the camera Y axis points upwards
+        self.assertTrue(np.all(rotations[:, 2, 1] >= 0))
+        np.testing.assert_almost_equal(self.poses.camera_matrices[:, :3, 3], self.poses.camera_positions)
+
+    def test_look_at_straight_down(self):
+        matrix = look_at_matrices(np.array([[0.0, 0.0, 5.0]]))[0]
+        np.testing.assert_almost_equal(matrix[:3, :3], np.eye(3), decimal=self.decimal_accuracy)
+
+    def test_perpendicular_vectors(self):
+        v = np.array([[0.0, 0.0, 3.0], [1.0, 2.0, 3.0]])
+        perp1, perp2 = perpendicular_vectors(v)
+        np.testing.assert_almost_equal(perp1[0], (1, 0, 0))
+        np.testing.assert_almost_equal(perp2[0], (0, 1, 0))
+        np.testing.assert_almost_equal(np.sum(perp1 * v, axis=-1), 0)
+        np.testing.assert_almost_equal(np.sum(perp2 * v, axis=-1), 0)
+        np.testing.assert_almost_equal(np.linalg.norm(perp2, axis=-1), 1)
+
+    def test_matches_scalar_helpers(self):
+        v = np.array([[0.0, 0.0, 3.0], [1.0, 2.0, 3.0], [-4.0, 0.5, -1.0]])
+        perp1, perp2 = perpendicular_vectors(v)
+        for row, (el1, el2) in enumerate(map(create_perpendicular_vector, v)):
+            np.testing.assert_almost_equal(perp1[row], el1, decimal=self.decimal_accuracy)
+            np.testing.assert_almost_equal(perp2[row], el2, decimal=self.decimal_accuracy)
+        np.testing.assert_almost_equal(change_to_spherical(0.3, 1.2, 40.0), spherical_to_cartesian(40.0, 0.3, 1.2),
+                                       decimal=self.decimal_accuracy)
+
+    def test_slice(self):
+        part = self.poses.slice(10, 20)
+        self.assertEqual(len(part), 10)
+        np.testing.assert_array_equal(part.camera_matrices, self.poses.camera_matrices[10:20])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+import json
+import sys
+import threading
+import time
+import numpy as np
+
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union, Any, Iterator, ContextManager
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows
+    resource = None
+
+# shared no-op context of a disabled profiler, so that a disabled stage costs one method call
+_DISABLED_STAGE = nullcontext()
+
+
+def peak_rss_mb() -> Optional[float]:
+    """peak resident set size of this process in MB"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes on Linux
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+class StageProfiler:
+    """
+    Measures wall and CPU time of named pipeline stages. The stages of one step (e.g. the render of a chunk of frames)
+    are collected into a record, which is completed by record() together with the peak RSS and the counters
+    (e.g. the number of Blender datablocks) and appended to a JSONL trace. Stages which handle one frame at a time can
+    be timed per frame, stages running on other threads (e.g. the encoding of an image) add their time per frame with
+    add_frame_time(). The percentiles of the summary are per frame for these stages and per record for the others,
+    e.g. per chunk for a render of several frames at once, whose time is not split into synthetic frame times.
+    """
+
+    def __init__(
+            self,
+            enabled: bool = True,
+            trace_path: Union[str, Path, None] = None,
+            counters: Optional[Callable[[], Dict[str, int]]] = None
+    ) -> None:
+        self.enabled = enabled
+        self.counters = counters
+        self.records: List[Dict[str, Any]] = []
+        self._stages: Dict[str, Dict[str, float]] = {}
+        self._frame_stages: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self._trace = open(trace_path, "w") if enabled and trace_path is not None else None
+
+    def stage(self, name: str, per_frame: bool = False) -> ContextManager:
+        """
+        context measuring the stage, times of repeated stages within one record are summed up
+        :param per_frame: the stage handles a single frame, its time is also kept as the time of that frame
+        """
+        if not self.enabled:
+            return _DISABLED_STAGE
+        return self._measure(name, per_frame)
+
+    @contextmanager
+    def _measure(self, name: str, per_frame: bool) -> Iterator[None]:
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall
+            times = self._stages.setdefault(name, {"wall_s": 0.0, "cpu_s": 0.0})
+            times["wall_s"] += wall
+            times["cpu_s"] += time.process_time() - cpu
+            if per_frame:
+                with self._lock:
+                    self._frame_stages.setdefault(name, []).append(wall)
+
+    def add_frame_time(self, name: str, wall_s: float) -> None:
+        """adds the wall time of one frame in a stage measured elsewhere, may be called from several threads"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._frame_stages.setdefault(name, []).append(wall_s)
+
+    def record(self, frames: int = 0, **extra: Any) -> None:
+        """completes the record of the stages measured since the last record, frames: number of frames produced"""
+        if not self.enabled:
+            return
+        with self._lock:
+            frame_stages, self._frame_stages = self._frame_stages, {}
+        record = {"frames": frames, "stages": self._stages, "frame_stages": frame_stages, "peak_rss_mb": peak_rss_mb(),
+                  **extra}
+        if self.counters is not None:
+            record["counters"] = self.counters()
+        self._stages = {}
+        self.records.append(record)
+        if self._trace is not None:
+            self._trace.write(json.dumps(record) + "\n")
+            self._trace.flush()
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        per stage: total wall time, p50 and p95 of the wall time per frame for stages timed per frame, otherwise per
+        record ("per"), together with the number of frames of the records of the stage; overall frames per second
+        """
+        wall_s = time.perf_counter() - self._start
+        frames = sum(record["frames"] for record in self.records)
+        stages = {}
+        names = [*(name for record in self.records for name in record["stages"]),
+                 *(name for record in self.records for name in record["frame_stages"])]
+        for name in dict.fromkeys(names):
+            walls = [record["stages"][name]["wall_s"] for record in self.records if name in record["stages"]]
+            frame_walls = [wall for record in self.records for wall in record["frame_stages"].get(name, [])]
+            samples = np.array(frame_walls if frame_walls else walls)
+            stages[name] = {
+                "count": len(samples),
+                "per": "frame" if frame_walls else "record",
+                "frames": sum(record["frames"] for record in self.records
+                              if name in record["stages"] or name in record["frame_stages"]),
+                "total_s": float(sum(walls) if walls else samples.sum()),
+                "p50_s": float(np.percentile(samples, 50)),
+                "p95_s": float(np.percentile(samples, 95)),
+                # the process time of stages timed on other threads is not separable
+                "cpu_s": float(sum(record["stages"][name]["cpu_s"] for record in self.records
+                                   if name in record["stages"])) if walls else None,
+            }
+        rss = [record["peak_rss_mb"] for record in self.records if record["peak_rss_mb"] is not None]
+        return {
+            "frames": frames,
+            "wall_s": wall_s,
+            "frames_per_s": frames / wall_s if wall_s > 0 else 0.0,
+            "peak_rss_mb": max(rss) if rss else None,
+            "stages": stages,
+        }
+
+    def print_summary(self) -> None:
+        if not self.enabled:
+            return
+        summary = self.summary()
+        print(f"{summary['frames']} frames in {summary['wall_s']:.2f} s ({summary['frames_per_s']:.3f} frames/s), "
+              f"peak RSS {summary['peak_rss_mb']} MB")
+        print(f"{'stage':<20}{'count':>8}{'per':>8}{'frames':>8}{'total [s]':>12}{'p50 [s]':>12}{'p95 [s]':>12}"
+              f"{'cpu [s]':>12}")
+        for name, stats in summary["stages"].items():
+            cpu = "-" if stats["cpu_s"] is None else f"{stats['cpu_s']:.3f}"
+            print(f"{name:<20}{stats['count']:>8}{stats['per']:>8}{stats['frames']:>8}{stats['total_s']:>12.3f}"
+                  f"{stats['p50_s']:>12.3f}{stats['p95_s']:>12.3f}{cpu:>12}")
+
+    def close(self) -> None:
+        if self._trace is not None:
+            self._trace.close()
+            self._trace = None
@@ -0,0 +1,71 @@
+import json
+import tempfile
+import time
+import unittest
+
+from pathlib import Path
+
+from .Profiler import StageProfiler
+
+
+class StageProfilerTest(unittest.TestCase):
+
+    def test_records_and_summary(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            trace_path = Path(tmp_dir) / "profile.jsonl"
+            profiler = StageProfiler(trace_path=trace_path, counters=lambda: {"objects": 1})
+            for _ in range(3):
+                with profiler.stage("render"):
+                    time.sleep(0.01)
+                with profiler.stage("save"):
+                    pass
+                with profiler.stage("save"):
+                    pass
+                profiler.record(frames=2)
+            profiler.close()
+
+            with open(trace_path) as file:
+                records = [json.loads(line) for line in file]
+            self.assertEqual(len(records), 3)
+            self.assertEqual(records[0]["counters"], {"objects": 1})
+            self.assertGreaterEqual(records[0]["stages"]["render"]["wall_s"], 0.01)
+
+            summary = profiler.summary()
+            self.assertEqual(summary["frames"], 6)
+            self.assertEqual(summary["stages"]["save"]["count"], 3)
+            self.assertGreaterEqual(summary["stages"]["render"]["p50_s"], 0.01)
+            self.assertGreater(summary["frames_per_s"], 0)
+
+    def test_frame_times(self):
+        profiler = StageProfiler()
+        for _ in range(2):
+            with profiler.stage("render"):
+                time.sleep(0.02)
+            for _ in range(4):
+                with profiler.stage("save", per_frame=True):
+                    pass
+                profiler.add_frame_time("encode", 0.5)
+            profiler.record(frames=4)
+
+        self.assertNotIn("render", profiler.records[0]["frame_stages"])
+        self.assertEqual(len(profiler.records[0]["frame_stages"]["save"]), 4)
+        stages = profiler.summary()["stages"]
+        # a render of several frames is reported per chunk, not as synthetic per-frame times
+        self.assertEqual((stages["render"]["count"], stages["render"]["per"]), (2, "record"))
+        self.assertEqual(stages["render"]["frames"], 8)
+        self.assertGreaterEqual(stages["render"]["p50_s"], 0.02)
+        self.assertEqual((stages["save"]["count"], stages["save"]["per"]), (8, "frame"))
+        self.assertEqual((stages["encode"]["total_s"], stages["encode"]["p95_s"]), (4.0, 0.5))
+        self.assertIsNone(stages["encode"]["cpu_s"])
+
+    def test_disabled(self):
+        profiler = StageProfiler(enabled=False, trace_path="never_written.jsonl")
+        with profiler.stage("render"):
+            pass
+        profiler.record(frames=1)
+        self.assertEqual(profiler.records, [])
+        self.assertFalse(Path("never_written.jsonl").exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
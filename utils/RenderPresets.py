@@ -0,0 +1,51 @@
+from dataclasses import dataclass, asdict
+from typing import Optional, Tuple, Dict, Any
+
+
+@dataclass(frozen=True)
+class RenderPreset:
+    """Cycles settings trading image quality for throughput"""
+    name: str
+    max_samples: int
+    # adaptive sampling stops a pixel once its noise is below the threshold, 0 disables adaptive sampling
+    noise_threshold: float
+    # "INTEL", "OPTIX" or None
+    denoiser: Optional[str]
+    resolution: Tuple[int, int]  # (width, height) in pixels
+    max_bounces: int
+    diffuse_bounces: int
+    glossy_bounces: int
+    transmission_bounces: int
+    transparent_max_bounces: int
+    # 0: as many threads as CPU cores
+    cpu_threads: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+PRESETS: Dict[str, RenderPreset] = {
+    # low-noise previews for checking the poses
+    "preview": RenderPreset(
+        name="preview", max_samples=16, noise_threshold=0.1, denoiser="INTEL", resolution=(256, 256),
+        max_bounces=2, diffuse_bounces=1, glossy_bounces=1, transmission_bounces=1, transparent_max_bounces=2
+    ),
+    # training frames
+    "train": RenderPreset(
+        name="train", max_samples=128, noise_threshold=0.05, denoiser="INTEL", resolution=(512, 512),
+        max_bounces=6, diffuse_bounces=3, glossy_bounces=3, transmission_bounces=3, transparent_max_bounces=8
+    ),
+    # high-quality frames
+    "hero": RenderPreset(
+        name="hero", max_samples=1024, noise_threshold=0.005, denoiser=None, resolution=(1024, 1024),
+        max_bounces=12, diffuse_bounces=4, glossy_bounces=4, transmission_bounces=12, transparent_max_bounces=8
+    ),
+}
+
+
+def get_preset(name: str) -> RenderPreset:
+    """the preset of the name, raises a ValueError for unknown names"""
+    try:
+        return PRESETS[name]
+    except KeyError:
+        raise ValueError(f"Unknown render preset '{name}', available presets: {', '.join(PRESETS)}.") from None
@@ -1,48 +1,112 @@
+from .CosyTrafo import cos_deg, sin_deg
+from .MatrixCalculations import mat_multiply
 
-from CosyTrafo import *
+import numpy as np
 
+from functools import lru_cache
+from typing import Union, Tuple
+from numpy.typing import ArrayLike, NDArray
 
-from typing import Union, List, Tuple
+# number of cached rotation matrices per axis and of cached composed matrices
+MATRIX_CACHE_SIZE = 1024
 
+Matrix3 = Tuple[Tuple[float, float, float], Tuple[float, float, float], Tuple[float, float, float]]
 
-def rotate_roll(vec: Tuple[Union[int, float]], angle_deg: float) -> Tuple[Union[int, float]]:
+
+def _cos_sin(angle_deg: float) -> Tuple[float, float]:
+    return round(cos_deg(angle_deg), 15), round(sin_deg(angle_deg), 15)
+
+
+@lru_cache(maxsize=MATRIX_CACHE_SIZE)
+def roll_matrix(angle_deg: float) -> Matrix3:
     """
     | 1    0          0      |
     | 0 cos(roll) -sin(roll) |
     | 0 sin(roll)  cos(roll) |
     """
-    cosc = round(cos_deg(angle_deg), 15)
-    sinc = round(sin_deg(angle_deg), 15)
-    rotation_matrix = ((1.0, 0.0, 0.0),
-                       (0.0, cosc, -sinc),
-                       (0.0, sinc, cosc))
-    # apply rot matrix
-    return mat_multiply(rotation_matrix, vec)
+    cosc, sinc = _cos_sin(angle_deg)
+    return ((1.0, 0.0, 0.0),
+            (0.0, cosc, -sinc),
+            (0.0, sinc, cosc))
 
-def rotate_pitch(vec: Tuple[Union[int, float]], angle_deg: float) -> Tuple[Union[int, float]]:
+
+@lru_cache(maxsize=MATRIX_CACHE_SIZE)
+def pitch_matrix(angle_deg: float) -> Matrix3:
     """
     | cos(pitch) 0 -sin(pitch) |
     |     0      1      0      |
     | sin(pitch) 0  cos(pitch) |
     """
-    cosc = round(cos_deg(angle_deg), 15)
-    sinc = round(sin_deg(angle_deg), 15)
-    rotation_matrix = ((cosc, 0.0, -sinc),
-                       (0.0, 1.0, 0.0),
-                       (sinc, 0.0, cosc))
-    # apply rot matrix
-    return mat_multiply(rotation_matrix, vec)
+    cosc, sinc = _cos_sin(angle_deg)
+    return ((cosc, 0.0, -sinc),
+            (0.0, 1.0, 0.0),
+            (sinc, 0.0, cosc))
 
-def rotate_yaw(vec: Tuple[Union[int, float]], angle_deg: float) -> Tuple[Union[int, float]]:
+
+@lru_cache(maxsize=MATRIX_CACHE_SIZE)
+def yaw_matrix(angle_deg: float) -> Matrix3:
     """
     | cos(yaw) -sin(yaw) 0 |
     | sin(yaw)  cos(yaw) 0 |
     |    0         0     1 |
     """
-    cosc = round(cos_deg(angle_deg), 15)
-    sinc = round(sin_deg(angle_deg), 15)
-    rotation_matrix = ((cosc, -sinc, 0.0),
-                       (sinc, cosc, 0.0),
-                       (0.0, 0.0, 1.0))
+    cosc, sinc = _cos_sin(angle_deg)
+    return ((cosc, -sinc, 0.0),
+            (sinc, cosc, 0.0),
+            (0.0, 0.0, 1.0))
+
+
+def rotate_roll(vec: Tuple[Union[int, float]], angle_deg: float) -> Tuple[Union[int, float]]:
     # apply rot matrix
-    return mat_multiply(rotation_matrix, vec)
\ No newline at end of file
+    return mat_multiply(roll_matrix(angle_deg), vec)
+
+
+def rotate_pitch(vec: Tuple[Union[int, float]], angle_deg: float) -> Tuple[Union[int, float]]:
+    # apply rot matrix
+    return mat_multiply(pitch_matrix(angle_deg), vec)
+
+
+def rotate_yaw(vec: Tuple[Union[int, float]], angle_deg: float) -> Tuple[Union[int, float]]:
+    # apply rot matrix
+    return mat_multiply(yaw_matrix(angle_deg), vec)
+
+
+@lru_cache(maxsize=MATRIX_CACHE_SIZE)
+def _roll_pitch_yaw_matrix(roll_deg: float, pitch_deg: float, yaw_deg: float) -> NDArray[np.float64]:
+    # roll is applied first, yaw last: R = YAW @ PITCH @ ROLL
+    matrix = np.asarray(yaw_matrix(yaw_deg)) @ np.asarray(pitch_matrix(pitch_deg)) @ np.asarray(roll_matrix(roll_deg))
+    # the cached matrix is shared between all rotations with these angles
+    matrix.flags.writeable = False
+    return matrix
+
+
+class Rotation:
+    """3x3 rotation matrix which is applied to single vectors or (N, 3) arrays of vectors in one multiplication"""
+    __slots__ = ("matrix",)
+
+    def __init__(self, matrix: ArrayLike) -> None:
+        matrix = np.asarray(matrix, dtype=np.float64)
+        assert matrix.shape == (3, 3), f"A rotation matrix must be of shape (3, 3) but was {matrix.shape}."
+        self.matrix = matrix
+
+    @classmethod
+    def from_roll_pitch_yaw(cls, roll_deg: float = 0.0, pitch_deg: float = 0.0, yaw_deg: float = 0.0) -> "Rotation":
+        """
+        rotation equivalent to rotate_roll, then rotate_pitch, then rotate_yaw; the composed matrix is cached for
+        repeated angles
+        """
+        return cls(_roll_pitch_yaw_matrix(float(roll_deg), float(pitch_deg), float(yaw_deg)))
+
+    def __repr__(self) -> str:
+        return f"Rotation({self.matrix.tolist()})"
+
+    def __matmul__(self, other: "Rotation") -> "Rotation":
+        """composition: (self @ other) applies other first, then self"""
+        return Rotation(self.matrix @ other.matrix)
+
+    def inverse(self) -> "Rotation":
+        return Rotation(self.matrix.T)
+
+    def apply(self, vecs: ArrayLike) -> NDArray[np.float64]:
+        """rotates a vector of shape (3,) or all rows of an array of shape (N, 3)"""
+        return np.asarray(vecs, dtype=np.float64) @ self.matrix.T
@@ -0,0 +1,37 @@
+import unittest
+import numpy as np
+
+from .Rotation3D import rotate_roll, rotate_pitch, rotate_yaw, roll_matrix, Rotation
+
+
+class Rotation3DTest(unittest.TestCase):
+    vec = (1.0, 2.0, 3.0)
+    decimal_accuracy = 10
+
+    def test_scalar_rotations(self):
+        np.testing.assert_almost_equal(rotate_roll(self.vec, 90), (1, -3, 2), decimal=self.decimal_accuracy)
+        np.testing.assert_almost_equal(rotate_pitch(self.vec, 90), (-3, 2, 1), decimal=self.decimal_accuracy)
+        np.testing.assert_almost_equal(rotate_yaw(self.vec, 90), (-2, 1, 3), decimal=self.decimal_accuracy)
+
+    def test_composed_matches_sequence(self):
+        rng = np.random.default_rng(0)
+        vecs = rng.uniform(-10, 10, (100, 3))
+        rotation = Rotation.from_roll_pitch_yaw(30, -45, 120)
+        expected = [rotate_yaw(rotate_pitch(rotate_roll(tuple(el), 30), -45), 120) for el in vecs]
+        np.testing.assert_almost_equal(rotation.apply(vecs), expected, decimal=self.decimal_accuracy)
+        np.testing.assert_almost_equal(rotation.apply(vecs[0]), expected[0], decimal=self.decimal_accuracy)
+
+    def test_cache(self):
+        self.assertIs(roll_matrix(12.5), roll_matrix(12.5))
+        self.assertIs(Rotation.from_roll_pitch_yaw(1, 2, 3).matrix, Rotation.from_roll_pitch_yaw(1, 2, 3).matrix)
+
+    def test_compose_and_inverse(self):
+        rotation1 = Rotation.from_roll_pitch_yaw(roll_deg=30)
+        rotation2 = Rotation.from_roll_pitch_yaw(yaw_deg=60)
+        np.testing.assert_almost_equal((rotation2 @ rotation1).apply(self.vec),
+                                       rotation2.apply(rotation1.apply(self.vec)))
+        np.testing.assert_almost_equal(rotation1.inverse().apply(rotation1.apply(self.vec)), self.vec)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+import threading
+
+from pathlib import Path
+from typing import Dict, List, Any, Union, Iterable, Sequence, Tuple
+
+
+def config_hash(config: Dict[str, Any]) -> str:
+    """hash of a json-serializable run configuration, independent of the key order"""
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()
+
+
+def file_hash(path: Union[str, Path], block_size: int = 1 << 20) -> str:
+    """sha256 of the file content, read in blocks"""
+    sha = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(block_size), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def file_record(path: Path) -> Dict[str, Any]:
+    """name, size and hash of a completed file"""
+    return {"file": path.name, "bytes": path.stat().st_size, "sha256": file_hash(path)}
+
+
+def _write_lines(path: Path, lines: List[str]) -> None:
+    """replaces the file atomically by the lines"""
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w") as file:
+        file.write("\n".join(lines) + "\n")
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+
+
+def extends(old_config: Dict[str, Any], new_config: Dict[str, Any]) -> bool:
+    """whether the new configuration only adds frames to the old one"""
+    old = dict(old_config)
+    new = dict(new_config)
+    return old.pop("n_images", None) is not None and new.pop("n_images", -1) >= old_config["n_images"] and \
+        json.loads(json.dumps(old)) == json.loads(json.dumps(new))
+
+
+class RunManifest:
+    """
+    Checkpoint of a generation run: the first line holds the run configuration and its hash, every further line
+    records output files as they are completed together with the dataset indices they contain, their size and hash.
+    Lines are appended and fsynced one by one, so a crash loses at most the line being written, which is ignored
+    when the manifest is read again.
+    """
+
+    def __init__(
+            self,
+            path: Union[str, Path],
+            config: Dict[str, Any],
+            resume: bool = False,
+            extend: bool = False
+    ) -> None:
+        """
+        :param resume: keep the records of an existing manifest of the same configuration
+        :param extend: resume an existing manifest whose configuration only differs by a smaller "n_images", the
+        header is updated to the new configuration
+        """
+        self.path = Path(path)
+        self.config = config
+        self.config_hash = config_hash(config)
+        # dataset index -> record of the file containing it
+        self.completed: Dict[int, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+        if (resume or extend) and self.path.exists():
+            header, records = self._read()
+            if header.get("config_hash") != self.config_hash and not (extend and extends(header["config"], config)):
+                raise ValueError(f"The run in {self.path} was started with a different configuration, "
+                                 f"it cannot be {'extended' if extend else 'resumed'} with the current one.")
+            for record in records:
+                self._add(record)
+            # drop a partially written last line, so that new records are not appended behind it
+            header = {"config_hash": self.config_hash, "config": config}
+            _write_lines(self.path, [json.dumps(header), *(json.dumps(record) for record in records)])
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            _write_lines(self.path, [json.dumps({"config_hash": self.config_hash, "config": config})])
+
+    def _read(self) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        with open(self.path) as file:
+            lines = file.read().splitlines()
+        header = json.loads(lines[0])
+        records = []
+        for line in lines[1:]:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                # partially written last line of an interrupted run
+                break
+        return header, records
+
+    def _add(self, record: Dict[str, Any]) -> None:
+        for index in record["indices"]:
+            self.completed[index] = record
+
+    def mark_done(
+            self,
+            indices: Iterable[int],
+            path: Union[str, Path],
+            further_paths: Sequence[Union[str, Path]] = ()
+    ) -> Dict[str, Any]:
+        """
+        records that the file at path holds the frames of the indices, may be called from several threads
+        :param further_paths: further files of the frames (e.g. their depth), verified together with the file
+        """
+        record = {"indices": [int(index) for index in indices], **file_record(Path(path))}
+        if further_paths:
+            record["further_files"] = [file_record(Path(further_path)) for further_path in further_paths]
+        with self._lock:
+            with open(self.path, "a") as file:
+                file.write(json.dumps(record) + "\n")
+                file.flush()
+                os.fsync(file.fileno())
+            self._add(record)
+        return record
+
+    def verify(self, output_dir: Union[str, Path], check_hash: bool = False) -> List[int]:
+        """
+        checks the recorded files in output_dir by size (and hash), forgets the indices of missing or modified files
+        :return: the indices which have to be rendered again
+        """
+        output_dir = Path(output_dir)
+        invalid = []
+        for record in {id(record): record for record in self.completed.values()}.values():
+            valid = True
+            for file in [record, *record.get("further_files", [])]:
+                path = output_dir / file["file"]
+                valid = path.exists() and path.stat().st_size == file["bytes"]
+                if valid and check_hash:
+                    valid = file_hash(path) == file["sha256"]
+                if not valid:
+                    break
+            if not valid:
+                invalid.extend(index for index in record["indices"] if self.completed.get(index) is record)
+        for index in invalid:
+            del self.completed[index]
+        return sorted(invalid)
+
+    def pending(self, indices: Iterable[int]) -> List[int]:
+        """the indices which have not been completed yet"""
+        return [index for index in indices if index not in self.completed]
+
+
+def merge_manifests(manifest_paths: List[Union[str, Path]], output_path: Union[str, Path]) -> None:
+    """combines the manifests of runs with the same configuration (e.g. of parallel workers) into one manifest"""
+    header = None
+    lines = []
+    for path in manifest_paths:
+        with open(path) as file:
+            content = file.read().splitlines()
+        if header is None:
+            header = content[0]
+        assert json.loads(header)["config_hash"] == json.loads(content[0])["config_hash"], \
+            "Only manifests of runs with the same configuration can be merged."
+        for line in content[1:]:
+            try:
+                json.loads(line)
+            except json.JSONDecodeError:
+                # partially written last line of an interrupted run
+                break
+            lines.append(line)
+    _write_lines(Path(output_path), [header, *lines])
@@ -0,0 +1,113 @@
+import json
+import tempfile
+import unittest
+
+from pathlib import Path
+
+from .RunManifest import RunManifest, merge_manifests
+
+
+class RunManifestTest(unittest.TestCase):
+    config = {"obj": "object.obj", "n_images": 10, "seed": 3}
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp_dir.name)
+        self.path = self.dir / "run_manifest.jsonl"
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write_frame(self, index: int, manifest: RunManifest) -> Path:
+        path = self.dir / f"image{index}.png"
+        path.write_bytes(bytes([index]) * (index + 1))
+        manifest.mark_done([index], path)
+        return path
+
+    def test_resume_skips_completed(self):
+        manifest = RunManifest(self.path, self.config)
+        for i in (0, 1, 4):
+            self.write_frame(i, manifest)
+
+        resumed = RunManifest(self.path, dict(reversed(list(self.config.items()))), resume=True)
+        self.assertEqual(resumed.verify(self.dir), [])
+        self.assertEqual(resumed.pending(range(6)), [2, 3, 5])
+
+    def test_extend(self):
+        manifest = RunManifest(self.path, self.config)
+        for i in range(10):
+            self.write_frame(i, manifest)
+
+        with self.assertRaises(ValueError):
+            RunManifest(self.path, {**self.config, "n_images": 15}, resume=True)
+        with self.assertRaises(ValueError):
+            RunManifest(self.path, {**self.config, "n_images": 15, "seed": 4}, extend=True)
+        with self.assertRaises(ValueError):
+            RunManifest(self.path, {**self.config, "n_images": 5}, extend=True)
+        extended = RunManifest(self.path, {**self.config, "n_images": 15}, extend=True)
+        self.assertEqual(extended.pending(range(15)), [10, 11, 12, 13, 14])
+        # the manifest now belongs to the extended configuration
+        resumed = RunManifest(self.path, {**self.config, "n_images": 15}, resume=True)
+        self.assertEqual(resumed.pending(range(15)), [10, 11, 12, 13, 14])
+
+    def test_new_run_starts_empty(self):
+        manifest = RunManifest(self.path, self.config)
+        self.write_frame(0, manifest)
+        self.assertEqual(RunManifest(self.path, self.config).pending(range(2)), [0, 1])
+
+    def test_different_config(self):
+        RunManifest(self.path, self.config)
+        with self.assertRaises(ValueError):
+            RunManifest(self.path, {**self.config, "seed": 4}, resume=True)
+
+    def test_verify(self):
+        manifest = RunManifest(self.path, self.config)
+        self.write_frame(0, manifest)
+        self.write_frame(1, manifest).write_bytes(b"x")  # modified size
+        path2 = self.write_frame(2, manifest)
+        path2.write_bytes(b"\x00" * 3)  # same size, modified content
+        self.write_frame(3, manifest).unlink()  # missing
+
+        self.assertEqual(RunManifest(self.path, self.config, resume=True).verify(self.dir), [1, 3])
+        resumed = RunManifest(self.path, self.config, resume=True)
+        self.assertEqual(resumed.verify(self.dir, check_hash=True), [1, 2, 3])
+        self.assertEqual(resumed.pending(range(4)), [1, 2, 3])
+
+    def test_verify_further_files(self):
+        manifest = RunManifest(self.path, self.config)
+        for i in range(3):
+            depth_path = self.dir / f"depth{i}.npz"
+            depth_path.write_bytes(b"depth")
+            image_path = self.dir / f"image{i}.png"
+            image_path.write_bytes(b"image")
+            manifest.mark_done([i], image_path, [depth_path])
+        (self.dir / "depth1.npz").write_bytes(b"dep")  # truncated
+        (self.dir / "depth2.npz").unlink()  # missing
+
+        resumed = RunManifest(self.path, self.config, resume=True)
+        self.assertEqual(resumed.verify(self.dir), [1, 2])
+        self.assertEqual(resumed.pending(range(3)), [1, 2])
+
+    def test_partial_last_line(self):
+        manifest = RunManifest(self.path, self.config)
+        self.write_frame(0, manifest)
+        with open(self.path, "a") as file:
+            file.write('{"indices": [1], "fi')
+
+        resumed = RunManifest(self.path, self.config, resume=True)
+        self.assertEqual(resumed.pending(range(2)), [1])
+        self.write_frame(1, resumed)
+        self.assertEqual(RunManifest(self.path, self.config, resume=True).pending(range(2)), [])
+
+    def test_merge(self):
+        paths = [self.dir / "a.jsonl", self.dir / "b.jsonl"]
+        for k, path in enumerate(paths):
+            self.write_frame(k, RunManifest(path, self.config))
+        merge_manifests(paths, self.path)
+        self.assertEqual(RunManifest(self.path, self.config, resume=True).pending(range(3)), [2])
+        with open(self.path) as file:
+            self.assertEqual(json.loads(file.readline())["config"], self.config)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import json
+import os
+
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+from .RunManifest import config_hash, file_hash
+
+
+def scene_key(sources: Sequence[Union[str, Path, None]], config: Dict[str, Any]) -> str:
+    """hash of the content of the source files (None: no file) and the json-serializable scene configuration"""
+    return config_hash({
+        "sources": [None if source is None else file_hash(source) for source in sources],
+        "config": config,
+    })
+
+
+class SceneCache:
+    """
+    Snapshots of prepared scenes (e.g. .blend files) keyed by the hash of their inputs. Every snapshot has a json
+    sidecar with its key and the paths of its source files; storing a snapshot removes the snapshots of the same
+    source paths with another key, which are outdated since a source or the configuration has changed.
+    """
+
+    def __init__(self, cache_dir: Union[str, Path], suffix: str = ".blend") -> None:
+        self.cache_dir = Path(cache_dir)
+        self.suffix = suffix
+
+    def path_of(self, key: str) -> Path:
+        return self.cache_dir / f"{key[:32]}{self.suffix}"
+
+    def _sidecar(self, path: Path) -> Path:
+        return path.with_suffix(".json")
+
+    def lookup(self, key: str) -> Optional[Path]:
+        """the snapshot of the key, None if there is none"""
+        path = self.path_of(key)
+        return path if path.exists() and self._sidecar(path).exists() else None
+
+    def store(self, key: str, save: Callable[[Path], None], sources: Sequence[Union[str, Path, None]]) -> Path:
+        """
+        saves the snapshot with save(path) under a temporary name, which is renamed once complete, so that concurrent
+        workers never load a partial snapshot
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self.path_of(key)
+        tmp_path = path.with_name(f".{os.getpid()}_{path.name}")
+        try:
+            save(tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        source_paths = [None if source is None else str(Path(source).absolute()) for source in sources]
+        with open(self._sidecar(path), "w") as file:
+            json.dump({"key": key, "sources": source_paths}, file, indent=1)
+        self._remove_outdated(key, source_paths)
+        return path
+
+    def _remove_outdated(self, key: str, source_paths: List[Optional[str]]) -> None:
+        for sidecar in self.cache_dir.glob("*.json"):
+            try:
+                with open(sidecar) as file:
+                    content = json.load(file)
+            except (OSError, json.JSONDecodeError):
+                continue
+            if content.get("key") != key and content.get("sources") == source_paths:
+                self.path_of(content["key"]).unlink(missing_ok=True)
+                sidecar.unlink(missing_ok=True)
@@ -0,0 +1,70 @@
+import tempfile
+import unittest
+
+from pathlib import Path
+
+from .SceneCache import SceneCache, scene_key
+
+
+class SceneCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp_dir.name)
+        self.obj = self.dir / "object.obj"
+        self.obj.write_text("v 0 0 0")
+        self.cache = SceneCache(self.dir / "scenes")
+        self.saved = []
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def save(self, path: Path) -> None:
+        self.saved.append(path)
+        path.write_bytes(b"scene")
+
+    def test_key_depends_on_content_and_config(self):
+        key = scene_key([self.obj, None], {"texture_size": 1024})
+        self.assertEqual(key, scene_key([self.obj, None], {"texture_size": 1024}))
+        self.assertNotEqual(key, scene_key([self.obj, None], {"texture_size": 512}))
+        self.obj.write_text("v 1 0 0")
+        self.assertNotEqual(key, scene_key([self.obj, None], {"texture_size": 1024}))
+
+    def test_store_and_lookup(self):
+        key = scene_key([self.obj], {})
+        self.assertIsNone(self.cache.lookup(key))
+        path = self.cache.store(key, self.save, [self.obj])
+        self.assertEqual(self.cache.lookup(key), path)
+        self.assertEqual(path.read_bytes(), b"scene")
+        # saved under a temporary name
+        self.assertNotEqual(self.saved[0], path)
+        self.assertFalse(self.saved[0].exists())
+
+    def test_changed_source_replaces_outdated_snapshot(self):
+        old_key = scene_key([self.obj], {})
+        old_path = self.cache.store(old_key, self.save, [self.obj])
+        other = self.dir / "other.obj"
+        other.write_text("v 2 0 0")
+        other_path = self.cache.store(scene_key([other], {}), self.save, [other])
+
+        self.obj.write_text("v 1 0 0")
+        new_key = scene_key([self.obj], {})
+        self.assertIsNone(self.cache.lookup(new_key))
+        self.cache.store(new_key, self.save, [self.obj])
+        self.assertIsNone(self.cache.lookup(old_key))
+        self.assertFalse(old_path.exists())
+        self.assertTrue(other_path.exists())
+
+    def test_failed_save_leaves_nothing(self):
+        def fail(path: Path) -> None:
+            path.write_bytes(b"partial")
+            raise RuntimeError("disk full")
+
+        key = scene_key([self.obj], {})
+        with self.assertRaises(RuntimeError):
+            self.cache.store(key, fail, [self.obj])
+        self.assertIsNone(self.cache.lookup(key))
+        self.assertEqual(list((self.dir / "scenes").iterdir()), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
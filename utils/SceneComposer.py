@@ -0,0 +1,123 @@
+import numpy as np
+
+from typing import Dict, NamedTuple, Optional, Sequence, Tuple
+from numpy.typing import ArrayLike, NDArray
+
+# stream of the dataset seed from which the layouts are drawn, separate from the poses, textures and colors
+LAYOUT_STREAM = 4
+
+
+class Layout(NamedTuple):
+    """placement of the instances of a scene in one frame, row i belongs to instance i"""
+    parts: NDArray[np.int64]  # (I,) part (distinct mesh) of every instance
+    locations: NDArray[np.float64]  # (I, 3)
+    rotations: NDArray[np.float64]  # (I, 3) Blender XYZ Euler angles (rad)
+
+    def __len__(self) -> int:
+        return len(self.parts)
+
+    def matrices(self) -> NDArray[np.float64]:
+        """(I, 4, 4) object to world matrices of the instances"""
+        matrices = np.zeros((len(self), 4, 4))
+        matrices[:, :3, :3] = euler_xyz_matrices(self.rotations)
+        matrices[:, :3, 3] = self.locations
+        matrices[:, 3, 3] = 1.0
+        return matrices
+
+
+def instance_parts(counts: Sequence[int]) -> NDArray[np.int64]:
+    """part of every instance of a scene with counts[p] instances of part p"""
+    return np.repeat(np.arange(len(counts)), counts)
+
+
+def euler_xyz_matrices(rotations: ArrayLike) -> NDArray[np.float64]:
+    """(N, 3, 3) rotation matrices of (N, 3) Euler angles in Blender's XYZ order: R = Rz @ Ry @ Rx"""
+    rotations = np.asarray(rotations, dtype=np.float64).reshape(-1, 3)
+    cos_x, cos_y, cos_z = np.cos(rotations).T
+    sin_x, sin_y, sin_z = np.sin(rotations).T
+    return np.stack((
+        np.stack((cos_y * cos_z, sin_x * sin_y * cos_z - cos_x * sin_z, cos_x * sin_y * cos_z + sin_x * sin_z), -1),
+        np.stack((cos_y * sin_z, sin_x * sin_y * sin_z + cos_x * cos_z, cos_x * sin_y * sin_z - sin_x * cos_z), -1),
+        np.stack((-sin_y, sin_x * cos_y, cos_x * cos_y), -1)
+    ), axis=1)
+
+
+def random_rotations(n: int, rng: np.random.Generator) -> NDArray[np.float64]:
+    """(n, 3) XYZ Euler angles of rotations drawn uniformly: the Y angle has the density cos(y)"""
+    return np.column_stack((rng.uniform(-np.pi, np.pi, n), np.arcsin(rng.uniform(-1, 1, n)),
+                            rng.uniform(-np.pi, np.pi, n)))
+
+
+def bounding_sphere(corners: ArrayLike) -> Tuple[NDArray[np.float64], float]:
+    """center and radius of the sphere around the (8, 3) corners of a bounding box"""
+    corners = np.asarray(corners, dtype=np.float64)
+    low, high = corners.min(axis=0), corners.max(axis=0)
+    return (low + high) / 2, float(np.linalg.norm(high - low) / 2)
+
+
+def origin_radius(corners: ArrayLike) -> float:
+    """radius of the sphere around the object origin, which contains the object in any rotation about its origin"""
+    return float(np.linalg.norm(np.asarray(corners, dtype=np.float64), axis=-1).max())
+
+
+def sample_layout(
+        radii: ArrayLike,
+        parts: Sequence[int],
+        rng: np.random.Generator,
+        extent: Tuple[float, float, float] = (10.0, 10.0, 0.0),
+        center: Tuple[float, float, float] = (0.0, 0.0, 0.0),
+        obstacles: Optional[Tuple[NDArray[np.float64], NDArray[np.float64]]] = None,
+        candidates: int = 32,
+        max_rounds: int = 16
+) -> Layout:
+    """
+    places the instances of the parts without overlaps within the box center +- extent: every instance is enclosed by
+    the sphere of the radius of its part around its origin, the rotations are drawn uniformly. The instances are placed
+    largest first, each at the first of a batch of candidate locations clear of the placed spheres and the obstacles.
+    :param radii: (P,) radius of every part around its origin, see origin_radius
+    :param parts: (I,) part of every instance, see instance_parts
+    :param obstacles: centers (K, 3) and radii (K,) of spheres to keep clear, e.g. the main object
+    :param max_rounds: number of candidate batches before a ValueError reports that the instances do not fit
+    """
+    radii = np.asarray(radii, dtype=np.float64)
+    parts = np.asarray(parts, dtype=np.int64)
+    center = np.asarray(center, dtype=np.float64)
+    extent = np.asarray(extent, dtype=np.float64)
+    n = len(parts)
+    rotations = random_rotations(n, rng)
+    if obstacles is None:
+        obstacles = np.empty((0, 3)), np.empty(0)
+    # spheres which are already taken: obstacles first, then the placed instances
+    taken_centers = np.empty((len(obstacles[0]) + n, 3))
+    taken_radii = np.empty(len(obstacles[0]) + n)
+    n_taken = len(obstacles[0])
+    taken_centers[:n_taken] = obstacles[0]
+    taken_radii[:n_taken] = obstacles[1]
+    locations = np.empty((n, 3))
+    for instance in np.argsort(-radii[parts], kind="stable"):
+        radius = radii[parts[instance]]
+        for _ in range(max_rounds):
+            draws = center + rng.uniform(-1, 1, (candidates, 3)) * extent
+            distances = np.linalg.norm(draws[:, None] - taken_centers[None, :n_taken], axis=-1)
+            clear = np.all(distances >= taken_radii[:n_taken] + radius, axis=1)
+            if clear.any():
+                locations[instance] = draws[np.argmax(clear)]
+                break
+        else:
+            raise ValueError(f"Found no place for instance {instance} of part {parts[instance]} after "
+                             f"{max_rounds * candidates} candidates, use fewer instances or a larger extent.")
+        taken_centers[n_taken] = locations[instance]
+        taken_radii[n_taken] = radius
+        n_taken += 1
+    return Layout(parts, locations, rotations)
+
+
+def sample_layouts(indices: Sequence[int], seed: int, radii: ArrayLike, parts: Sequence[int],
+                   **kwargs) -> Dict[int, Layout]:
+    """
+    layouts of the dataset indices, each drawn from a generator seeded by (seed, LAYOUT_STREAM, index), so that the
+    layout of an index does not depend on the other indices, the workers or later extensions of the dataset
+    :param kwargs: settings of sample_layout
+    """
+    return {int(index): sample_layout(radii, parts, np.random.default_rng([seed, LAYOUT_STREAM, int(index)]), **kwargs)
+            for index in indices}
@@ -0,0 +1,71 @@
+import unittest
+import numpy as np
+
+from .PosePlanner import bounding_box_corners
+from .SceneComposer import (euler_xyz_matrices, random_rotations, bounding_sphere, origin_radius, instance_parts,
+                            sample_layout, sample_layouts)
+
+
+class SceneComposerTest(unittest.TestCase):
+    decimal_accuracy = 10
+
+    def test_euler_xyz_matrices(self):
+        # rotations about single axes and their composition in Blender's XYZ order: x first, z last
+        quarter = np.pi / 2
+        np.testing.assert_almost_equal(euler_xyz_matrices([0, 0, quarter])[0] @ (1, 0, 0), (0, 1, 0))
+        np.testing.assert_almost_equal(euler_xyz_matrices([quarter, 0, 0])[0] @ (0, 1, 0), (0, 0, 1))
+        np.testing.assert_almost_equal(euler_xyz_matrices([quarter, 0, quarter])[0] @ (0, 1, 0), (0, 0, 1))
+        np.testing.assert_almost_equal(euler_xyz_matrices([quarter, quarter, 0])[0],
+                                       euler_xyz_matrices([0, quarter, 0])[0] @ euler_xyz_matrices([quarter, 0, 0])[0],
+                                       decimal=self.decimal_accuracy)
+
+    def test_random_rotations_are_uniform(self):
+        matrices = euler_xyz_matrices(random_rotations(20000, np.random.default_rng(0)))
+        np.testing.assert_almost_equal(matrices @ matrices.transpose(0, 2, 1),
+                                       np.broadcast_to(np.eye(3), matrices.shape), decimal=self.decimal_accuracy)
+        # uniform rotations map an axis uniformly onto the sphere: its mean vanishes, its z is uniform in [-1, 1]
+        axes = matrices[:, :, 0]
+        np.testing.assert_almost_equal(axes.mean(axis=0), np.zeros(3), decimal=1)
+        self.assertTrue(np.all(np.abs(np.histogram(axes[:, 2], bins=4, range=(-1, 1))[0] - 5000) < 300))
+
+    def test_bounding_spheres(self):
+        corners = bounding_box_corners((1, -1, -1), (3, 1, 1))
+        center, radius = bounding_sphere(corners)
+        np.testing.assert_almost_equal(center, (2, 0, 0))
+        self.assertAlmostEqual(radius, np.sqrt(3))
+        self.assertAlmostEqual(origin_radius(corners), np.sqrt(11))
+
+    def test_instances_do_not_overlap(self):
+        radii = np.array([1.0, 0.5])
+        parts = instance_parts([5, 30])
+        np.testing.assert_array_equal(parts, [0] * 5 + [1] * 30)
+        obstacle = np.zeros((1, 3)), np.array([2.0])
+        layout = sample_layout(radii, parts, np.random.default_rng(1), extent=(10, 10, 0), center=(0, 0, 1),
+                               obstacles=obstacle)
+        self.assertEqual(len(layout), 35)
+        self.assertTrue(np.all(np.abs(layout.locations[:, :2]) <= 10))
+        np.testing.assert_array_equal(layout.locations[:, 2], 1)
+        distances = np.linalg.norm(layout.locations[:, None] - layout.locations[None], axis=-1)
+        min_distances = radii[parts][:, None] + radii[parts][None]
+        np.fill_diagonal(distances, np.inf)
+        self.assertTrue(np.all(distances >= min_distances))
+        self.assertTrue(np.all(np.linalg.norm(layout.locations, axis=-1) >= 2 + radii[parts]))
+        matrices = layout.matrices()
+        np.testing.assert_almost_equal(matrices[:, :3, 3], layout.locations)
+        np.testing.assert_almost_equal(matrices[:, :3, :3], euler_xyz_matrices(layout.rotations))
+
+    def test_unplaceable_instances(self):
+        with self.assertRaises(ValueError):
+            sample_layout([1.0], instance_parts([50]), np.random.default_rng(0), extent=(3, 3, 0), max_rounds=4)
+
+    def test_layouts_do_not_depend_on_other_indices(self):
+        all_layouts = sample_layouts(range(10), 3, [1.0, 0.5], instance_parts([2, 3]))
+        subset = sample_layouts([7, 2], 3, [1.0, 0.5], instance_parts([2, 3]))
+        for index, layout in subset.items():
+            for el1, el2 in zip(layout, all_layouts[index]):
+                np.testing.assert_array_equal(el1, el2)
+        self.assertFalse(np.array_equal(all_layouts[0].locations, all_layouts[1].locations))
+
+
+if __name__ == '__main__':
+    unittest.main()
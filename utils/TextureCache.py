@@ -0,0 +1,111 @@
+import os
+import numpy as np
+
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence, Tuple, Union
+from numpy.typing import NDArray
+
+from .RunManifest import file_hash
+
+TEXTURE_ENDINGS = (".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp", ".tga", ".exr")
+# decoded by Blender but not by Pillow, these textures are used unchanged, which also keeps their dynamic range
+UNPREPARED_ENDINGS = (".exr",)
+
+
+def list_textures(path: Union[str, Path]) -> List[Path]:
+    """the texture file or the texture files of a directory, sorted by name"""
+    path = Path(path)
+    if path.is_dir():
+        textures = sorted(file for file in path.iterdir() if file.suffix.lower() in TEXTURE_ENDINGS)
+        if not textures:
+            raise ValueError(f"The directory {path} does not contain any textures.")
+        return textures
+    if not path.exists():
+        raise FileNotFoundError(f"The texture {path} does not exist.")
+    return [path]
+
+
+def texture_size_for(resolution: Tuple[int, int], oversampling: float = 2.0) -> int:
+    """smallest power of two of at least oversampling times the larger side of the image resolution"""
+    return int(2 ** np.ceil(np.log2(max(resolution) * oversampling)))
+
+
+def assign_textures(n_images: int, n_textures: int, seed: int) -> NDArray[np.int64]:
+    """
+    texture of every dataset index, drawn from the dataset seed but from a stream separate from the poses, so that
+    the poses of a dataset do not depend on the number of textures
+    """
+    if n_textures <= 1:
+        return np.zeros(n_images, dtype=np.int64)
+    return np.random.default_rng([seed, 1]).integers(0, n_textures, n_images)
+
+
+def resize_image(source: Path, target: Path, max_size: int) -> None:
+    """decodes the image, downscales it so that its longer side is at most max_size and writes it to target"""
+    try:
+        from PIL import Image
+    except ImportError as ex:
+        raise ImportError("Preparing textures requires 'Pillow' to be installed.") from ex
+    with Image.open(source) as image:
+        image.load()
+        if max(image.size) > max_size:
+            # keeps the aspect ratio
+            image.thumbnail((max_size, max_size), Image.LANCZOS)
+        if image.mode not in ("L", "RGB", "RGBA"):
+            image = image.convert("RGB")
+        image.save(target)
+
+
+class TextureCache:
+    """
+    Content-addressed on-disk cache of textures prepared for rendering: every source is decoded and downscaled to
+    max_size once and stored as a lossless png named by the hash of the source content and the size. The copies are
+    shared by all jobs and workers using the same cache directory and stay valid as long as the source content is
+    the same, wherever the source is located. HDR textures (UNPREPARED_ENDINGS) are not prepared.
+    """
+
+    def __init__(
+            self,
+            cache_dir: Union[str, Path],
+            max_size: int,
+            resize: Callable[[Path, Path, int], None] = resize_image
+    ) -> None:
+        """:param max_size: longer side of the prepared textures in pixels, 0: use the source textures unchanged"""
+        self.cache_dir = Path(cache_dir)
+        self.max_size = max_size
+        self.resize = resize
+        # (path, size, modification time) -> content hash, so that unchanged sources are hashed once per process
+        self._hashes: Dict[Tuple[str, int, float], str] = {}
+
+    def _source_hash(self, source: Path) -> str:
+        stat = source.stat()
+        key = (str(source.absolute()), stat.st_size, stat.st_mtime)
+        if key not in self._hashes:
+            self._hashes[key] = file_hash(source)
+        return self._hashes[key]
+
+    def path_of(self, source: Union[str, Path]) -> Path:
+        """path of the prepared copy of the source"""
+        return self.cache_dir / f"{self._source_hash(Path(source))[:32]}_{self.max_size}.png"
+
+    def prepare(self, source: Union[str, Path]) -> Path:
+        """the prepared copy of the source, it is only created if it is not in the cache yet"""
+        source = Path(source)
+        if self.max_size <= 0 or source.suffix.lower() in UNPREPARED_ENDINGS:
+            return source
+        target = self.path_of(source)
+        if not target.exists():
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            # written under a temporary name of this process and renamed, so that concurrent workers never read a
+            # partial file; the ending stays .png for the encoder
+            tmp_path = target.with_name(f".{os.getpid()}_{target.name}")
+            try:
+                self.resize(source, tmp_path, self.max_size)
+                os.replace(tmp_path, target)
+            finally:
+                if tmp_path.exists():
+                    tmp_path.unlink()
+        return target
+
+    def prepare_all(self, sources: Sequence[Union[str, Path]]) -> List[Path]:
+        return [self.prepare(source) for source in sources]
@@ -0,0 +1,95 @@
+import tempfile
+import unittest
+import numpy as np
+
+from pathlib import Path
+
+from .TextureCache import TextureCache, list_textures, texture_size_for, assign_textures, resize_image
+
+
+class TextureCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp_dir.name)
+        self.textures = self.dir / "textures"
+        self.textures.mkdir()
+        for name, content in (("b.jpg", b"wood"), ("a.png", b"stone"), ("c.jpg", b"wood")):
+            (self.textures / name).write_bytes(content)
+        (self.textures / "notes.txt").write_text("not a texture")
+        self.calls = []
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def fake_resize(self, source: Path, target: Path, max_size: int) -> None:
+        self.calls.append(source.name)
+        target.write_bytes(source.read_bytes() + str(max_size).encode())
+
+    def test_list_textures(self):
+        self.assertEqual([path.name for path in list_textures(self.textures)], ["a.png", "b.jpg", "c.jpg"])
+        self.assertEqual(list_textures(self.textures / "a.png"), [self.textures / "a.png"])
+        with self.assertRaises(FileNotFoundError):
+            list_textures(self.textures / "missing.png")
+
+    def test_prepared_once_per_content_and_size(self):
+        cache = TextureCache(self.dir / "cache", 1024, resize=self.fake_resize)
+        prepared = cache.prepare_all(list_textures(self.textures))
+        # b.jpg and c.jpg have the same content and share their copy
+        self.assertEqual(prepared[1], prepared[2])
+        self.assertEqual(self.calls, ["a.png", "b.jpg"])
+        self.assertEqual(prepared[0].read_bytes(), b"stone1024")
+        # a second cache on the same directory, e.g. of another worker, reuses the copies
+        TextureCache(self.dir / "cache", 1024, resize=self.fake_resize).prepare_all(list_textures(self.textures))
+        self.assertEqual(len(self.calls), 2)
+        # another size is prepared separately
+        TextureCache(self.dir / "cache", 512, resize=self.fake_resize).prepare(self.textures / "a.png")
+        self.assertEqual(len(self.calls), 3)
+        self.assertEqual(sorted(path.name.startswith(".") for path in (self.dir / "cache").iterdir()), [False] * 3)
+
+    def test_changed_source_is_prepared_again(self):
+        cache = TextureCache(self.dir / "cache", 1024, resize=self.fake_resize)
+        first = cache.prepare(self.textures / "a.png")
+        (self.textures / "a.png").write_bytes(b"marble")
+        second = cache.prepare(self.textures / "a.png")
+        self.assertNotEqual(first, second)
+        self.assertEqual(second.read_bytes(), b"marble1024")
+
+    def test_size_zero_keeps_source(self):
+        cache = TextureCache(self.dir / "cache", 0, resize=self.fake_resize)
+        self.assertEqual(cache.prepare(self.textures / "a.png"), self.textures / "a.png")
+        self.assertEqual(self.calls, [])
+
+    def test_exr_keeps_source(self):
+        (self.textures / "sky.exr").write_bytes(b"radiance")
+        self.assertIn(self.textures / "sky.exr", list_textures(self.textures))
+        cache = TextureCache(self.dir / "cache", 1024, resize=resize_image)
+        # Pillow cannot decode exr, the texture is passed to Blender as it is
+        self.assertEqual(cache.prepare(self.textures / "sky.exr"), self.textures / "sky.exr")
+        self.assertFalse((self.dir / "cache").exists())
+
+    def test_texture_size_for(self):
+        self.assertEqual(texture_size_for((512, 512)), 1024)
+        self.assertEqual(texture_size_for((1920, 1080), oversampling=1), 2048)
+
+    def test_assign_textures(self):
+        texture_of = assign_textures(1000, 3, seed=4)
+        np.testing.assert_array_equal(texture_of, assign_textures(1000, 3, seed=4))
+        self.assertEqual(set(texture_of), {0, 1, 2})
+        np.testing.assert_array_equal(assign_textures(5, 1, seed=4), np.zeros(5))
+        # an extended dataset keeps the textures of its frames
+        np.testing.assert_array_equal(assign_textures(1500, 3, seed=4)[:1000], texture_of)
+
+    def test_resize_image(self):
+        try:
+            from PIL import Image
+        except ImportError:
+            self.skipTest("Pillow is not installed")
+        source = self.dir / "large.jpg"
+        Image.new("RGB", (400, 200), (10, 20, 30)).save(source)
+        resize_image(source, self.dir / "small.png", 100)
+        with Image.open(self.dir / "small.png") as image:
+            self.assertEqual(image.size, (100, 50))
+
+
+if __name__ == '__main__':
+    unittest.main()
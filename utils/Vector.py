@@ -1,83 +1,102 @@
 import math
 import operator
+import numpy as np
 
-from typing import Literal, Tuple, TypeVar, Iterator
+from typing import Literal, Tuple, TypeVar, Iterator, Union, Callable, Optional, Iterable
+from numpy.typing import ArrayLike, NDArray
 
-from CosyTrafo import (
+from .CosyTrafo import (
     cartesian_to_spherical, spherical_to_cartesian,
     cartesian_to_cylindrical, cylindrical_to_cartesian,
     cylindrical_to_spherical, spherical_to_cylindrical,
+    cartesian_to_spherical_batch, spherical_to_cartesian_batch,
+    cartesian_to_cylindrical_batch, cylindrical_to_cartesian_batch,
+    cylindrical_to_spherical_batch, spherical_to_cylindrical_batch,
 )
 
 # define custom type
 AnyVector = TypeVar("AnyVector", bound="Vector")
+CoordinateSystem = Literal["cartesian", "cylindrical", "spherical"]
 
 
 class Vector:
+    # no per-instance __dict__; the cartesian form is computed once and reused by all operations
+    __slots__ = ("_a", "_b", "_c", "_csys", "_cartesian")
+
     def __init__(
             self,
             a: float,
             b: float,
             c: float,
-            csys: Literal["cartesian", "cylindrical", "spherical"]
+            csys: CoordinateSystem
     ) -> None:
-        self.a = a
-        self.b = b
-        self.c = c
-        self.csys = csys
+        self._a = a
+        self._b = b
+        self._c = c
+        self._csys = csys
+        self._cartesian = (a, b, c) if csys == "cartesian" else None
+
+    def _set(self, name: str, value) -> None:
+        setattr(self, name, value)
+        self._cartesian = (self._a, self._b, self._c) if self._csys == "cartesian" else None
+
+    a = property(lambda self: self._a, lambda self, value: self._set("_a", value))
+    b = property(lambda self: self._b, lambda self, value: self._set("_b", value))
+    c = property(lambda self: self._c, lambda self, value: self._set("_c", value))
+    csys = property(lambda self: self._csys, lambda self, value: self._set("_csys", value))
 
     def __repr__(self) -> str:
-        return f"Vector({self.a}, {self.b}, {self.c}, csys={self.csys})"
+        return f"Vector({self._a}, {self._b}, {self._c}, csys={self._csys})"
 
     def __iter__(self) -> Iterator[float]:
-        return iter((self.a, self.b, self.c))
+        return iter((self._a, self._b, self._c))
 
     def to_cartesian(self) -> Tuple[float, float, float]:
-        if self.csys == "cartesian":
-            return self.a, self.b, self.c
-        elif self.csys == "cylindrical":
-            return cylindrical_to_cartesian(self.a, self.b, self.c)
-        elif self.csys == "spherical":
-            return spherical_to_cartesian(self.a, self.b, self.c)
+        if self._cartesian is None:
+            if self._csys == "cylindrical":
+                self._cartesian = cylindrical_to_cartesian(self._a, self._b, self._c)
+            elif self._csys == "spherical":
+                self._cartesian = spherical_to_cartesian(self._a, self._b, self._c)
+        return self._cartesian
 
     def to_spherical(self) -> Tuple[float, float, float]:
-        if self.csys == "cartesian":
-            return cartesian_to_spherical(self.a, self.b, self.c)
-        elif self.csys == "cylindrical":
-            return cylindrical_to_spherical(self.a, self.b, self.c)
-        elif self.csys == "spherical":
-            return self.a, self.b, self.c
+        if self._csys == "cartesian":
+            return cartesian_to_spherical(self._a, self._b, self._c)
+        elif self._csys == "cylindrical":
+            return cylindrical_to_spherical(self._a, self._b, self._c)
+        elif self._csys == "spherical":
+            return self._a, self._b, self._c
 
     def to_cylindrical(self) -> Tuple[float, float, float]:
-        if self.csys == "cartesian":
-            return cartesian_to_cylindrical(self.a, self.b, self.c)
-        elif self.csys == "cylindrical":
-            return self.a, self.b, self.c
-        elif self.csys == "spherical":
-            return cylindrical_to_spherical(self.a, self.b, self.c)
-
-    def __operate(self, other: AnyVector, op) -> AnyVector:
-        a, b, c = [
-            getattr(operator, op)(x, y)
-            for x, y in zip(self.to_cartesian(), other.to_cartesian())
-        ]
-        return Vector(a, b, c, "cartesian")
+        if self._csys == "cartesian":
+            return cartesian_to_cylindrical(self._a, self._b, self._c)
+        elif self._csys == "cylindrical":
+            return self._a, self._b, self._c
+        elif self._csys == "spherical":
+            return spherical_to_cylindrical(self._a, self._b, self._c)
+
+    def __operate(self, other: AnyVector, op: Callable[[float, float], float]) -> AnyVector:
+        a1, b1, c1 = self.to_cartesian()
+        a2, b2, c2 = other.to_cartesian()
+        return Vector(op(a1, a2), op(b1, b2), op(c1, c2), "cartesian")
 
     def __add__(self, other: AnyVector) -> AnyVector:
-        return self.__operate(other, "add")
+        return self.__operate(other, operator.add)
 
     def __sub__(self, other: AnyVector) -> AnyVector:
-        return self.__operate(other, "sub")
+        return self.__operate(other, operator.sub)
 
     def __mul__(self, other: AnyVector) -> AnyVector:
-        return self.__operate(other, "mul")
+        return self.__operate(other, operator.mul)
 
     def __truediv__(self, other: AnyVector) -> AnyVector:
-        return self.__operate(other, "truediv")
+        return self.__operate(other, operator.truediv)
 
     def dot(self, other: AnyVector) -> float:
         """calculates the scalar product or dot product between two vectors"""
-        return sum(self * other)
+        a1, b1, c1 = self.to_cartesian()
+        a2, b2, c2 = other.to_cartesian()
+        return a1 * a2 + b1 * b2 + c1 * c2
 
     def cross(self, other: AnyVector) -> AnyVector:
         """calculates the cross product between two vectors"""
@@ -92,6 +111,122 @@ class Vector:
         )
 
 
+# conversions of the rows of an (N, 3) array: (source, target) -> function
+_BATCH_CONVERSIONS = {
+    ("cartesian", "spherical"): cartesian_to_spherical_batch,
+    ("cartesian", "cylindrical"): cartesian_to_cylindrical_batch,
+    ("spherical", "cartesian"): spherical_to_cartesian_batch,
+    ("spherical", "cylindrical"): spherical_to_cylindrical_batch,
+    ("cylindrical", "cartesian"): cylindrical_to_cartesian_batch,
+    ("cylindrical", "spherical"): cylindrical_to_spherical_batch,
+}
+
+
+class VectorArray:
+    """
+    N vectors of one coordinate system stored as a contiguous float64 array of shape (N, 3) (24 bytes per vector).
+    Arithmetic operations are performed on the cartesian form and return cartesian arrays, like Vector does.
+    """
+    __slots__ = ("data", "csys")
+
+    def __init__(self, data: ArrayLike, csys: CoordinateSystem = "cartesian", copy: bool = False) -> None:
+        # arrays which are already float64 and C-contiguous are wrapped without a copy
+        data = np.array(data, dtype=np.float64, copy=True) if copy else np.ascontiguousarray(data, dtype=np.float64)
+        assert data.ndim == 2 and data.shape[1] == 3, \
+            f"The data must be an array of shape (N, 3) but had the shape {data.shape}."
+        self.data = data
+        self.csys = csys
+
+    @classmethod
+    def from_vectors(cls, vectors: Iterable[Vector], csys: Optional[CoordinateSystem] = None) -> "VectorArray":
+        """packs Vector objects into one array, in their common coordinate system or in cartesian coordinates"""
+        vectors = list(vectors)
+        if csys is None:
+            systems = {vec.csys for vec in vectors}
+            csys = systems.pop() if len(systems) == 1 else "cartesian"
+        convert = {"cartesian": Vector.to_cartesian, "spherical": Vector.to_spherical,
+                   "cylindrical": Vector.to_cylindrical}[csys]
+        return cls(np.array([convert(vec) for vec in vectors], dtype=np.float64).reshape(-1, 3), csys)
+
+    def __repr__(self) -> str:
+        return f"VectorArray({len(self)} vectors, csys={self.csys})"
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __getitem__(self, index: Union[int, slice, NDArray]) -> Union[Vector, "VectorArray"]:
+        if isinstance(index, (int, np.integer)):
+            return Vector(*self.data[index].tolist(), csys=self.csys)
+        return VectorArray(self.data[index], self.csys)
+
+    def __iter__(self) -> Iterator[Vector]:
+        return (Vector(a, b, c, csys=self.csys) for a, b, c in self.data.tolist())
+
+    def __array__(self, dtype=None, copy=None) -> NDArray[np.float64]:
+        if copy:
+            return self.data.astype(dtype or self.data.dtype, copy=True)
+        return self.data if dtype is None else self.data.astype(dtype, copy=False)
+
+    def to_numpy(self) -> NDArray[np.float64]:
+        """the underlying (N, 3) array, no copy"""
+        return self.data
+
+    @property
+    def nbytes(self) -> int:
+        return self.data.nbytes
+
+    def convert(self, csys: CoordinateSystem) -> "VectorArray":
+        """the vectors in the coordinate system csys (self if it is the current one)"""
+        if csys == self.csys:
+            return self
+        return VectorArray(_BATCH_CONVERSIONS[(self.csys, csys)](self.data), csys)
+
+    def to_cartesian(self) -> "VectorArray":
+        return self.convert("cartesian")
+
+    def to_spherical(self) -> "VectorArray":
+        return self.convert("spherical")
+
+    def to_cylindrical(self) -> "VectorArray":
+        return self.convert("cylindrical")
+
+    @staticmethod
+    def _cartesian_data(other: Union["VectorArray", Vector, ArrayLike]) -> NDArray[np.float64]:
+        if isinstance(other, VectorArray):
+            return other.to_cartesian().data
+        if isinstance(other, Vector):
+            return np.asarray(other.to_cartesian(), dtype=np.float64)
+        # plain arrays are interpreted as cartesian coordinates
+        return np.asarray(other, dtype=np.float64)
+
+    def __operate(self, other: Union["VectorArray", Vector, ArrayLike], op: Callable) -> "VectorArray":
+        return VectorArray(op(self.to_cartesian().data, self._cartesian_data(other)), "cartesian")
+
+    def __add__(self, other: Union["VectorArray", Vector, ArrayLike]) -> "VectorArray":
+        return self.__operate(other, np.add)
+
+    def __sub__(self, other: Union["VectorArray", Vector, ArrayLike]) -> "VectorArray":
+        return self.__operate(other, np.subtract)
+
+    def __mul__(self, other: Union["VectorArray", Vector, ArrayLike]) -> "VectorArray":
+        return self.__operate(other, np.multiply)
+
+    def __truediv__(self, other: Union["VectorArray", Vector, ArrayLike]) -> "VectorArray":
+        return self.__operate(other, np.divide)
+
+    def dot(self, other: Union["VectorArray", Vector, ArrayLike]) -> NDArray[np.float64]:
+        """calculates the row-wise scalar product, returns an array of shape (N,)"""
+        return np.einsum("ij,ij->i", *np.broadcast_arrays(self.to_cartesian().data, self._cartesian_data(other)))
+
+    def cross(self, other: Union["VectorArray", Vector, ArrayLike]) -> "VectorArray":
+        """calculates the row-wise cross product"""
+        return VectorArray(np.cross(self.to_cartesian().data, self._cartesian_data(other)), "cartesian")
+
+    def norm(self) -> NDArray[np.float64]:
+        """length of each vector, returns an array of shape (N,)"""
+        return np.linalg.norm(self.to_cartesian().data, axis=1)
+
+
 if __name__ == "__main__":
     vec1 = Vector(1, 2, 3, "cartesian")
     vec2 = Vector(4, 5, 6, "cartesian")
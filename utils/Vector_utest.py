@@ -0,0 +1,78 @@
+import unittest
+import numpy as np
+
+from .Vector import Vector, VectorArray
+
+
+class VectorTest(unittest.TestCase):
+    vec1 = Vector(1, 2, 3, "cartesian")
+    vec2 = Vector(4, 5, 6, "cartesian")
+
+    def test_slots(self):
+        with self.assertRaises(AttributeError):
+            Vector(1, 2, 3, "cartesian").__dict__
+
+    def test_operations(self):
+        self.assertEqual(tuple(self.vec1 + self.vec2), (5, 7, 9))
+        self.assertEqual(tuple(self.vec1 - self.vec2), (-3, -3, -3))
+        self.assertEqual(self.vec1.dot(self.vec2), 32)
+        self.assertEqual(tuple(self.vec1.cross(self.vec2)), (-3, 6, -3))
+
+    def test_cached_cartesian_follows_assignment(self):
+        vec = Vector(2, 0, 1, "cylindrical")
+        np.testing.assert_almost_equal(vec.to_cartesian(), (2, 0, 1))
+        vec.a = 3
+        np.testing.assert_almost_equal(vec.to_cartesian(), (3, 0, 1))
+
+    def test_spherical_to_cylindrical(self):
+        vec = Vector(2, np.pi / 2, 0.5, "spherical")
+        np.testing.assert_almost_equal(vec.to_cylindrical(), (2, 0.5, 0))
+
+
+class VectorArrayTest(unittest.TestCase):
+    rng = np.random.default_rng(0)
+    data1 = rng.uniform(-10, 10, (50, 3))
+    data2 = rng.uniform(-10, 10, (50, 3))
+
+    def test_zero_copy(self):
+        array = VectorArray(self.data1)
+        self.assertIs(array.to_numpy(), self.data1)
+        self.assertIs(np.asarray(array), self.data1)
+        self.assertEqual(array.nbytes, 24 * len(self.data1))
+
+    def test_matches_vector(self):
+        array1 = VectorArray(self.data1)
+        array2 = VectorArray(self.data2)
+        vectors1 = [Vector(*el, csys="cartesian") for el in self.data1]
+        vectors2 = [Vector(*el, csys="cartesian") for el in self.data2]
+        for op in ("__add__", "__sub__", "__mul__", "__truediv__", "cross"):
+            np.testing.assert_almost_equal(
+                getattr(array1, op)(array2).data,
+                [tuple(getattr(v1, op)(v2)) for v1, v2 in zip(vectors1, vectors2)]
+            )
+        np.testing.assert_almost_equal(array1.dot(array2), [v1.dot(v2) for v1, v2 in zip(vectors1, vectors2)])
+
+    def test_conversions(self):
+        array = VectorArray(self.data1)
+        spherical = array.to_spherical()
+        self.assertEqual(spherical.csys, "spherical")
+        np.testing.assert_almost_equal(spherical.data,
+                                       [Vector(*el, csys="cartesian").to_spherical() for el in self.data1])
+        np.testing.assert_almost_equal(spherical.to_cartesian().data, self.data1)
+        np.testing.assert_almost_equal(array.to_cylindrical().to_spherical().data, spherical.data)
+        np.testing.assert_almost_equal(spherical.norm(), np.linalg.norm(self.data1, axis=1))
+
+    def test_from_vectors(self):
+        array = VectorArray.from_vectors([Vector(1, 2, 3, "cartesian"), Vector(4, 5, 6, "cartesian")])
+        self.assertEqual(array.csys, "cartesian")
+        np.testing.assert_array_equal(array.data, [(1, 2, 3), (4, 5, 6)])
+        self.assertEqual(tuple(array[1]), (4, 5, 6))
+        self.assertEqual(len(array[:1]), 1)
+
+    def test_broadcast_vector(self):
+        array = VectorArray(self.data1)
+        np.testing.assert_almost_equal((array + Vector(1, 2, 3, "cartesian")).data, self.data1 + (1, 2, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
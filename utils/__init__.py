@@ -0,0 +1,6 @@
+"""
+Core of the image rendering pipeline: pose math and sampling, job configuration and dataset I/O, which run without
+Blender. The Blender adapter (BlenderScene) is the only module which imports bpy, blenderproc and mathutils and is
+therefore not imported here; none of the modules are, so that importing the package stays fast.
+"""
+__version__ = "0.1.0"